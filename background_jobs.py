@@ -0,0 +1,203 @@
+"""Background job scheduler that keeps file I/O off the Tk mainloop.
+
+Work functions run on a thread pool. Everything they report (progress,
+results, errors) goes through a queue that the Tk thread drains with
+root.after, so callbacks are always invoked on the UI thread and never
+touch Tk from a worker.
+"""
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+# How often the Tk thread drains the result queue while jobs are running (ms)
+POLL_INTERVAL_MS = 50
+
+
+class JobCancelled(Exception):
+    """Raised inside a work function when its job has been cancelled"""
+
+
+class Job:
+    """Handle passed to work functions for progress reporting and cancellation"""
+
+    def __init__(self, scheduler: "JobScheduler", key: str, description: str):
+        self.scheduler = scheduler
+        self.key = key
+        self.description = description
+        self._cancel_event = threading.Event()
+        self.superseded = False  # Cancelled because a newer job took over the same key
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def check_cancelled(self):
+        """Raise JobCancelled if the job was cancelled (call between units of work)"""
+        if self._cancel_event.is_set():
+            raise JobCancelled()
+
+    def progress(self, done: int, total: int, message: str = ""):
+        """Report progress; shown in the status bar by the Tk thread"""
+        self.check_cancelled()
+        self.scheduler.report_progress(self, done, total, message)
+
+
+class JobScheduler:
+    """Thread pool plus a result queue drained from the Tk thread
+
+    Jobs are identified by a resource key. Submitting a job whose key is
+    already pending or running cancels the older job (its callbacks are
+    dropped), so repeated requests for the same file coalesce into the
+    latest one.
+    """
+
+    def __init__(self, root, status_callback: Callable[[str], None] = None, max_workers: int = 4):
+        self.root = root
+        self.status_callback = status_callback
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._results: "queue.Queue" = queue.Queue()
+        self._active: Dict[str, Job] = {}
+        self._callbacks: Dict[Job, tuple] = {}
+        self._polling = False
+
+    def submit(self, key: str, work: Callable[[Job], Any], on_done: Callable[[Any], None] = None,
+               on_error: Callable[[Exception], None] = None, description: str = "") -> Job:
+        """Run work(job) on the pool; on_done(result) / on_error(exc) run on the Tk thread"""
+        previous = self._active.get(key)
+        if previous is not None:
+            previous.superseded = True
+            previous.cancel()
+
+        job = Job(self, key, description or key)
+        self._active[key] = job
+        self._callbacks[job] = (on_done, on_error)
+        self._executor.submit(self._run, job, work)
+        if self.status_callback and description:
+            self.status_callback(f"{description}...")
+        self._ensure_polling()
+        return job
+
+    def report_progress(self, job: Job, done: int, total: int, message: str):
+        # Called from worker threads; delivered to the status bar by _drain
+        self._results.put((job, "progress", (done, total, message)))
+
+    def _run(self, job: Job, work: Callable[[Job], Any]):
+        # Worker thread: never touch Tk here
+        try:
+            job.check_cancelled()
+            result = work(job)
+            job.check_cancelled()
+            self._results.put((job, "done", result))
+        except JobCancelled:
+            self._results.put((job, "cancelled", None))
+        except Exception as e:
+            self._results.put((job, "error", e))
+
+    def cancel(self, key: str):
+        job = self._active.get(key)
+        if job is not None:
+            job.cancel()
+
+    def cancel_all(self):
+        for job in list(self._active.values()):
+            job.cancel()
+
+    def is_busy(self, key: str = None) -> bool:
+        if key is None:
+            return bool(self._active)
+        return key in self._active
+
+    def shutdown(self):
+        self.cancel_all()
+        self._executor.shutdown(wait=False)
+
+    def _ensure_polling(self):
+        if not self._polling:
+            self._polling = True
+            self.root.after(POLL_INTERVAL_MS, self._drain)
+
+    def _drain(self):
+        # Tk thread: deliver everything the workers have reported so far
+        try:
+            while True:
+                try:
+                    job, kind, payload = self._results.get_nowait()
+                except queue.Empty:
+                    break
+                self._deliver(job, kind, payload)
+        finally:
+            # Keep polling even if a callback raised
+            if self._callbacks:
+                self.root.after(POLL_INTERVAL_MS, self._drain)
+            else:
+                self._polling = False
+
+    def _deliver(self, job: Job, kind: str, payload: Any):
+        if kind == "progress":
+            if not job.cancelled and self.status_callback:
+                done, total, message = payload
+                text = f"{job.description}: {done}/{total}"
+                if message:
+                    text += f" ({message})"
+                self.status_callback(text)
+            return
+
+        on_done, on_error = self._callbacks.pop(job, (None, None))
+        if self._active.get(job.key) is job:
+            del self._active[job.key]
+
+        if kind == "cancelled" or job.cancelled:
+            # Superseded jobs finish silently; explicit cancels are reported
+            if self.status_callback and not job.superseded:
+                self.status_callback(f"{job.description}: cancelled")
+            return
+        if kind == "done":
+            if on_done:
+                on_done(payload)
+        elif kind == "error":
+            if on_error:
+                on_error(payload)
+            elif self.status_callback:
+                self.status_callback(f"{job.description} failed: {str(payload)}")
+
+
+class InlineScheduler:
+    """Drop-in JobScheduler replacement that runs work immediately on the calling thread
+
+    Used by editors created without a scheduler (scripts, tests).
+    """
+
+    def __init__(self, status_callback: Callable[[str], None] = None):
+        self.status_callback = status_callback
+
+    def submit(self, key: str, work: Callable[[Job], Any], on_done: Callable[[Any], None] = None,
+               on_error: Callable[[Exception], None] = None, description: str = "") -> Job:
+        job = Job(self, key, description or key)
+        try:
+            result = work(job)
+        except Exception as e:
+            if on_error:
+                on_error(e)
+            else:
+                raise
+        else:
+            if on_done:
+                on_done(result)
+        return job
+
+    def report_progress(self, job: Job, done: int, total: int, message: str):
+        if self.status_callback:
+            self.status_callback(f"{job.description}: {done}/{total}")
+
+    def cancel(self, key: str):
+        pass
+
+    def cancel_all(self):
+        pass
+
+    def is_busy(self, key: str = None) -> bool:
+        return False
@@ -0,0 +1,415 @@
+"""Expression-based batch price and stock transforms over many market files.
+
+A transform script is one statement per line (or separated by ";"):
+
+    MaxPriceThreshold *= 1.15 where ClassName ~ "^AK"
+    MinPriceThreshold = 250 where File ~ "Weapons" and MinPriceThreshold < 250
+    MaxStockThreshold += 10
+
+Assignments use =, +=, -=, *= or /= on MaxPriceThreshold,
+MinPriceThreshold, MaxStockThreshold, MinStockThreshold, SellPricePercent or
+QuantityPercent. Conditions compare ClassName or File (the market file
+name) with ~ / !~ (case-insensitive regex search) or == / !=, and numeric
+fields with <, <=, >, >=, == or !=; they are joined with "and". Statements
+run in order, each seeing the previous one's results. SellPricePercent and
+QuantityPercent values below zero mean "use the default" and are never
+changed.
+
+All items of all documents are laid out as columns (NumPy arrays when NumPy
+is available, plain lists otherwise), so each statement is a handful of
+vectorized operations rather than a loop over dicts. preview() returns the
+list of changes without touching the documents (the dry run);
+apply_changes() writes them into the documents and commit_documents() saves
+every changed file as one unit.
+"""
+import json
+import math
+import os
+import re
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from document_cache import FileStat, file_stat
+from market_model import MarketDocument, MarketItem
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; the pure-Python path gives the same results
+    np = None
+
+# Fields a statement may assign to, with whether they hold whole numbers
+NUMERIC_FIELDS = {field.key: field.kind == "int" for field in MarketItem.FIELDS if field.kind in ("int", "float")}
+
+# Fields where a negative value is a "use the default" marker
+SENTINEL_FIELDS = ("SellPricePercent", "QuantityPercent")
+
+STRING_FIELDS = ("ClassName", "File")
+
+ROUND_NEAREST = "nearest"
+ROUND_UP = "up"
+ROUND_DOWN = "down"
+ROUNDING_MODES = (ROUND_NEAREST, ROUND_UP, ROUND_DOWN)
+
+# Decimal places kept for float fields such as SellPricePercent
+FLOAT_DECIMALS = 4
+
+QUOTED = r'"(?:[^"\\]|\\.)*"'
+STATEMENT_PATTERN = re.compile(
+    r'^\s*(?P<field>\w+)\s*(?P<op>[*/+-]?=)\s*(?P<value>-?\d+(?:\.\d+)?)\s*(?:\bwhere\b\s*(?P<where>.*?))?\s*$',
+    re.IGNORECASE)
+CONDITION_PATTERN = re.compile(
+    r'\s*(?P<field>\w+)\s*(?P<op>!~|~|==|!=|<=|>=|<|>)\s*(?P<value>' + QUOTED + r'|-?\d+(?:\.\d+)?)\s*')
+AND_PATTERN = re.compile(r'and\b', re.IGNORECASE)
+# Quoted strings, runs of plain text and the ";" and "#" separators outside of quotes
+SEGMENT_PATTERN = re.compile(QUOTED + r'|[^";#]+|[;#"]')
+
+
+class TransformError(ValueError):
+    """Raised for a script that can't be parsed"""
+
+
+class Condition(NamedTuple):
+    field: str
+    op: str
+    value: object  # str (unquoted) or float
+
+
+class Statement(NamedTuple):
+    field: str
+    op: str
+    value: float
+    conditions: Tuple[Condition, ...]
+    line: int
+
+
+class Change(NamedTuple):
+    """One value a transform would change"""
+    file: str
+    index: int  # Item position in the document
+    class_name: str
+    field: str
+    old: object
+    new: object
+
+
+def _unquote(text: str) -> str:
+    return re.sub(r'\\(.)', r'\1', text[1:-1])
+
+
+def parse_conditions(text: str, line: int) -> Tuple[Condition, ...]:
+    conditions = []
+    position = 0
+    while True:
+        match = CONDITION_PATTERN.match(text, position)
+        if not match:
+            raise TransformError(f"Line {line}: can't read condition '{text[position:].strip()}'")
+        field, op, value = match.group("field"), match.group("op"), match.group("value")
+        if field in STRING_FIELDS:
+            if op not in ("~", "!~", "==", "!=") or not value.startswith('"'):
+                raise TransformError(f"Line {line}: {field} needs ~, !~, == or != with a quoted string")
+            value = _unquote(value)
+            if op in ("~", "!~"):
+                try:
+                    re.compile(value)
+                except re.error as e:
+                    raise TransformError(f"Line {line}: bad regular expression {value!r}: {e}")
+        elif field in NUMERIC_FIELDS:
+            if op in ("~", "!~") or value.startswith('"'):
+                raise TransformError(f"Line {line}: {field} needs a numeric comparison")
+            value = float(value)
+        else:
+            raise TransformError(f"Line {line}: unknown field '{field}'")
+        conditions.append(Condition(field, op, value))
+        position = match.end()
+        if position >= len(text):
+            return tuple(conditions)
+        and_match = AND_PATTERN.match(text, position)
+        if not and_match:
+            raise TransformError(f"Line {line}: expected 'and' before '{text[position:].strip()}'")
+        position = and_match.end()
+
+
+def _split_statements(line: str) -> List[str]:
+    """Statements of one line: split at ";" and cut at "#" unless inside a quoted string"""
+    parts = [""]
+    for segment in SEGMENT_PATTERN.findall(line):
+        if segment == "#":
+            break
+        if segment == ";":
+            parts.append("")
+        else:
+            parts[-1] += segment
+    return parts
+
+
+def parse_script(script: str) -> List[Statement]:
+    """Parse a transform script; raises TransformError with the offending line"""
+    statements = []
+    for line_number, line in enumerate(script.splitlines(), 1):
+        for part in _split_statements(line):
+            part = part.strip()
+            if not part:
+                continue
+            match = STATEMENT_PATTERN.match(part)
+            if not match:
+                raise TransformError(f"Line {line_number}: expected '<Field> <op> <number> [where ...]'")
+            field = match.group("field")
+            if field not in NUMERIC_FIELDS:
+                raise TransformError(f"Line {line_number}: can't assign to '{field}' "
+                                     f"(use one of {', '.join(NUMERIC_FIELDS)})")
+            value = float(match.group("value"))
+            if match.group("op") == "/=" and value == 0:
+                raise TransformError(f"Line {line_number}: division by zero")
+            where = match.group("where")
+            conditions = parse_conditions(where, line_number) if where else ()
+            statements.append(Statement(field, match.group("op"), value, conditions, line_number))
+    if not statements:
+        raise TransformError("The script is empty")
+    return statements
+
+
+class ItemColumns:
+    """All items of several documents laid out as one column per field"""
+
+    def __init__(self, documents: Sequence[Tuple[str, MarketDocument]]):
+        self.files: List[str] = []  # Per row
+        self.items: List[MarketItem] = []
+        self.positions: List[int] = []
+        for file_name, document in documents:
+            for position, item in enumerate(document.items):
+                self.files.append(file_name)
+                self.items.append(item)
+                self.positions.append(position)
+        self.class_names = [item.class_name for item in self.items]
+        self.size = len(self.items)
+        self.values = {field: self._column([item.get(field) for item in self.items]) for field in NUMERIC_FIELDS}
+
+    def _column(self, values: list):
+        if np is not None:
+            return np.array(values, dtype=np.float64)
+        return [float(value) for value in values]
+
+    def copy_values(self) -> Dict[str, object]:
+        if np is not None:
+            return {field: column.copy() for field, column in self.values.items()}
+        return {field: list(column) for field, column in self.values.items()}
+
+
+def _string_mask(values: List[str], condition: Condition):
+    if condition.op in ("~", "!~"):
+        pattern = re.compile(condition.value, re.IGNORECASE)
+        matched = [pattern.search(value) is not None for value in values]
+    else:
+        matched = [value == condition.value for value in values]
+    if condition.op in ("!~", "!="):
+        matched = [not flag for flag in matched]
+    return np.array(matched, dtype=bool) if np is not None else matched
+
+
+_COMPARE = {
+    "<": lambda a, b: a < b, "<=": lambda a, b: a <= b, ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b, "==": lambda a, b: a == b, "!=": lambda a, b: a != b,
+}
+
+_ASSIGN = {
+    "=": lambda a, b: b, "+=": lambda a, b: a + b, "-=": lambda a, b: a - b,
+    "*=": lambda a, b: a * b, "/=": lambda a, b: a / b,
+}
+
+
+def _round_whole(values, mode: str, step: int):
+    """Round whole-number fields to a multiple of step"""
+    step = max(1, int(step))
+    if np is not None:
+        scaled = values / step
+        if mode == ROUND_UP:
+            scaled = np.ceil(scaled - 1e-9)
+        elif mode == ROUND_DOWN:
+            scaled = np.floor(scaled + 1e-9)
+        else:
+            scaled = np.floor(scaled + 0.5)  # Halves round up, unlike np.round
+        return scaled * step
+    if mode == ROUND_UP:
+        return [math.ceil(value / step - 1e-9) * step for value in values]
+    if mode == ROUND_DOWN:
+        return [math.floor(value / step + 1e-9) * step for value in values]
+    return [math.floor(value / step + 0.5) * step for value in values]
+
+
+def _evaluate(columns: ItemColumns, statement: Statement, values: Dict[str, object], rounding: str, step: int):
+    """Apply one statement to the working columns in place"""
+    mask = None
+    for condition in statement.conditions:
+        if condition.field == "ClassName":
+            current = _string_mask(columns.class_names, condition)
+        elif condition.field == "File":
+            current = _string_mask(columns.files, condition)
+        elif np is not None:
+            current = _COMPARE[condition.op](values[condition.field], condition.value)
+        else:
+            compare = _COMPARE[condition.op]
+            current = [compare(value, condition.value) for value in values[condition.field]]
+        if mask is None:
+            mask = current
+        elif np is not None:
+            mask = mask & current
+        else:
+            mask = [a and b for a, b in zip(mask, current)]
+
+    column = values[statement.field]
+    assign = _ASSIGN[statement.op]
+    whole = NUMERIC_FIELDS[statement.field]
+    if np is not None:
+        if mask is None:
+            mask = np.ones(columns.size, dtype=bool)
+        if statement.field in SENTINEL_FIELDS:
+            mask = mask & (column >= 0)
+        result = assign(column, statement.value)
+        result = _round_whole(result, rounding, step) if whole else np.round(result, FLOAT_DECIMALS)
+        values[statement.field] = np.where(mask, result, column)
+        return
+    if mask is None:
+        mask = [True] * columns.size
+    if statement.field in SENTINEL_FIELDS:
+        mask = [flag and value >= 0 for flag, value in zip(mask, column)]
+    result = [assign(value, statement.value) for value in column]
+    result = _round_whole(result, rounding, step) if whole else [round(value, FLOAT_DECIMALS) for value in result]
+    values[statement.field] = [new if flag else old for flag, new, old in zip(mask, result, column)]
+
+
+def preview(documents: Sequence[Tuple[str, MarketDocument]], script: str, rounding: str = ROUND_NEAREST,
+            step: int = 1) -> List[Change]:
+    """Return every value the script would change (documents are not modified)"""
+    statements = parse_script(script)
+    columns = ItemColumns(documents)
+    values = columns.copy_values()
+    for statement in statements:
+        _evaluate(columns, statement, values, rounding, step)
+
+    changes = []
+    for field, whole in NUMERIC_FIELDS.items():
+        original = columns.values[field]
+        updated = values[field]
+        if np is not None:
+            rows = np.nonzero(updated != original)[0].tolist()
+        else:
+            rows = [row for row, (old, new) in enumerate(zip(original, updated)) if old != new]
+        for row in rows:
+            item = columns.items[row]
+            new = updated[row]
+            new = int(new) if whole else float(new)
+            changes.append(Change(columns.files[row], columns.positions[row], item.class_name, field,
+                                  item.get(field), new))
+    changes.sort(key=lambda change: (change.file, change.index, change.field))
+    return changes
+
+
+def apply_changes(documents: Dict[str, MarketDocument], changes: Sequence[Change]):
+    """Write the new values into the documents (keyed by file name)"""
+    for change in changes:
+        item = documents[change.file].items[change.index]
+        setattr(item, MarketItem._BY_KEY[change.field].attr, change.new)
+
+
+def revert_changes(documents: Dict[str, MarketDocument], changes: Sequence[Change]):
+    """Undo apply_changes, e.g. after a failed save"""
+    for change in changes:
+        item = documents[change.file].items[change.index]
+        setattr(item, MarketItem._BY_KEY[change.field].attr, change.old)
+
+
+def history_changes(changes: Sequence[Change], file_name: str) -> List[Tuple[int, str, object, object]]:
+    """(position, attribute, old, new) entries of one file, as recorded in its undo history"""
+    return [(change.index, MarketItem._BY_KEY[change.field].attr, change.old, change.new)
+            for change in changes if change.file == file_name]
+
+
+def format_change(change: Change) -> str:
+    return f"{change.file}  [{change.index}] {change.class_name}  {change.field}: {change.old} -> {change.new}"
+
+
+def changed_files(changes: Sequence[Change]) -> List[str]:
+    return sorted({change.file for change in changes})
+
+
+def summarize(changes: Sequence[Change]) -> Optional[str]:
+    if not changes:
+        return None
+    items = len({(change.file, change.index) for change in changes})
+    return f"{len(changes)} value(s) on {items} item(s) in {len(changed_files(changes))} file(s)"
+
+
+def load_documents(file_paths: Sequence[str], loaded: Dict[str, Tuple[MarketDocument, Optional[FileStat]]] = None,
+                   progress=None) -> Tuple[Dict[str, Tuple[MarketDocument, Optional[FileStat]]], List[str]]:
+    """Return ({path: (document, stat)}, errors) for file_paths
+
+    Documents already in loaded (e.g. open in the editor, possibly with
+    unsaved edits) are used as they are; the rest are read from disk.
+    """
+    loaded = loaded or {}
+    documents = {}
+    errors = []
+    total = len(file_paths)
+    for done, path in enumerate(file_paths, 1):
+        if path in loaded:
+            documents[path] = loaded[path]
+        else:
+            try:
+                stat = file_stat(path)
+                documents[path] = (MarketDocument.load(path), stat)
+            except Exception as e:
+                errors.append(f"{os.path.basename(path)}: {e}")
+        if progress:
+            progress(done, total, os.path.basename(path))
+    return documents, errors
+
+
+def commit_documents(documents: Dict[str, MarketDocument],
+                     expected_stats: Dict[str, Optional[FileStat]]) -> Dict[str, Optional[FileStat]]:
+    """Save several market documents so that either all files change or none do
+
+    Every document is first written to a temporary file next to its target.
+    Only when all of them were written are the originals swapped out, and a
+    failure while swapping puts back the files already replaced. A file
+    whose (size, mtime) differs from expected_stats aborts the commit before
+    anything is touched. Returns the new stat of each file.
+    """
+    for path, expected in expected_stats.items():
+        if path in documents and file_stat(path) != expected:
+            raise ValueError(f"{os.path.basename(path)} changed on disk since the preview - preview again")
+
+    temporary = {}
+    try:
+        for path, document in documents.items():
+            temp_path = path + ".transform.tmp"
+            temporary[path] = temp_path  # Before writing, so a half-written file is removed too
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(document.to_dict(), f, indent=4, ensure_ascii=False)
+    except Exception:
+        for temp_path in temporary.values():
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+        raise
+
+    replaced = []
+    try:
+        for path, temp_path in temporary.items():
+            backup_path = path + ".transform.bak"
+            os.replace(path, backup_path)
+            replaced.append(path)
+            os.replace(temp_path, path)
+    except Exception:
+        for path in replaced:
+            os.replace(path + ".transform.bak", path)
+        for temp_path in temporary.values():
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        raise
+
+    for path in replaced:
+        try:
+            os.remove(path + ".transform.bak")
+        except OSError:
+            pass  # A stray backup is harmless
+    return {path: file_stat(path) for path in documents}
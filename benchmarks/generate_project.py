@@ -0,0 +1,157 @@
+"""Generate a synthetic DayZ Expansion project for benchmarking.
+
+    python benchmarks/generate_project.py OUTPUT_DIR [--size small|realistic|extreme] [--seed N]
+
+OUTPUT_DIR gets Market, Traders and Types folders plus a
+dayz_trader_project.json pointing at them, so the editor and trader_cli
+can open it directly. The same size and seed always give the same files.
+
+Market items are drawn from the generated type names. A share of them
+(duplicate_rate) repeat a ClassName already listed in another (or the
+same) market file, and some carry Variants and SpawnAttachments. Trader
+files list market categories, a few of which don't exist, and item
+overrides.
+"""
+import argparse
+import os
+import random
+import sys
+from typing import Dict, List, NamedTuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from market_model import MarketDocument, MarketItem, TraderDocument
+from trader_core import DEFAULT_PROJECT_FILE, Project
+
+
+class ProjectSize(NamedTuple):
+    types: int  # Type names across all types files
+    types_files: int
+    market_files: int
+    items_per_market: int
+    traders: int
+    duplicate_rate: float  # Share of market items whose ClassName is listed elsewhere too
+
+
+SIZES: Dict[str, ProjectSize] = {
+    "small": ProjectSize(types=5000, types_files=5, market_files=25, items_per_market=60, traders=5,
+                         duplicate_rate=0.05),
+    "realistic": ProjectSize(types=30000, types_files=15, market_files=120, items_per_market=80, traders=30,
+                             duplicate_rate=0.05),
+    "extreme": ProjectSize(types=100000, types_files=50, market_files=500, items_per_market=100, traders=100,
+                           duplicate_rate=0.05),
+}
+
+# Name stems loosely modelled on vanilla and modded DayZ class names
+NAME_PREFIXES = ["AK74", "AKM", "M4A1", "Mosin9130", "SKS", "FAL", "Mag_STANAG", "Mag_AKM", "Ammo_762x39",
+                 "Ammo_556x45", "TacticalBaconCan", "Apple", "BakedBeansCan", "Canteen", "Battery9V", "Hoodie",
+                 "TShirt", "Jeans", "HikingBoots", "PlateCarrierVest", "BallisticHelmet", "FirstAidKit",
+                 "BandageDressing", "Morphine", "Hatchet", "Shovel", "CarBattery", "SparkPlug", "Offroad_02",
+                 "CivilianSedan", "Expansion_Bag", "Expansion_Kit", "Flag", "Fence_Kit", "Barrel"]
+NAME_SUFFIXES = ["", "_Black", "_Green", "_Camo", "_Tan", "_Worn", "_Grey", "_Blue"]
+TYPE_CATEGORIES = ["weapons", "clothes", "food", "tools", "containers", "vehiclesparts", "explosives"]
+
+
+def type_names(count: int, rng: random.Random) -> List[str]:
+    names = []
+    for index in range(count):
+        prefix = NAME_PREFIXES[index % len(NAME_PREFIXES)]
+        names.append(f"{prefix}{rng.choice(NAME_SUFFIXES)}_{index}")
+    return names
+
+
+def write_types_file(file_path: str, names: List[str], rng: random.Random):
+    with open(file_path, 'w', encoding='utf-8') as f:
+        f.write('<?xml version="1.0" encoding="UTF-8" standalone="yes" ?>\n<types>\n')
+        for name in names:
+            nominal = rng.randint(0, 40)
+            f.write(f'    <type name="{name}">\n'
+                    f'        <nominal>{nominal}</nominal>\n'
+                    f'        <lifetime>{rng.choice([3600, 7200, 14400, 28800])}</lifetime>\n'
+                    f'        <restock>0</restock>\n'
+                    f'        <min>{nominal // 2}</min>\n'
+                    f'        <quantmin>-1</quantmin>\n'
+                    f'        <quantmax>-1</quantmax>\n'
+                    f'        <cost>100</cost>\n'
+                    f'        <flags count_in_cargo="0" count_in_hoarder="0" count_in_map="1" count_in_player="0" '
+                    f'crafted="0" deloot="0"/>\n'
+                    f'        <category name="{rng.choice(TYPE_CATEGORIES)}"/>\n'
+                    f'        <usage name="Military"/>\n'
+                    f'    </type>\n')
+        f.write('</types>\n')
+
+
+def market_item(class_name: str, names: List[str], rng: random.Random) -> MarketItem:
+    item = MarketItem.new(class_name)
+    item.max_price_threshold = rng.randrange(100, 50000, 10)
+    item.min_price_threshold = max(10, int(item.max_price_threshold * rng.uniform(0.3, 0.9)))
+    item.sell_price_percent = rng.choice([-1.0, -1.0, -1.0, 0.5, 0.75])
+    item.max_stock_threshold = rng.choice([0, 10, 50, 100, 500])
+    item.min_stock_threshold = rng.choice([0, 1, 5]) if item.max_stock_threshold else 0
+    if rng.random() < 0.10:
+        item.spawn_attachments = rng.sample(names, 2)
+    if rng.random() < 0.05:
+        item.variants = rng.sample(names, rng.randint(1, 3))
+    return item
+
+
+def generate(output_dir: str, size: ProjectSize, seed: int = 1) -> Project:
+    """Write a synthetic project into output_dir and return its folders"""
+    rng = random.Random(seed)
+    output_dir = os.path.abspath(output_dir)  # The project file must work from any working directory
+    project = Project(*(os.path.join(output_dir, folder) for folder in ("Market", "Traders", "Types")))
+    for folder in (project.market_folder, project.traders_folder, project.types_folder):
+        os.makedirs(folder, exist_ok=True)
+
+    names = type_names(size.types, rng)
+    per_file = -(-len(names) // size.types_files)
+    for index in range(size.types_files):
+        write_types_file(os.path.join(project.types_folder, f"types_{index:03d}.xml"),
+                         names[index * per_file:(index + 1) * per_file], rng)
+
+    # Market items take type names in order, wrapping around if there are more items than types
+    market_names = [f"Market_{index:03d}" for index in range(size.market_files)]
+    listed: List[str] = []
+    position = 0
+    for market_name in market_names:
+        document = MarketDocument(display_name=market_name, icon="Deliver", color="FBFCFEFF", is_exchange=0,
+                                  init_stock_percent=75.0, items=[])
+        for _ in range(size.items_per_market):
+            if listed and rng.random() < size.duplicate_rate:
+                class_name = rng.choice(listed)
+            else:
+                class_name = names[position % len(names)]
+                position += 1
+                listed.append(class_name)
+            document.items.append(market_item(class_name, names, rng))
+        document.save(os.path.join(project.market_folder, f"{market_name}.json"))
+
+    for index in range(size.traders):
+        categories = rng.sample(market_names, min(len(market_names), rng.randint(3, 12)))
+        categories = [f"{name}:1" if rng.random() < 0.1 else name for name in categories]
+        if rng.random() < 0.2:
+            categories.append("Missing_Category")
+        items = {class_name: rng.choice([0, 1, 2, 3]) for class_name in rng.sample(listed, min(len(listed), 20))}
+        document = TraderDocument(display_name=f"Trader {index}", trader_icon="Trader", categories=categories,
+                                  items=items)
+        document.save(os.path.join(project.traders_folder, f"Trader_{index:03d}.json"))
+
+    project.save(os.path.join(output_dir, DEFAULT_PROJECT_FILE))
+    return project
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate a synthetic project for benchmarking")
+    parser.add_argument("output", help="folder to create the project in")
+    parser.add_argument("--size", choices=list(SIZES), default="realistic")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+    size = SIZES[args.size]
+    generate(args.output, size, args.seed)
+    print(f"Generated a {args.size} project in {args.output}: {size.types} types in {size.types_files} file(s), "
+          f"{size.market_files} market file(s) of {size.items_per_market} item(s), {size.traders} trader(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
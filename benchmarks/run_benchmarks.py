@@ -0,0 +1,460 @@
+"""Benchmark suite for the editor's project-wide operations.
+
+    python benchmarks/run_benchmarks.py [--size small|realistic|extreme | --project DIR]
+                                        [--repeat N] [--only NAME ...] [--output FILE]
+                                        [--baseline FILE] [--tolerance FRACTION]
+
+Without --project a synthetic project is generated first (see
+generate_project). Every benchmark runs --repeat times on the real code
+paths and reports its best and median time; operations that change files
+work on a fresh scratch copy each time, and the copying is not timed.
+
+Benchmarks named gui.* drive the Tk widgets themselves (MarketEditor,
+the Types tab, startup via DAYZ_TRADER_STARTUP_CHECK). They need a display:
+without one, a virtual display is started when Xvfb is installed, otherwise
+they are reported as skipped. The rest measure the UI-free code those
+widgets delegate to and run anywhere.
+
+--output writes the results as JSON; --baseline compares against such a
+file and exits with status 1 when a benchmark got slower than the baseline
+by more than --tolerance (and by at least MIN_REGRESSION_MS).
+"""
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from generate_project import SIZES, generate
+from market_model import MarketDocument
+from name_search import GRAM_SIZE, IncrementalFilter
+from trader_core import (DEFAULT_PROJECT_FILE, Project, add_types_to_market, analyze_market_prices,
+                         build_project_validator, find_duplicates, remove_duplicates, simulate_markets)
+from types_catalog import TypesCatalog
+
+# Slowdowns smaller than this are treated as noise when comparing with a baseline
+MIN_REGRESSION_MS = 5.0
+
+# What a user types into the Types filter, one keystroke at a time
+FILTER_KEYSTROKES = ["m", "ma", "mag", "mag_", "mag_s", "mag_st", "mag_sta", "mag_stan"]
+FUZZY_QUERY = "stanag blak"
+
+# Class names added by the add_types_to_market benchmark
+ADD_TYPES_COUNT = 1000
+
+
+class Context:
+    """The project under test plus state shared by the benchmarks"""
+
+    def __init__(self, project: Project, scratch_dir: str):
+        self.project = project  # Read-only source project
+        self.scratch_dir = scratch_dir
+        self.scratch: Optional[Project] = None  # Fresh copy for benchmarks that change files
+        self.root = None  # Tk root when a display is available
+        self.state: Dict[str, object] = {}  # Set up by a benchmark's setup, used by its run
+
+    def copy_project(self) -> Project:
+        """Replace the scratch copy with a fresh copy of the project"""
+        target = os.path.join(self.scratch_dir, "project")
+        shutil.rmtree(target, ignore_errors=True)
+        folders = []
+        for folder in (self.project.market_folder, self.project.traders_folder, self.project.types_folder):
+            copy = os.path.join(target, os.path.basename(folder))
+            shutil.copytree(folder, copy)
+            folders.append(copy)
+        self.scratch = Project(*folders)
+        return self.scratch
+
+    def largest(self, paths: List[str]) -> str:
+        return max(paths, key=os.path.getsize)
+
+
+class Benchmark(NamedTuple):
+    name: str
+    run: Callable[[Context], Optional[str]]  # Timed; returns a short description of the work done
+    setup: Optional[Callable[[Context], None]]  # Untimed, before every run
+    needs_tk: bool
+    needs_numpy: bool
+
+
+BENCHMARKS: List[Benchmark] = []
+
+
+def benchmark(name: str, setup: Callable[[Context], None] = None, needs_tk: bool = False, needs_numpy: bool = False):
+    def register(run):
+        BENCHMARKS.append(Benchmark(name, run, setup, needs_tk, needs_numpy))
+        return run
+    return register
+
+
+# Types files (Types tab: load_types_file / filter_types_list)
+
+def fresh_catalog(ctx: Context):
+    ctx.state["catalog"] = TypesCatalog()  # No memory or disk cache: every file is parsed
+
+
+@benchmark("types.load_file", setup=fresh_catalog)
+def bench_types_load_file(ctx):
+    # What load_types_file runs in its worker, for every file one after another
+    catalog = ctx.state["catalog"]
+    names = sum(len(catalog.class_names(path)) for path in ctx.project.types_paths())
+    return f"{names} names in {len(ctx.project.types_paths())} file(s)"
+
+
+@benchmark("types.load_folder", setup=fresh_catalog)
+def bench_types_load_folder(ctx):
+    # Parsed on the process pool, as for validation and the types cache
+    names = ctx.state["catalog"].folder_class_names(ctx.project.types_folder)
+    return f"{len(names)} unique names"
+
+
+def loaded_filter(ctx: Context):
+    catalog = TypesCatalog()
+    names = catalog.folder_class_names(ctx.project.types_folder)
+    name_filter = IncrementalFilter()
+    name_filter.set_names(names)
+    catalog.search_index()  # Built in the background after loading in the editor
+    ctx.state.update(catalog=catalog, filter=name_filter)
+
+
+@benchmark("types.filter", setup=loaded_filter)
+def bench_types_filter(ctx):
+    catalog, name_filter = ctx.state["catalog"], ctx.state["filter"]
+    shown = 0
+    for text in FILTER_KEYSTROKES:
+        if len(text) >= GRAM_SIZE:
+            name_filter.index = catalog.search_index()
+        shown = len(name_filter.filter(text))
+    fuzzy = len(name_filter.fuzzy_filter(FUZZY_QUERY, catalog.fuzzy_index()))
+    return f"{len(FILTER_KEYSTROKES)} keystrokes, {shown} names left, {fuzzy} fuzzy matches"
+
+
+# Market files (MarketEditor.load_file / save_file)
+
+@benchmark("market.load")
+def bench_market_load(ctx):
+    items = sum(len(MarketDocument.load(path).items) for path in ctx.project.market_paths())
+    return f"{items} items in {len(ctx.project.market_paths())} file(s)"
+
+
+def loaded_markets(ctx: Context):
+    scratch = ctx.copy_project()
+    ctx.state["documents"] = [(path, MarketDocument.load(path)) for path in scratch.market_paths()]
+
+
+@benchmark("market.save", setup=loaded_markets)
+def bench_market_save(ctx):
+    for path, document in ctx.state["documents"]:
+        document.save(path)
+    return f"{len(ctx.state['documents'])} file(s)"
+
+
+# Project-wide tools
+
+@benchmark("duplicates.find")
+def bench_duplicates_find(ctx):
+    duplicates, plan, _ = find_duplicates(ctx.project.market_paths(), ctx.project.trader_paths())
+    return f"{len(duplicates)} duplicate(s) in {len(plan)} file(s)"
+
+
+def duplicates_plan(ctx: Context):
+    scratch = ctx.copy_project()
+    ctx.state["plan"] = find_duplicates(scratch.market_paths(), scratch.trader_paths())[1]
+
+
+@benchmark("duplicates.remove", setup=duplicates_plan)
+def bench_duplicates_remove(ctx):
+    removed, saved, failures = remove_duplicates(ctx.state["plan"])
+    return f"removed {removed} from {saved} file(s), {len(failures)} failure(s)"
+
+
+def types_to_add(ctx: Context):
+    scratch = ctx.copy_project()
+    names = TypesCatalog().folder_class_names(scratch.types_folder)
+    ctx.state["names"] = random.Random(1).sample(names, min(ADD_TYPES_COUNT, len(names)))
+    ctx.state["market"] = ctx.largest(scratch.market_paths())
+
+
+@benchmark("types.add_to_market", setup=types_to_add)
+def bench_add_types_to_market(ctx):
+    added, skipped = add_types_to_market(ctx.state["market"], ctx.state["names"])
+    return f"added {added}, skipped {skipped}"
+
+
+@benchmark("validate.project")
+def bench_validate_project(ctx):
+    validator = build_project_validator(ctx.project)
+    errors, warnings = validator.counts()
+    return f"{errors} error(s), {warnings} warning(s)"
+
+
+def built_validator(ctx: Context):
+    validator = build_project_validator(ctx.project)
+    path = ctx.largest(ctx.project.market_paths())
+    document = MarketDocument.load(path)
+    document.items[0].class_name = "Renamed_Item"
+    ctx.state.update(validator=validator, file=os.path.basename(path), document=document)
+
+
+@benchmark("validate.edit", setup=built_validator)
+def bench_validate_edit(ctx):
+    changed = ctx.state["validator"].update_market(ctx.state["file"], ctx.state["document"])
+    return f"{len(changed)} file(s) re-checked with changes"
+
+
+@benchmark("prices.analyze")
+def bench_prices(ctx):
+    findings, _ = analyze_market_prices(ctx.project.market_paths())
+    return f"{len(findings)} finding(s)"
+
+
+@benchmark("simulate.month", needs_numpy=True)
+def bench_simulate(ctx):
+    from economy_sim import LoadModel
+    result, _ = simulate_markets(ctx.project.market_paths(), LoadModel(seed=1))
+    return f"{len(result)} item(s) over {result.days} day(s)"
+
+
+# Tk widgets
+
+@benchmark("gui.startup", needs_tk=True)
+def bench_gui_startup(ctx):
+    # The real executable path: window shown, then the project in the working directory loaded
+    env = dict(os.environ, DAYZ_TRADER_STARTUP_CHECK="1")
+    completed = subprocess.run([sys.executable, os.path.join(REPO_DIR, "dayz_trader_editor.py")],
+                               cwd=os.path.dirname(ctx.project.market_folder), env=env,
+                               capture_output=True, text=True, timeout=300)
+    lines = completed.stdout.strip().splitlines()
+    timings = json.loads(lines[-1]) if lines else {}
+    status = "over target" if completed.returncode else "ok"
+    return ", ".join(f"{name} {ms:.0f} ms" for name, ms in timings.items()) + f" ({status})"
+
+
+def market_editor(ctx: Context, path: str):
+    from tkinter import ttk
+    from background_jobs import InlineScheduler
+    from dayz_trader_editor import MarketEditor
+    from document_cache import DocumentCache
+    previous = ctx.state.pop("frame", None)
+    if previous is not None:
+        previous.destroy()
+    frame = ttk.Frame(ctx.root)
+    editor = MarketEditor(frame, types_folder=ctx.project.types_folder, types_catalog=TypesCatalog(),
+                          scheduler=InlineScheduler(), document_cache=DocumentCache())
+    ctx.state.update(frame=frame, editor=editor, path=path)
+
+
+def new_market_editor(ctx: Context):
+    market_editor(ctx, ctx.largest(ctx.project.market_paths()))
+
+
+@benchmark("gui.market_editor.load_file", setup=new_market_editor, needs_tk=True)
+def bench_gui_load_file(ctx):
+    editor = ctx.state["editor"]
+    editor.load_file(ctx.state["path"])
+    ctx.root.update_idletasks()
+    return f"{len(editor.document.items)} items"
+
+
+def loaded_market_editor(ctx: Context):
+    scratch = ctx.copy_project()
+    market_editor(ctx, ctx.largest(scratch.market_paths()))
+    ctx.state["editor"].load_file(ctx.state["path"])
+    ctx.root.update_idletasks()
+
+
+@benchmark("gui.market_editor.save_file", setup=loaded_market_editor, needs_tk=True)
+def bench_gui_save_file(ctx):
+    editor = ctx.state["editor"]
+    editor.save_file()
+    return f"{len(editor.document.items)} items"
+
+
+def types_tab(ctx: Context):
+    from background_jobs import InlineScheduler
+    from dayz_trader_editor import DayZTraderEditor
+    app = ctx.state.get("app")
+    if app is None:
+        app = DayZTraderEditor(ctx.root)
+        app.jobs.shutdown()
+        app.jobs = InlineScheduler(app.status_var.set)  # Jobs finish before the benchmark stops timing
+        app.types_folder = ctx.project.types_folder
+        app.notebook.select(app.types_frame)
+        app.on_tab_changed()
+        ctx.state["app"] = app
+    app.types_catalog = TypesCatalog()
+    app.types_filter_var.set("")
+    app.types_file_var.set(os.path.basename(ctx.largest(ctx.project.types_paths())))
+
+
+@benchmark("gui.load_types_file", setup=types_tab, needs_tk=True)
+def bench_gui_load_types_file(ctx):
+    app = ctx.state["app"]
+    app.load_types_file()
+    ctx.root.update_idletasks()
+    return f"{len(app.all_types_class_names)} names (search index included)"
+
+
+def loaded_types_tab(ctx: Context):
+    types_tab(ctx)
+    ctx.state["app"].load_types_file()
+    ctx.root.update_idletasks()
+
+
+@benchmark("gui.filter_types_list", setup=loaded_types_tab, needs_tk=True)
+def bench_gui_filter_types_list(ctx):
+    app = ctx.state["app"]
+    for text in FILTER_KEYSTROKES:
+        app.types_filter_var.set(text)  # The trace runs filter_types_list, as when typing
+        ctx.root.update_idletasks()
+    return f"{len(FILTER_KEYSTROKES)} keystrokes, {app.types_listbox.size()} names left"
+
+
+# Display handling
+
+def start_display() -> Optional[subprocess.Popen]:
+    """Start Xvfb when there is no display but Xvfb is installed; returns the process to stop"""
+    if sys.platform in ("win32", "darwin") or os.environ.get("DISPLAY") or not shutil.which("Xvfb"):
+        return None
+    display = f":{90 + os.getpid() % 100}"
+    process = subprocess.Popen(["Xvfb", display, "-screen", "0", "1280x1024x24", "-nolisten", "tcp"],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    time.sleep(1.0)
+    os.environ["DISPLAY"] = display
+    return process
+
+
+def open_tk():
+    """A hidden Tk root, or None without a usable display"""
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+    except Exception:
+        return None
+    root.withdraw()
+    return root
+
+
+# Running and reporting
+
+def run_benchmarks(ctx: Context, selected: List[Benchmark], repeat: int) -> Dict[str, dict]:
+    results = {}
+    for bench in selected:
+        times = []
+        detail = None
+        for _ in range(repeat):
+            # Widgets outlive a run so they can be reused or destroyed untimed by the next setup
+            ctx.state = {key: value for key, value in ctx.state.items() if key in ("app", "frame")}
+            if bench.setup:
+                bench.setup(ctx)
+            started = time.perf_counter()
+            detail = bench.run(ctx)
+            times.append((time.perf_counter() - started) * 1000)
+        results[bench.name] = {"best_ms": round(min(times), 2), "median_ms": round(statistics.median(times), 2),
+                               "runs": len(times), "detail": detail}
+        print(f"{bench.name:32} {min(times):10.1f} ms  (median {statistics.median(times):.1f})  {detail or ''}",
+              flush=True)
+    return results
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    """Benchmarks slower than the baseline by more than tolerance"""
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        slower = result["best_ms"] - before["best_ms"]
+        if slower > MIN_REGRESSION_MS and result["best_ms"] > before["best_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: {before['best_ms']:.1f} ms -> {result['best_ms']:.1f} ms "
+                               f"(+{slower / before['best_ms'] * 100:.0f}%)")
+    return regressions
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the editor's project-wide operations")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--size", choices=list(SIZES), default="small", help="size of the generated project")
+    source.add_argument("--project", help=f"existing project folder (with {DEFAULT_PROJECT_FILE})")
+    parser.add_argument("--seed", type=int, default=1, help="seed of the generated project")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", nargs="+", metavar="NAME", help="run benchmarks whose name starts with NAME")
+    parser.add_argument("--output", help="write the results to a JSON file")
+    parser.add_argument("--baseline", help="results JSON to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown against the baseline")
+    args = parser.parse_args(argv)
+
+    selected = [bench for bench in BENCHMARKS
+                if not args.only or any(bench.name.startswith(prefix) for prefix in args.only)]
+    if not selected:
+        parser.error("no benchmark matches --only")
+
+    scratch_dir = tempfile.mkdtemp(prefix="trader-bench-")
+    display = None
+    ctx = None
+    try:
+        if args.project:
+            project = Project.load(os.path.join(args.project, DEFAULT_PROJECT_FILE))
+            label = args.project
+        else:
+            started = time.perf_counter()
+            project = generate(os.path.join(scratch_dir, "source"), SIZES[args.size], args.seed)
+            label = f"generated {args.size} project"
+            print(f"Generated a {args.size} project in {time.perf_counter() - started:.1f} s", flush=True)
+        ctx = Context(project, scratch_dir)
+
+        skipped = {}
+        if any(bench.needs_tk for bench in selected):
+            display = start_display()
+            ctx.root = open_tk()
+        has_numpy = importlib.util.find_spec("numpy") is not None
+        runnable = []
+        for bench in selected:
+            if bench.needs_tk and ctx.root is None:
+                skipped[bench.name] = "no display (set DISPLAY, or install Xvfb)"
+            elif bench.needs_numpy and not has_numpy:
+                skipped[bench.name] = "NumPy is not installed"
+            else:
+                runnable.append(bench)
+
+        print(f"Benchmarking {label}, best of {args.repeat}", flush=True)
+        results = run_benchmarks(ctx, runnable, args.repeat)
+        for name, reason in skipped.items():
+            print(f"{name:32} skipped: {reason}")
+
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump({"project": label, "python": platform.python_version(), "numpy": has_numpy,
+                           "results": results, "skipped": skipped}, f, indent=4)
+        if args.baseline:
+            with open(args.baseline, 'r', encoding='utf-8') as f:
+                regressions = compare(results, json.load(f).get("results", {}), args.tolerance)
+            for regression in regressions:
+                print(f"REGRESSION {regression}", file=sys.stderr)
+            if regressions:
+                return 1
+        return 0
+    finally:
+        if ctx is not None and ctx.root is not None:
+            app = ctx.state.get("app")
+            if app is not None:
+                app.folder_watcher.close()
+            ctx.root.destroy()
+        if display is not None:
+            display.terminate()
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
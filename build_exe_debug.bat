@@ -28,7 +28,6 @@ python -m PyInstaller --name="DayZ Trader Editor" ^
     --hidden-import=xml.etree.ElementTree ^
     --hidden-import=xml.etree.cElementTree ^
     --exclude-module matplotlib ^
-    --exclude-module numpy ^
     --exclude-module pandas ^
     --exclude-module scipy ^
     dayz_trader_editor.py
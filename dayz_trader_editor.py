@@ -1,13 +1,38 @@
+import time
+
+# Startup is measured from here: the first statement of the GUI module
+STARTUP_STARTED = time.perf_counter()
+
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext, colorchooser, simpledialog
+import tkinter.font as tkfont
 import json
 import os
 import sys
 import copy
-import xml.etree.ElementTree as ET
-import re
+import importlib.util
+import multiprocessing
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import List
+
+from types_catalog import TypesCatalog, get_types_catalog
+from types_cache import cache_path_for_project
+from name_search import IncrementalFilter, TrigramIndex, GRAM_SIZE
+from background_jobs import JobScheduler, InlineScheduler
+from folder_watcher import FolderWatcher
+from project_index import ProjectIndex, ROLE_ITEM, scan_market_files
+from market_model import MarketDocument, MarketItem, TraderDocument
+from document_cache import DocumentCache, file_stat
+from undo_history import InsertItems, RemoveItems, SetFields, UndoHistory, field_changes, snapshot
+from duplicates import (POLICY_KEEP_FIRST, POLICY_KEEP_IN_FILE, POLICY_LABELS, group_by_file, policy_description,
+                        remove_duplicates_in_files, write_report_csv, write_report_json)
+from trader_core import (DEFAULT_PROJECT_FILE, Project, build_project_validator, find_duplicates, known_type_names,
+                         new_market_items)
+from validation import KIND_MARKET, KIND_TRADER, SEVERITY_ERROR, format_issue
+
+
+# Time from STARTUP_STARTED until the main window has been drawn, in milliseconds
+FIRST_PAINT_TARGET_MS = 400
 
 
 def get_resource_path(relative_path):
@@ -21,17 +46,485 @@ def get_resource_path(relative_path):
     return os.path.join(base_path, relative_path)
 
 
+_icon_names = None
+
+
+def get_icon_names() -> List[str]:
+    """Sorted market icon names from icon.txt, read once per process"""
+    global _icon_names
+    if _icon_names is None:
+        try:
+            with open(get_resource_path("icon.txt"), 'r', encoding='utf-8') as f:
+                _icon_names = sorted(line.strip() for line in f if line.strip())
+        except OSError:
+            _icon_names = []  # No icon list - the Icon dropdown stays empty
+    return _icon_names
+
+
+class VirtualListbox:
+    """Listbox view over a Python sequence that only renders the visible rows
+    
+    The inner tk.Listbox never holds more than one screenful of strings; the
+    scrollbar, mouse wheel and keyboard move a window over the backing
+    sequence instead. Selection is kept as a set of indices into that
+    sequence, so SINGLE/BROWSE and EXTENDED (Ctrl/Shift-click, drag, Shift+arrows,
+    Ctrl+A) selection survive scrolling. curselection(), get(), size(),
+    bind() and <<ListboxSelect>> behave like tk.Listbox, with indices into
+    the backing sequence.
+    """
+    
+    def __init__(self, parent, items=(), selectmode=tk.BROWSE, **listbox_options):
+        self.frame = ttk.Frame(parent)
+        self.items = items
+        self.selectmode = selectmode
+        self.selected = set()
+        self.anchor = None
+        self.cursor = None
+        self.top = 0
+        self.rows = int(listbox_options.get("height", 10))
+        
+        # Selection and scrolling are handled here, so the inner listbox must not export or scroll itself
+        listbox_options["exportselection"] = False
+        self.listbox = tk.Listbox(self.frame, selectmode=tk.EXTENDED, **listbox_options)
+        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        
+        self.scrollbar = ttk.Scrollbar(self.frame, orient=tk.VERTICAL, command=self.on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        self.listbox.bind("<Configure>", self.on_configure)
+        self.listbox.bind("<Button-1>", self.on_click)
+        self.listbox.bind("<Control-Button-1>", self.on_ctrl_click)
+        self.listbox.bind("<Shift-Button-1>", self.on_shift_click)
+        self.listbox.bind("<B1-Motion>", self.on_drag)
+        self.listbox.bind("<MouseWheel>", self.on_mousewheel)
+        self.listbox.bind("<Button-4>", lambda e: self.scroll_rows(-3))
+        self.listbox.bind("<Button-5>", lambda e: self.scroll_rows(3))
+        self.listbox.bind("<Up>", lambda e: self.move_cursor(-1, False))
+        self.listbox.bind("<Down>", lambda e: self.move_cursor(1, False))
+        self.listbox.bind("<Shift-Up>", lambda e: self.move_cursor(-1, True))
+        self.listbox.bind("<Shift-Down>", lambda e: self.move_cursor(1, True))
+        self.listbox.bind("<Prior>", lambda e: self.move_cursor(-self.rows, False))
+        self.listbox.bind("<Next>", lambda e: self.move_cursor(self.rows, False))
+        self.listbox.bind("<Home>", lambda e: self.move_cursor(-len(self.items), False))
+        self.listbox.bind("<End>", lambda e: self.move_cursor(len(self.items), False))
+        self.listbox.bind("<Control-a>", self.select_all)
+        
+        self.render()
+    
+    # Geometry management and focus are delegated to the outer frame / inner listbox
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+    
+    def grid(self, **kwargs):
+        self.frame.grid(**kwargs)
+    
+    def focus(self):
+        self.listbox.focus_set()
+    
+    focus_set = focus
+    
+    def bind(self, sequence, func, add=None):
+        return self.listbox.bind(sequence, func, add)
+    
+    # tk.Listbox-like data access (indices refer to the backing sequence)
+    def set_items(self, items):
+        """Show a new backing sequence (kept by reference, not copied)"""
+        self.items = items
+        self.selected = set()
+        self.anchor = None
+        self.cursor = None
+        self.top = 0
+        self.render()
+    
+    def size(self):
+        return len(self.items)
+    
+    def get(self, index):
+        return self.items[index]
+    
+    def curselection(self):
+        return tuple(sorted(self.selected))
+    
+    def selection_set(self, index):
+        self.selected.add(index)
+        self.anchor = self.cursor = index
+        self.render_selection()
+    
+    def selection_clear(self):
+        self.selected.clear()
+        self.render_selection()
+    
+    def see(self, index):
+        """Scroll so that the backing index is visible"""
+        if index < self.top:
+            self.top = index
+        elif index >= self.top + self.rows:
+            self.top = index - self.rows + 1
+        self.render()
+    
+    # Rendering
+    def max_top(self):
+        return max(0, len(self.items) - self.rows)
+    
+    def render(self):
+        self.top = min(max(0, self.top), self.max_top())
+        # One extra row fills a partially visible line at the bottom
+        visible = self.items[self.top:self.top + self.rows + 1]
+        self.listbox.delete(0, tk.END)
+        if visible:
+            self.listbox.insert(tk.END, *visible)
+        self.render_selection()
+        self.update_scrollbar()
+    
+    def render_selection(self):
+        self.listbox.selection_clear(0, tk.END)
+        for row in range(self.listbox.size()):
+            if self.top + row in self.selected:
+                self.listbox.selection_set(row)
+    
+    def update_scrollbar(self):
+        total = len(self.items)
+        if total <= self.rows:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self.top / total, min(1.0, (self.top + self.rows) / total))
+    
+    def on_configure(self, event):
+        # Work out how many whole rows fit from the font's line height
+        line_height = tkfont.Font(font=self.listbox.cget("font")).metrics("linespace") + 1
+        padding = 2 * (int(self.listbox.cget("borderwidth")) + int(self.listbox.cget("highlightthickness")))
+        rows = max(1, (event.height - padding) // line_height)
+        if rows != self.rows:
+            self.rows = rows
+            self.render()
+    
+    # Scrolling
+    def scroll_to(self, top):
+        top = min(max(0, top), self.max_top())
+        if top != self.top:
+            self.top = top
+            self.render()
+    
+    def scroll_rows(self, delta):
+        self.scroll_to(self.top + delta)
+        return "break"
+    
+    def on_scrollbar(self, *args):
+        if args[0] == "moveto":
+            self.scroll_to(int(float(args[1]) * len(self.items)))
+        elif args[0] == "scroll":
+            step = self.rows if args[2] == "pages" else 1
+            self.scroll_to(self.top + int(args[1]) * step)
+    
+    def on_mousewheel(self, event):
+        return self.scroll_rows(-3 if event.delta > 0 else 3)
+    
+    # Selection
+    def index_at(self, y):
+        if not self.items:
+            return None
+        return min(self.top + self.listbox.nearest(y), len(self.items) - 1)
+    
+    def selection_changed(self):
+        self.render_selection()
+        self.listbox.event_generate("<<ListboxSelect>>")
+    
+    def select_range(self, first, last):
+        if first > last:
+            first, last = last, first
+        self.selected = set(range(first, last + 1))
+    
+    def on_click(self, event):
+        self.listbox.focus_set()
+        index = self.index_at(event.y)
+        if index is not None:
+            self.selected = {index}
+            self.anchor = self.cursor = index
+            self.selection_changed()
+        return "break"
+    
+    def on_ctrl_click(self, event):
+        if self.selectmode != tk.EXTENDED:
+            return self.on_click(event)
+        index = self.index_at(event.y)
+        if index is not None:
+            self.selected ^= {index}
+            self.anchor = self.cursor = index
+            self.selection_changed()
+        return "break"
+    
+    def on_shift_click(self, event):
+        if self.selectmode != tk.EXTENDED or self.anchor is None:
+            return self.on_click(event)
+        index = self.index_at(event.y)
+        if index is not None:
+            self.select_range(self.anchor, index)
+            self.cursor = index
+            self.selection_changed()
+        return "break"
+    
+    def on_drag(self, event):
+        # Dragging past the top/bottom edge scrolls the view
+        if event.y < 0:
+            self.scroll_rows(-1)
+        elif event.y > self.listbox.winfo_height():
+            self.scroll_rows(1)
+        index = self.index_at(min(max(event.y, 0), self.listbox.winfo_height()))
+        if index is None or index == self.cursor:
+            return "break"
+        if self.selectmode == tk.EXTENDED and self.anchor is not None:
+            self.select_range(self.anchor, index)
+        else:
+            self.selected = {index}
+            self.anchor = index
+        self.cursor = index
+        self.selection_changed()
+        return "break"
+    
+    def move_cursor(self, delta, extend):
+        if not self.items:
+            return "break"
+        current = self.cursor if self.cursor is not None else self.top - (1 if delta > 0 else 0)
+        index = min(max(0, current + delta), len(self.items) - 1)
+        if extend and self.selectmode == tk.EXTENDED and self.anchor is not None:
+            self.select_range(self.anchor, index)
+        else:
+            self.selected = {index}
+            self.anchor = index
+        self.cursor = index
+        self.see(index)
+        self.selection_changed()
+        return "break"
+    
+    def select_all(self, event=None):
+        if self.selectmode == tk.EXTENDED and self.items:
+            self.select_range(0, len(self.items) - 1)
+            self.selection_changed()
+        return "break"
+
+
+class ItemTableRows:
+    """Lazy sequence of formatted table rows for the items in a view order"""
+    
+    def __init__(self, table):
+        self.table = table
+    
+    def __len__(self):
+        return len(self.table.view)
+    
+    def __getitem__(self, index):
+        items = self.table.items
+        view = self.table.view
+        if isinstance(index, slice):
+            return [self.table.format_row(items[i]) for i in view[index]]
+        return self.table.format_row(items[view[index]])
+
+
+class ItemTable:
+    """Virtualized multi-column market item table with sortable columns and a filter box
+    
+    Rows are formatted on demand for the visible window only (see
+    VirtualListbox), so a market with 10k+ items costs the same to show as a
+    small one. Clicking a column header sorts by that column (again to
+    reverse) using sort keys computed once per column; the filter box
+    narrows rows by ClassName. Selection and indices passed in or out are
+    indices into the items list, not positions in the current view.
+    """
+    
+    # (property, header text, width in characters)
+    COLUMNS = (
+        ("ClassName", "ClassName", 34),
+        ("MaxPriceThreshold", "Max Price", 10),
+        ("MinPriceThreshold", "Min Price", 10),
+        ("MaxStockThreshold", "Max Stock", 10),
+        ("MinStockThreshold", "Min Stock", 10),
+        ("SellPricePercent", "Sell %", 8),
+        ("QuantityPercent", "Qty %", 7),
+    )
+    FONT = "TkFixedFont"
+    
+    def __init__(self, parent, height=25, **listbox_options):
+        self.frame = ttk.Frame(parent)
+        self.items = []
+        self.view = []  # Item indices in display order
+        self.view_source_size = 0  # len(items) when the view was computed
+        self.positions = {}  # Item index -> view position, for the current view
+        self.sort_column = None
+        self.sort_reverse = False
+        self.sort_keys = {}  # Column -> list of keys per item, computed on first sort
+        self.name_filter = IncrementalFilter()
+        self.names_stale = True
+        
+        filter_frame = ttk.Frame(self.frame)
+        filter_frame.pack(fill=tk.X, pady=(0, 3))
+        ttk.Label(filter_frame, text="Filter:").pack(side=tk.LEFT)
+        self.filter_var = tk.StringVar()
+        self.filter_var.trace_add("write", lambda *args: self.refresh())
+        ttk.Entry(filter_frame, textvariable=self.filter_var).pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        self.count_label = ttk.Label(filter_frame, text="")
+        self.count_label.pack(side=tk.LEFT)
+        
+        header_frame = ttk.Frame(self.frame)
+        header_frame.pack(fill=tk.X)
+        self.header_labels = {}
+        for prop, title, width in self.COLUMNS:
+            label = tk.Label(header_frame, text=title, width=width, font=self.FONT, anchor=tk.W if prop == "ClassName" else tk.E,
+                             relief=tk.RAISED, borderwidth=1, padx=0, cursor="hand2")
+            label.pack(side=tk.LEFT)
+            label.bind("<Button-1>", lambda e, p=prop: self.sort_by(p))
+            self.header_labels[prop] = label
+        
+        listbox_options.setdefault("width", sum(width for _prop, _title, width in self.COLUMNS))
+        self.listbox = VirtualListbox(self.frame, ItemTableRows(self), selectmode=tk.EXTENDED, height=height,
+                                      font=self.FONT, **listbox_options)
+        self.listbox.pack(fill=tk.BOTH, expand=True)
+    
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+    
+    def bind(self, sequence, func, add=None):
+        return self.listbox.bind(sequence, func, add)
+    
+    def event_generate(self, sequence):
+        self.listbox.listbox.event_generate(sequence)
+    
+    def format_row(self, item):
+        cells = []
+        for prop, _title, width in self.COLUMNS:
+            text = item.text(prop)
+            if len(text) > width - 1:
+                text = text[:width - 2] + "…"
+            cells.append(text.ljust(width) if prop == "ClassName" else text.rjust(width))
+        return "".join(cells)
+    
+    # Data
+    def set_items(self, items):
+        """Show a new list of MarketItems (kept by reference)"""
+        self.items = items
+        self.sort_keys = {}
+        self.names_stale = True
+        self.listbox.set_items(ItemTableRows(self))
+        self.refresh(keep_selection=False)
+        self.listbox.scroll_to(0)
+    
+    def items_changed(self, resort=True):
+        """Items were edited, added or removed; resort=False only redraws the visible rows"""
+        self.sort_keys = {}
+        self.names_stale = True
+        if resort or len(self.items) != self.view_source_size:
+            self.refresh()
+        else:
+            self.listbox.render()
+    
+    def column_keys(self, prop):
+        keys = self.sort_keys.get(prop)
+        if keys is None:
+            if prop == "ClassName":
+                keys = [item.class_name.lower() for item in self.items]
+            else:
+                keys = []
+                for item in self.items:
+                    value = item.get(prop)
+                    keys.append(value if isinstance(value, (int, float)) else float("-inf"))
+            self.sort_keys[prop] = keys
+        return keys
+    
+    def refresh(self, keep_selection=True):
+        """Recompute the view from the filter text and sort column"""
+        selected = self.curselection() if keep_selection else ()
+        cursor = self.active() if keep_selection else None
+        
+        if self.names_stale:
+            self.name_filter.set_names([item.class_name for item in self.items])
+            self.names_stale = False
+        query = self.filter_var.get()
+        view = self.name_filter.filter_indices(query) if query.strip() else list(range(len(self.items)))
+        if self.sort_column is not None:
+            keys = self.column_keys(self.sort_column)
+            view.sort(key=keys.__getitem__, reverse=self.sort_reverse)
+        self.view = view
+        self.view_source_size = len(self.items)
+        self.positions = {index: position for position, index in enumerate(view)}
+        
+        listbox = self.listbox
+        listbox.selected = {self.positions[index] for index in selected if index in self.positions}
+        listbox.cursor = listbox.anchor = self.positions.get(cursor)
+        listbox.render()
+        if query.strip():
+            self.count_label.config(text=f"{len(view)} of {len(self.items)}")
+        else:
+            self.count_label.config(text=f"{len(self.items)} items")
+    
+    def sort_by(self, prop):
+        if self.sort_column == prop:
+            self.sort_reverse = not self.sort_reverse
+        else:
+            self.sort_column = prop
+            self.sort_reverse = False
+        for column, title, _width in self.COLUMNS:
+            marker = (" ▼" if self.sort_reverse else " ▲") if column == prop else ""
+            self.header_labels[column].config(text=title + marker)
+        self.refresh()
+    
+    # Selection (item indices)
+    def size(self):
+        return len(self.items)
+    
+    def curselection(self):
+        view = self.view
+        return tuple(sorted(view[position] for position in self.listbox.selected if position < len(view)))
+    
+    def active(self):
+        """Item index under the selection cursor (the row clicked last)"""
+        cursor = self.listbox.cursor
+        if cursor is None or cursor >= len(self.view):
+            selection = self.curselection()
+            return selection[0] if selection else None
+        return self.view[cursor]
+    
+    def selection_clear(self):
+        self.listbox.selection_clear()
+        self.listbox.anchor = self.listbox.cursor = None
+    
+    def selection_set(self, index):
+        position = self.positions.get(index)
+        if position is not None:
+            self.listbox.selection_set(position)
+    
+    def see(self, index):
+        position = self.positions.get(index)
+        if position is not None:
+            self.listbox.see(position)
+
+
 class MarketEditor:
     """Editor for Market JSON files (items in categories)"""
     
-    def __init__(self, parent_frame: ttk.Frame, file_path: str = None, types_folder: str = None):
+    # Document fields edited in the metadata panel
+    METADATA_ATTRS = ("display_name", "icon", "color", "is_exchange", "init_stock_percent")
+    
+    def __init__(self, parent_frame: ttk.Frame, file_path: str = None, types_folder: str = None,
+                 types_catalog: TypesCatalog = None, status_callback=None, scheduler: JobScheduler = None,
+                 items_changed_callback=None, document_cache: DocumentCache = None):
         self.parent_frame = parent_frame
         self.file_path = file_path
-        self.data: Dict[str, Any] = {}
+        self.document = MarketDocument()
+        self.document_path = None  # File self.document was loaded from (None while a load is pending)
+        self.file_stat = None  # (size, mtime_ns) of that file when it was read or saved
+        self.dirty = False  # The document has edits that are not saved
+        # Parsed documents and unsaved edits survive switching to another file
+        self.document_cache = document_cache or DocumentCache()
+        self.history = UndoHistory(self.document)  # Undo/redo steps of the current document
         self.current_item_index = None
         self.meta_entries = {}
         self.meta_widgets = {}
         self.types_folder = types_folder
+        self.types_catalog = types_catalog or get_types_catalog()
+        self.status_callback = status_callback  # Optional callable(str) for the main status bar
+        # File I/O runs through the app's background scheduler when there is one
+        self.scheduler = scheduler or InlineScheduler(status_callback)
+        # Optional callable(file_path, document) run whenever items are added, removed or edited
+        self.items_changed_callback = items_changed_callback
         
         self.setup_ui()
         if file_path:
@@ -100,30 +593,22 @@ class MarketEditor:
         self.meta_widgets["InitStockPercent"] = stock_slider
         self.meta_widgets["InitStockPercent_label"] = stock_label
         
-        # Left panel: Item list with modern styling
+        # Left panel: Item table with modern styling
         list_frame = ttk.LabelFrame(self.parent_frame, text="Items")
-        list_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=False, padx=(10, 5), pady=10)
-        
-        # Listbox with scrollbar
-        listbox_container = ttk.Frame(list_frame)
-        listbox_container.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-        
-        self.item_listbox = tk.Listbox(listbox_container, width=35, height=25, selectmode=tk.EXTENDED,
-                                       font=("Segoe UI", 9), 
-                                       bg="white",
-                                       selectbackground="#4a90e2",
-                                       selectforeground="white",
-                                       borderwidth=1,
-                                       relief=tk.SOLID,
-                                       highlightthickness=1,
-                                       highlightcolor="#4a90e2")
-        self.item_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        list_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(10, 5), pady=10)
+        
+        # Virtualized table: only the visible rows are ever rendered
+        self.item_listbox = ItemTable(list_frame, height=25,
+                                      bg="white",
+                                      selectbackground="#4a90e2",
+                                      selectforeground="white",
+                                      borderwidth=1,
+                                      relief=tk.SOLID,
+                                      highlightthickness=1,
+                                      highlightcolor="#4a90e2")
+        self.item_listbox.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         self.item_listbox.bind('<<ListboxSelect>>', self.on_item_select)
         
-        list_scrollbar = ttk.Scrollbar(listbox_container, orient=tk.VERTICAL, command=self.item_listbox.yview)
-        list_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.item_listbox.config(yscrollcommand=list_scrollbar.set)
-        
         # Add/Remove/Bulk Edit buttons with improved layout
         item_btn_frame = ttk.Frame(list_frame)
         item_btn_frame.pack(fill=tk.X, padx=5, pady=5)
@@ -203,41 +688,83 @@ class MarketEditor:
         self.property_labels[prop_name] = label
         self.property_entries[prop_name] = entry
     
-    def load_file(self, file_path: str):
+    def load_file(self, file_path: str, selected_index=None):
+        self.stash_document()
         self.file_path = file_path
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                loaded_data = json.load(f)
-            
-            # Deep copy items to ensure no shared references
-            self.data = copy.deepcopy(loaded_data)
-            
-            # Ensure each item has its own copy of arrays (redundant with deepcopy, but extra safety)
-            if "Items" in self.data:
-                for item in self.data["Items"]:
-                    if "SpawnAttachments" in item:
-                        item["SpawnAttachments"] = list(item["SpawnAttachments"])
-                    if "Variants" in item:
-                        item["Variants"] = list(item["Variants"])
-            self.refresh_item_list()
-            self.current_item_index = None  # Reset selection
-            self.load_icon_list()  # Load icon list (always loads from program directory)
-            self.load_metadata()
-        except Exception as e:
+        
+        stat = file_stat(file_path)
+        cached = self.document_cache.get(file_path, stat)
+        if cached is not None:
+            self.show_document(cached.document, cached.stat, cached.dirty,
+                               cached.view_state if selected_index is None else selected_index)
+            if self.status_callback:
+                message = f"Loaded: {os.path.basename(file_path)}"
+                if cached.dirty:
+                    message += " (unsaved changes restored"
+                    if self.document_cache.changed_on_disk(cached, stat):
+                        message += "; the file changed on disk and saving will overwrite it"
+                    message += ")"
+                self.status_callback(message)
+            return
+        
+        # Show an empty editor until the document arrives so edits can't land in the wrong file
+        self.show_document(MarketDocument(), None, False, None)
+        self.document_path = None
+        
+        def read_market(job):
+            # Worker thread: file I/O, JSON parsing and validation only, no Tk calls
+            stat = file_stat(file_path)
+            return MarketDocument.load(file_path), stat
+        
+        def on_loaded(result):
+            document, stat = result
+            if self.file_path != file_path:
+                return  # Another file was selected meanwhile
+            self.document_cache.put(file_path, document, stat)
+            self.show_document(document, stat, False, selected_index)
+            if self.status_callback:
+                message = f"Loaded: {os.path.basename(file_path)}"
+                if document.problems:
+                    message += f" ({len(document.problems)} invalid value(s) replaced with defaults)"
+                self.status_callback(message)
+        
+        def on_error(e):
             messagebox.showerror("Error", f"Failed to load file: {str(e)}")
+        
+        # One load per editor at a time; a newer request supersedes an older one
+        self.scheduler.submit("market-editor-load", read_market, on_loaded, on_error,
+                              description=f"Loading {os.path.basename(file_path)}")
+    
+    def show_document(self, document: MarketDocument, stat, dirty: bool, selected_index=None):
+        """Bind the editor to a document and re-populate the widgets"""
+        self.document = document
+        self.document_path = self.file_path
+        self.file_stat = stat
+        self.dirty = dirty
+        self.history = self.document_cache.history_for(self.file_path, document, clean=not dirty)
+        self.current_item_index = None  # Reset selection
+        self.clear_item_fields()
+        self.refresh_item_list()
+        self.load_metadata()
+        if selected_index is not None and selected_index < len(document.items):
+            self.item_listbox.selection_set(selected_index)
+            self.item_listbox.see(selected_index)
+            self.item_listbox.event_generate("<<ListboxSelect>>")
+    
+    def stash_document(self):
+        """Put the current document, with any unsaved edits, back into the document cache"""
+        if self.document_path is None:
+            return
+        if self.current_item_index is not None:
+            self.save_current_item(update_listbox=False)
+        self.store_metadata()
+        self.document_cache.put(self.document_path, self.document, self.file_stat, self.dirty,
+                                self.current_item_index)
     
     def load_icon_list(self):
-        """Load icon list from icon.txt file in the program directory"""
-        icon_file = get_resource_path("icon.txt")
-        
-        if os.path.isfile(icon_file):
-            try:
-                with open(icon_file, 'r', encoding='utf-8') as f:
-                    icons = [line.strip() for line in f if line.strip()]
-                if "Icon" in self.meta_entries:
-                    self.meta_entries["Icon"]['values'] = sorted(icons)
-            except Exception as e:
-                pass  # Silently fail if icon file can't be read
+        """Fill the Icon dropdown from icon.txt in the program directory"""
+        if "Icon" in self.meta_entries:
+            self.meta_entries["Icon"]['values'] = get_icon_names()
     
     def replace_classname(self, classname_entry):
         """Open dialog to select a type name from types folder to replace ClassName"""
@@ -245,40 +772,39 @@ class MarketEditor:
             messagebox.showwarning("No Types Folder", "Please set the Types folder first.")
             return
         
-        # Collect all class names from all XML files in types folder
-        all_class_names = []
+        # Collect all class names from all XML files in types folder on a worker;
+        # only changed files are re-parsed, in parallel across processes
+        types_folder = self.types_folder
         
-        xml_files = [f for f in os.listdir(self.types_folder) if f.endswith('.xml')]
-        for xml_file in xml_files:
-            file_path = os.path.join(self.types_folder, xml_file)
-            try:
-                # Try parsing as XML first
-                try:
-                    tree = ET.parse(file_path)
-                    root = tree.getroot()
-                    
-                    # Find all type elements with name attribute
-                    for elem in root.iter():
-                        if 'name' in elem.attrib:
-                            all_class_names.append(elem.attrib['name'])
-                except ET.ParseError:
-                    # If XML parsing fails, try regex extraction
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                        # Match <type name="CLASSNAME"> pattern
-                        pattern = r'<type\s+name="([^"]+)"'
-                        matches = re.findall(pattern, content)
-                        all_class_names.extend(matches)
-            except Exception:
-                continue  # Skip files that can't be read
+        def load_names(job):
+            def on_progress(done, total, file_name):
+                job.progress(done, total, file_name or "")
+            
+            errors = []
+            names = self.types_catalog.folder_class_names(types_folder, progress=on_progress, errors=errors)
+            # Bring the substring index up to date here rather than on the first keystroke
+            return names, self.types_catalog.search_index(), errors
+        
+        def on_loaded(result):
+            names, name_index, errors = result
+            if self.status_callback:
+                if errors:
+                    self.status_callback(f"Loaded {len(names)} class names from Types folder; {errors[-1]}")
+                else:
+                    self.status_callback(f"Loaded {len(names)} class names from Types folder")
+            self.show_classname_dialog(classname_entry, names, name_index)
         
+        def on_error(e):
+            messagebox.showerror("Error", f"Failed to load types: {str(e)}")
+        
+        self.scheduler.submit("types-folder", load_names, on_loaded, on_error, description="Loading types")
+    
+    def show_classname_dialog(self, classname_entry, all_class_names: List[str], name_index: TrigramIndex = None):
+        """Show the class name picker for the given names"""
         if not all_class_names:
             messagebox.showinfo("No Types", "No class names found in Types folder XML files.")
             return
         
-        # Remove duplicates and sort
-        all_class_names = sorted(list(set(all_class_names)))
-        
         # Create selection dialog
         dialog = tk.Toplevel(self.parent_frame.winfo_toplevel())
         dialog.title("Select Class Name")
@@ -295,25 +821,27 @@ class MarketEditor:
         search_entry = ttk.Entry(search_frame, textvariable=search_var, width=30)
         search_entry.pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True)
         search_entry.focus()
+        fuzzy_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(search_frame, text="Fuzzy", variable=fuzzy_var,
+                        command=lambda: populate_listbox(search_var.get())).pack(side=tk.LEFT, padx=5)
         
         # Listbox with scrollbar
         list_frame = ttk.Frame(dialog, padding=10)
         list_frame.pack(fill=tk.BOTH, expand=True)
         
-        listbox = tk.Listbox(list_frame, height=20)
-        listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        
-        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=listbox.yview)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        listbox.config(yscrollcommand=scrollbar.set)
+        listbox = VirtualListbox(list_frame, height=20)
+        listbox.pack(fill=tk.BOTH, expand=True)
         
         # Populate listbox
+        name_filter = IncrementalFilter(all_class_names, name_index)
+        
         def populate_listbox(filter_text=""):
-            listbox.delete(0, tk.END)
-            filter_lower = filter_text.lower()
-            for name in all_class_names:
-                if not filter_text or filter_lower in name.lower():
-                    listbox.insert(tk.END, name)
+            if fuzzy_var.get():
+                # Ranked token matches, e.g. "m4 mag" -> Mag_M4A1_30Rnd
+                names = name_filter.fuzzy_filter(filter_text, self.types_catalog.fuzzy_index())
+            else:
+                names = name_filter.filter(filter_text)
+            listbox.set_items(names)
         
         populate_listbox()
         
@@ -372,46 +900,51 @@ class MarketEditor:
             color_entry.delete(0, tk.END)
             color_entry.insert(0, hex_color)
     
+    def notify_items_changed(self):
+        self.dirty = True
+        if self.items_changed_callback and self.file_path:
+            self.items_changed_callback(self.file_path, self.document)
+    
     def load_metadata(self):
-        """Load metadata fields from data"""
+        """Load metadata fields from the document"""
         if "DisplayName" in self.meta_entries:
             self.meta_entries["DisplayName"].delete(0, tk.END)
-            self.meta_entries["DisplayName"].insert(0, self.data.get("DisplayName", ""))
+            self.meta_entries["DisplayName"].insert(0, self.document.display_name)
         
         if "Icon" in self.meta_entries:
-            self.meta_entries["Icon"].set(self.data.get("Icon", ""))
+            self.meta_entries["Icon"].set(self.document.icon)
         
         if "Color" in self.meta_entries:
             self.meta_entries["Color"].delete(0, tk.END)
-            self.meta_entries["Color"].insert(0, self.data.get("Color", ""))
+            self.meta_entries["Color"].insert(0, self.document.color)
         
         if "IsExchange" in self.meta_widgets:
-            is_exchange = self.data.get("IsExchange", 0)
+            is_exchange = self.document.is_exchange
             self.meta_widgets["IsExchange"].set(bool(is_exchange))
         
         if "InitStockPercent" in self.meta_widgets:
-            init_stock = self.data.get("InitStockPercent", 75.0)
+            init_stock = self.document.init_stock_percent
             self.meta_widgets["InitStockPercent"].set(float(init_stock))
             # Update label
             if "InitStockPercent_label" in self.meta_widgets:
                 self.meta_widgets["InitStockPercent_label"].config(text=f"{float(init_stock):.1f}%")
     
     def refresh_item_list(self):
-        self.item_listbox.delete(0, tk.END)
-        if "Items" in self.data:
-            for item in self.data["Items"]:
-                class_name = item.get("ClassName", "Unknown")
-                self.item_listbox.insert(tk.END, class_name)
+        self.item_listbox.set_items(self.document.items)
+    
+    def clear_item_fields(self):
+        for entry in self.property_entries.values():
+            entry.delete(0, tk.END)
+        self.spawn_attachments_text.delete(1.0, tk.END)
+        self.variants_text.delete(1.0, tk.END)
     
     def on_item_select(self, event):
-        # Get the new selection first
-        selection = self.item_listbox.curselection()
-        if not selection:
+        # Get the new selection first (the row under the cursor, as an item index)
+        new_index = self.item_listbox.active()
+        if new_index is None:
             # If selection was cleared, don't update but don't save either
             return
         
-        new_index = selection[0]
-        
         # Only save the previous item if we're switching to a different item
         # Don't update listbox during switch to avoid interfering with selection
         if self.current_item_index is not None and self.current_item_index != new_index:
@@ -422,50 +955,31 @@ class MarketEditor:
         self.current_item_index = index
         
         # Make sure index is valid
-        if index >= len(self.data["Items"]):
+        if index >= len(self.document.items):
             return
         
-        item = self.data["Items"][index]
+        item = self.document.items[index]
         
         # Populate property fields
         for prop in self.property_order:
-            value = item.get(prop, "")
-            if value is None:
-                value = ""
             self.property_entries[prop].delete(0, tk.END)
-            self.property_entries[prop].insert(0, str(value))
+            self.property_entries[prop].insert(0, item.text(prop))
         
-        # Populate arrays - ensure we're working with a copy
+        # Populate arrays
         self.spawn_attachments_text.delete(1.0, tk.END)
-        attachments = item.get("SpawnAttachments", [])
-        if attachments:
-            self.spawn_attachments_text.insert(1.0, "\n".join(attachments))
+        if item.spawn_attachments:
+            self.spawn_attachments_text.insert(1.0, "\n".join(item.spawn_attachments))
         
         self.variants_text.delete(1.0, tk.END)
-        variants = item.get("Variants", [])
-        if variants:
-            self.variants_text.insert(1.0, "\n".join(variants))
+        if item.variants:
+            self.variants_text.insert(1.0, "\n".join(item.variants))
     
     def add_item(self):
-        # Create a completely new item dictionary (not a reference)
-        new_item = {
-            "ClassName": "new_item",
-            "MaxPriceThreshold": 1000,
-            "MinPriceThreshold": 500,
-            "SellPricePercent": -1.0,
-            "MaxStockThreshold": 500,
-            "MinStockThreshold": 1,
-            "QuantityPercent": -1,
-            "SpawnAttachments": [],  # New list
-            "Variants": []  # New list
-        }
-        
-        if "Items" not in self.data:
-            self.data["Items"] = []
-        
-        self.data["Items"].append(new_item)
+        self.history.apply(InsertItems([(len(self.document.items), MarketItem.new("new_item"))], "Add item"))
+        self.notify_items_changed()
         self.refresh_item_list()
-        self.item_listbox.selection_set(len(self.data["Items"]) - 1)
+        self.item_listbox.selection_set(len(self.document.items) - 1)
+        self.item_listbox.see(len(self.document.items) - 1)
         self.item_listbox.event_generate("<<ListboxSelect>>")
     
     def remove_item(self):
@@ -473,14 +987,13 @@ class MarketEditor:
             return
         
         if messagebox.askyesno("Confirm", "Delete this item?"):
-            self.data["Items"].pop(self.current_item_index)
+            item = self.document.items[self.current_item_index]
+            self.history.apply(RemoveItems([(self.current_item_index, item)], f"Remove {item.class_name}"))
             self.current_item_index = None
-            self.refresh_item_list()
-            # Clear fields
-            for entry in self.property_entries.values():
-                entry.delete(0, tk.END)
-            self.spawn_attachments_text.delete(1.0, tk.END)
-            self.variants_text.delete(1.0, tk.END)
+            self.notify_items_changed()
+            self.item_listbox.selection_clear()
+            self.item_listbox.items_changed()
+            self.clear_item_fields()
     
     def bulk_edit_items(self):
         """Open bulk edit dialog for selected items"""
@@ -589,40 +1102,45 @@ class MarketEditor:
             
             # Apply changes to all selected items
             items_modified = 0
+            changes = []
             for index in selections:
-                item = self.data["Items"][index]
+                item = self.document.items[index]
                 item_modified = False
+                before = snapshot(item)
                 
                 for prop, widget in bulk_entries.items():
                     if prop == "SellPricePercent":
                         # Handle slider: 0 = -1, 1-100 = 0.1 to 1.0
                         slider_val = int(float(widget.get()))
                         if slider_val == 0:
-                            item[prop] = -1.0
+                            item.sell_price_percent = -1.0
                         else:
                             # Map 1-100 to 0.1-1.0 (linear mapping: 1% = 0.1, 100% = 1.0)
-                            item[prop] = 0.1 + (slider_val - 1) * (1.0 - 0.1) / (100 - 1)
+                            item.sell_price_percent = 0.1 + (slider_val - 1) * (1.0 - 0.1) / (100 - 1)
                         item_modified = True
                     else:
                         # Handle text entries
                         value = widget.get().strip()
                         if value:  # Only update if value provided
                             try:
-                                if prop in ["MaxPriceThreshold", "MinPriceThreshold", "MaxStockThreshold", 
-                                           "MinStockThreshold"]:
-                                    item[prop] = int(value)
-                                elif prop == "QuantityPercent":
-                                    item[prop] = int(float(value))
-                                item_modified = True
+                                float(value)
                             except ValueError:
-                                pass  # Skip invalid values
+                                continue  # Skip invalid values
+                            item.set_text(prop, value)
+                            item_modified = True
                 
                 if item_modified:
                     items_modified += 1
+                changes.extend(field_changes(index, item, before))
+            
+            if changes:
+                self.history.record(SetFields(changes, f"Bulk edit {len(selections)} item(s)"))
+            if items_modified > 0:
+                self.notify_items_changed()
             
             # Clear current selection to prevent confusion
             self.current_item_index = None
-            self.refresh_item_list()
+            self.item_listbox.items_changed()
             dialog.destroy()
             if items_modified > 0:
                 messagebox.showinfo("Success", f"Bulk edit applied to {items_modified} item(s).")
@@ -642,100 +1160,122 @@ class MarketEditor:
             return
         
         # Make sure we're working with the correct item index
-        if self.current_item_index >= len(self.data["Items"]):
+        if self.current_item_index >= len(self.document.items):
             return
         
-        item = self.data["Items"][self.current_item_index]
+        item = self.document.items[self.current_item_index]
+        before = snapshot(item)
         
-        # Save properties - always update with what's in the Entry widget
+        # Only fields whose text differs from the stored value are parsed
+        # (empty or invalid numbers fall back to the field default)
+        changed = False
+        invalid = []
         for prop in self.property_order:
-            value = self.property_entries[prop].get().strip()
-            # Try to convert to appropriate type
-            try:
-                if prop in ["MaxPriceThreshold", "MinPriceThreshold", "MaxStockThreshold", 
-                           "MinStockThreshold"]:
-                    # For integers, use 0 if empty
-                    item[prop] = int(value) if value else 0
-                elif prop == "SellPricePercent":
-                    # For floats, use -1.0 if empty (common default)
-                    item[prop] = float(value) if value else -1.0
-                elif prop == "QuantityPercent":
-                    # For integers, use -1 if empty (common default)
-                    item[prop] = int(float(value)) if value else -1
-                else:
-                    # For strings like ClassName, use empty string if empty
-                    item[prop] = value
-            except ValueError:
-                # If conversion fails, keep as string or default
-                if prop in ["MaxPriceThreshold", "MinPriceThreshold", "MaxStockThreshold", 
-                           "MinStockThreshold"]:
-                    item[prop] = 0
-                elif prop == "SellPricePercent":
-                    item[prop] = -1.0
-                elif prop == "QuantityPercent":
-                    item[prop] = -1
-                else:
-                    item[prop] = value
-        
-        # Save arrays - create new lists to avoid shared references
+            text = self.property_entries[prop].get()
+            if not item.is_valid_text(prop, text):
+                invalid.append(prop)
+            changed |= item.set_text(prop, text)
+        if invalid and self.status_callback:
+            self.status_callback(f"{item.class_name}: invalid {', '.join(invalid)} replaced with the default")
+        
+        # Save arrays
         attachments_text = self.spawn_attachments_text.get(1.0, tk.END).strip()
-        item["SpawnAttachments"] = [a.strip() for a in attachments_text.split("\n") if a.strip()]
+        attachments = [a.strip() for a in attachments_text.split("\n") if a.strip()]
+        if attachments != item.spawn_attachments:
+            item.spawn_attachments = attachments
+            changed = True
         
         variants_text = self.variants_text.get(1.0, tk.END).strip()
-        item["Variants"] = [v.strip() for v in variants_text.split("\n") if v.strip()]
-        
-        # Update the listbox display if ClassName changed (but don't interfere with selection)
-        # Only update if we have a valid index and the name actually changed
-        if update_listbox and "ClassName" in item and self.current_item_index is not None:
-            class_name = item["ClassName"]
-            # Check if the displayed name needs updating
-            if self.current_item_index < self.item_listbox.size():
-                try:
-                    current_display = self.item_listbox.get(self.current_item_index)
-                    if current_display != class_name:
-                        # Temporarily unbind to prevent event recursion during update
-                        self.item_listbox.unbind('<<ListboxSelect>>')
-                        # Store current selection to restore it
-                        current_selection = self.item_listbox.curselection()
-                        self.item_listbox.delete(self.current_item_index)
-                        self.item_listbox.insert(self.current_item_index, class_name)
-                        # Restore the selection
-                        if current_selection:
-                            self.item_listbox.selection_set(current_selection[0])
-                        # Rebind the event handler
-                        self.item_listbox.bind('<<ListboxSelect>>', self.on_item_select)
-                except tk.TclError:
-                    # If listbox was destroyed or index is invalid, just rebind
-                    self.item_listbox.bind('<<ListboxSelect>>', self.on_item_select)
+        variants = [v.strip() for v in variants_text.split("\n") if v.strip()]
+        if variants != item.variants:
+            item.variants = variants
+            changed = True
+        
+        if changed:
+            self.history.record(SetFields(field_changes(self.current_item_index, item, before),
+                                          f"Edit {item.class_name}"))
+            self.notify_items_changed()
+        
+        # Redraw the changed row; sorting and filtering are only redone on an explicit save
+        # so the row being switched away from doesn't jump under the cursor
+        if changed:
+            self.item_listbox.items_changed(resort=update_listbox)
     
-    def save_file(self):
-        """Save the entire file"""
-        if not self.file_path:
-            return False
+    def store_metadata(self):
+        """Copy the metadata widgets into the document, marking it dirty if anything changed"""
+        document = self.document
+        before = snapshot(document, self.METADATA_ATTRS)
         
-        # Save current item first (and update listbox display)
-        if self.current_item_index is not None:
-            self.save_current_item(update_listbox=True)
-        
-        # Save metadata
         if "DisplayName" in self.meta_entries:
-            self.data["DisplayName"] = self.meta_entries["DisplayName"].get().strip()
+            document.display_name = self.meta_entries["DisplayName"].get().strip()
         
         if "Icon" in self.meta_entries:
-            self.data["Icon"] = self.meta_entries["Icon"].get().strip()
+            document.icon = self.meta_entries["Icon"].get().strip()
         
         if "Color" in self.meta_entries:
-            self.data["Color"] = self.meta_entries["Color"].get().strip().upper()
+            color = self.meta_entries["Color"].get().strip().upper()
+            if color != document.color.upper():
+                document.color = color
         
         if "IsExchange" in self.meta_widgets:
-            self.data["IsExchange"] = 1 if self.meta_widgets["IsExchange"].get() else 0
+            is_exchange = bool(self.meta_widgets["IsExchange"].get())
+            if is_exchange != bool(document.is_exchange):
+                document.is_exchange = 1 if is_exchange else 0
         
         if "InitStockPercent" in self.meta_widgets:
-            self.data["InitStockPercent"] = float(self.meta_widgets["InitStockPercent"].get())
+            init_stock = float(self.meta_widgets["InitStockPercent"].get())
+            # Keep the stored value (and its JSON type) unless the slider moved it
+            if abs(init_stock - document.init_stock_percent) >= 0.05:
+                document.init_stock_percent = init_stock
+        
+        changes = field_changes(None, document, before, self.METADATA_ATTRS)
+        if changes:
+            self.history.record(SetFields(changes, "Edit market metadata"))
+            self.dirty = True
+    
+    def undo(self):
+        """Undo the last edit; returns the undone step or None"""
+        return self.step_history(self.history.undo)
+    
+    def redo(self):
+        """Redo the last undone edit; returns the redone step or None"""
+        return self.step_history(self.history.redo)
+    
+    def step_history(self, step):
+        if self.document_path is None:
+            return None
+        # Edits still sitting in the fields become a step of their own first
+        if self.current_item_index is not None:
+            self.save_current_item(update_listbox=False)
+        self.store_metadata()
+        
+        operation, positions = step()
+        if operation is None:
+            return None
+        selected_index = positions[0] if positions else self.current_item_index
+        self.show_document(self.document, self.file_stat, not self.history.is_saved(), selected_index)
+        if self.items_changed_callback:
+            self.items_changed_callback(self.file_path, self.document)
+        return operation
+    
+    def save_file(self):
+        """Save the entire file"""
+        if not self.file_path or self.document_path != self.file_path:
+            return False  # Nothing loaded yet
+        
+        # Save current item first (and update listbox display)
+        if self.current_item_index is not None:
+            self.save_current_item(update_listbox=True)
+        
+        self.store_metadata()
         
         try:
-            with open(self.file_path, 'w', encoding='utf-8') as f:
-                json.dump(self.data, f, indent=4, ensure_ascii=False)
+            self.document.save(self.file_path)
+            self.dirty = False
+            self.file_stat = file_stat(self.file_path)
+            self.document_cache.put(self.file_path, self.document, self.file_stat, False,
+                                    self.current_item_index)
+            self.history.mark_saved()
             return True
         except Exception as e:
             messagebox.showerror("Error", f"Failed to save file: {str(e)}")
@@ -745,11 +1285,21 @@ class MarketEditor:
 class TraderEditor:
     """Editor for Trader JSON files (categories and items)"""
     
-    def __init__(self, parent_frame: ttk.Frame, file_path: str = None, market_folder: str = None):
+    def __init__(self, parent_frame: ttk.Frame, file_path: str = None, market_folder: str = None,
+                 market_files_provider=None, document_cache: DocumentCache = None, changed_callback=None):
         self.parent_frame = parent_frame
-        self.file_path = file_path
-        self.data: Dict[str, Any] = {}
+        self.file_path = None  # Set once a file has been loaded
+        self.document = TraderDocument()
+        self.file_stat = None
+        self.dirty = False
+        self.clean_state = None  # to_dict() of the document as last read or saved
+        self.document_cache = document_cache or DocumentCache()
+        self.history = UndoHistory(self.document)
         self.market_folder = market_folder
+        # Optional callable returning market file names (e.g. from the folder watcher)
+        self.market_files_provider = market_files_provider
+        # Optional callable(file_path, document) run after categories, items or metadata change
+        self.changed_callback = changed_callback
         
         self.setup_ui()
         if file_path:
@@ -814,13 +1364,35 @@ class TraderEditor:
         self.items_text.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
     
     def load_file(self, file_path: str):
+        self.stash_document()
+        stat = file_stat(file_path)
+        cached = self.document_cache.get(file_path, stat)
+        if cached is not None:
+            document, stat, dirty = cached.document, cached.stat, cached.dirty
+        else:
+            try:
+                document = TraderDocument.load(file_path)
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to load file: {str(e)}")
+                return
+            dirty = False
+            self.document_cache.put(file_path, document, stat)
+        
         self.file_path = file_path
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                self.data = json.load(f)
-            self.refresh_ui()
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load file: {str(e)}")
+        self.document = document
+        self.file_stat = stat
+        self.dirty = dirty
+        self.clean_state = None if dirty else document.to_dict()
+        self.history = self.document_cache.history_for(file_path, document, clean=not dirty)
+        self.refresh_ui()
+    
+    def stash_document(self):
+        """Put the current document, with any unsaved edits, back into the document cache"""
+        if not self.file_path:
+            return
+        self.store_fields()
+        self.dirty = self.dirty or self.document.to_dict() != self.clean_state
+        self.document_cache.put(self.file_path, self.document, self.file_stat, self.dirty)
     
     def refresh_ui(self):
         # Refresh category dropdown
@@ -828,20 +1400,18 @@ class TraderEditor:
         
         # Load metadata
         for field, entry in self.meta_entries.items():
-            value = self.data.get(field, "")
             entry.delete(0, tk.END)
-            entry.insert(0, str(value))
+            entry.insert(0, self.document.text(field))
         
         # Load categories
         self.categories_listbox.delete(0, tk.END)
-        if "Categories" in self.data:
-            for cat in self.data["Categories"]:
-                self.categories_listbox.insert(tk.END, cat)
+        for cat in self.document.categories:
+            self.categories_listbox.insert(tk.END, cat)
         
         # Load items
         self.items_text.delete(1.0, tk.END)
-        if "Items" in self.data and isinstance(self.data["Items"], dict):
-            items_lines = [f"{k}: {v}" for k, v in self.data["Items"].items()]
+        if self.document.items:
+            items_lines = [f"{k}: {v}" for k, v in self.document.items.items()]
             self.items_text.insert(1.0, "\n".join(items_lines))
     
     def refresh_category_list(self):
@@ -850,7 +1420,10 @@ class TraderEditor:
             self.category_combo['values'] = []
             return
         
-        json_files = [f for f in os.listdir(self.market_folder) if f.endswith('.json')]
+        if self.market_files_provider:
+            json_files = self.market_files_provider()
+        else:
+            json_files = [f for f in os.listdir(self.market_folder) if f.endswith('.json')]
         # Remove .json extension and sort
         categories = sorted([f[:-5] for f in json_files])
         self.category_combo['values'] = categories
@@ -860,13 +1433,13 @@ class TraderEditor:
         if not category:
             return
         
-        if "Categories" not in self.data:
-            self.data["Categories"] = []
-        
-        if category not in self.data["Categories"]:
-            self.data["Categories"].append(category)
+        if category not in self.document.categories:
+            categories = self.document.categories
+            self.history.apply(SetFields([(None, "categories", categories, categories + [category])],
+                                         f"Add category {category}"))
             self.categories_listbox.insert(tk.END, category)
             self.category_combo.set("")
+            self.notify_changed()
     
     def remove_category(self):
         selection = self.categories_listbox.curselection()
@@ -876,10 +1449,68 @@ class TraderEditor:
         index = selection[0]
         category = self.categories_listbox.get(index)
         
-        if "Categories" in self.data:
-            if category in self.data["Categories"]:
-                self.data["Categories"].remove(category)
-                self.categories_listbox.delete(index)
+        if category in self.document.categories:
+            categories = self.document.categories
+            self.history.apply(SetFields([(None, "categories", categories,
+                                           [name for name in categories if name != category])],
+                                         f"Remove category {category}"))
+            self.categories_listbox.delete(index)
+            self.notify_changed()
+    
+    def store_fields(self):
+        """Copy the metadata and items widgets into the document"""
+        before = snapshot(self.document)
+        
+        # Save metadata
+        for field, entry in self.meta_entries.items():
+            self.document.set_text(field, entry.get())
+        
+        # Save categories (already in the document)
+        
+        # Save items
+        items_text = self.items_text.get(1.0, tk.END).strip()
+        if items_text:
+            items_dict = {}
+            for line in items_text.split("\n"):
+                if ":" in line:
+                    parts = line.split(":", 1)
+                    key = parts[0].strip()
+                    value = parts[1].strip()
+                    try:
+                        items_dict[key] = int(value)
+                    except ValueError:
+                        items_dict[key] = value
+            self.document.items = items_dict
+        # Keep existing items if text is empty
+        
+        changes = field_changes(None, self.document, before)
+        if changes:
+            self.history.record(SetFields(changes, "Edit trader"))
+            self.notify_changed()
+    
+    def notify_changed(self):
+        if self.changed_callback and self.file_path:
+            self.changed_callback(self.file_path, self.document)
+    
+    def undo(self):
+        """Undo the last edit; returns the undone step or None"""
+        return self.step_history(self.history.undo)
+    
+    def redo(self):
+        """Redo the last undone edit; returns the redone step or None"""
+        return self.step_history(self.history.redo)
+    
+    def step_history(self, step):
+        if not self.file_path:
+            return None
+        self.store_fields()  # Pending field edits become a step of their own first
+        operation, _ = step()
+        if operation is None:
+            return None
+        self.dirty = self.document.to_dict() != self.clean_state
+        self.refresh_ui()
+        self.notify_changed()
+        return operation
     
     def save_file(self):
         """Save the entire file"""
@@ -887,39 +1518,13 @@ class TraderEditor:
             return False
         
         try:
-            # Save metadata
-            for field, entry in self.meta_entries.items():
-                value = entry.get().strip()
-                if field in ["MinRequiredReputation", "MaxRequiredReputation", "RequiredCompletedQuestID"]:
-                    try:
-                        self.data[field] = int(value) if value else 0
-                    except ValueError:
-                        self.data[field] = value
-                else:
-                    self.data[field] = value
-            
-            # Save categories (already in data)
-            
-            # Save items
-            items_text = self.items_text.get(1.0, tk.END).strip()
-            if items_text:
-                items_dict = {}
-                for line in items_text.split("\n"):
-                    if ":" in line:
-                        parts = line.split(":", 1)
-                        key = parts[0].strip()
-                        value = parts[1].strip()
-                        try:
-                            items_dict[key] = int(value)
-                        except ValueError:
-                            items_dict[key] = value
-                self.data["Items"] = items_dict
-            elif "Items" in self.data:
-                # Keep existing items if text is empty
-                pass
-            
-            with open(self.file_path, 'w', encoding='utf-8') as f:
-                json.dump(self.data, f, indent=4, ensure_ascii=False)
+            self.store_fields()
+            self.document.save(self.file_path)
+            self.dirty = False
+            self.file_stat = file_stat(self.file_path)
+            self.clean_state = self.document.to_dict()
+            self.document_cache.put(self.file_path, self.document, self.file_stat)
+            self.history.mark_saved()
             return True
         except Exception as e:
             messagebox.showerror("Error", f"Failed to save file: {str(e)}")
@@ -934,9 +1539,6 @@ class DayZTraderEditor:
         self.root.title("DayZ Trader Editor")
         self.root.geometry("1200x800")
         
-        # Set application icon
-        self.set_icon()
-        
         # Configure modern styling
         self.setup_style()
         
@@ -944,14 +1546,62 @@ class DayZTraderEditor:
         self.traders_folder = None
         self.types_folder = None
         self.all_types_class_names = []  # Store all class names for filtering
+        self.types_name_filter = IncrementalFilter()  # Narrows results as the filter text grows
+        self.types_catalog = get_types_catalog()  # Shared parsed types cache
+        self.project_index = ProjectIndex()  # ClassName -> market files, kept current as files change
+        self.documents = DocumentCache()  # Parsed market/trader documents and their unsaved edits
         self.current_market_editor = None
         self.current_trader_editor = None
         self.project_file_path = None
+        self.validator = None  # ProjectValidator of the last full check, kept current as files change
+        self.validation_time_ms = 0.0  # Duration of that check
+        self.validation_rows = []  # Issues shown in the Validation tab, in list order
         
         self.setup_ui()
         
+        # Background workers for file I/O; results are delivered on the Tk thread
+        self.jobs = JobScheduler(self.root, status_callback=self.status_var.set)
+        
+        # Single source of truth for the contents of the project folders
+        self.folder_watcher = FolderWatcher(self.root.after)
+        self.folder_watcher.subscribe(self.on_folder_events)
+        
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
+        # Everything not needed to draw the window waits until it has been drawn
+        self.startup_timings = {}  # Milliseconds since STARTUP_STARTED, by milestone
+        self.startup_failed = False  # Set by the DAYZ_TRADER_STARTUP_CHECK benchmark
+        self.root.bind("<Map>", self.on_first_map, add="+")
+    
+    def on_first_map(self, event):
+        if event.widget is not self.root or "mapped" in self.startup_timings:
+            return
+        self.startup_timings["mapped"] = (time.perf_counter() - STARTUP_STARTED) * 1000
+        self.root.after(0, self.finish_startup)
+    
+    def finish_startup(self):
+        """Deferred startup work: window icon and the default project"""
+        self.root.update_idletasks()  # Let the first paint complete
+        first_paint = (time.perf_counter() - STARTUP_STARTED) * 1000
+        self.startup_timings["first_paint"] = first_paint
+        
+        # Set application icon
+        self.set_icon()
+        
         # Try to load default project file if it exists
         self.load_default_project()
+        self.startup_timings["project_loaded"] = (time.perf_counter() - STARTUP_STARTED) * 1000
+        
+        timing = f"window shown in {first_paint:.0f} ms"
+        if first_paint > FIRST_PAINT_TARGET_MS:
+            timing += f", over the {FIRST_PAINT_TARGET_MS} ms target"
+        self.status_var.set(f"{self.status_var.get()} ({timing})")
+        
+        if os.environ.get("DAYZ_TRADER_STARTUP_CHECK"):
+            # Startup benchmark: report the timings and quit (exit status 1 if over the target)
+            print(json.dumps({name: round(ms, 1) for name, ms in self.startup_timings.items()}))
+            self.startup_failed = first_paint > FIRST_PAINT_TARGET_MS
+            self.root.after(0, self.root.destroy)
     
     def set_icon(self):
         """Load and set the application icon"""
@@ -1088,11 +1738,29 @@ class DayZTraderEditor:
         file_menu.add_command(label="Save Project", command=self.save_project)
         file_menu.add_command(label="Load Project", command=self.load_project)
         file_menu.add_separator()
-        file_menu.add_command(label="Exit", command=self.root.quit)
+        file_menu.add_command(label="Exit", command=self.on_close)
+        
+        edit_menu = tk.Menu(menubar, tearoff=0)
+        menubar.add_cascade(label="Edit", menu=edit_menu)
+        edit_menu.add_command(label="Undo", accelerator="Ctrl+Z", command=self.undo)
+        edit_menu.add_command(label="Redo", accelerator="Ctrl+Y", command=self.redo)
+        self.root.bind("<Control-z>", lambda e: self.undo())
+        self.root.bind("<Control-y>", lambda e: self.redo())
+        self.root.bind("<Control-Z>", lambda e: self.redo())  # Ctrl+Shift+Z
         
         tools_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Tools", menu=tools_menu)
         tools_menu.add_command(label="Remove Duplicates", command=self.remove_duplicates)
+        tools_menu.add_command(label="Batch Transform...", command=self.batch_transform)
+        tools_menu.add_command(label="Validate Project", command=self.show_validation_tab)
+        tools_menu.add_command(label="Price Analysis...", command=self.price_analysis)
+        # The simulator needs NumPy, which a build or install may not include
+        if importlib.util.find_spec("numpy") is not None:
+            tools_menu.add_command(label="Economy Simulator...", command=self.economy_simulator)
+        else:
+            tools_menu.add_command(label="Economy Simulator... (needs NumPy)", state=tk.DISABLED)
+        tools_menu.add_separator()
+        tools_menu.add_command(label="Cancel Background Tasks", command=lambda: self.jobs.cancel_all())
         
         # Top frame for folder selection with card-style background
         folder_frame = ttk.Frame(self.root, style="Card.TFrame")
@@ -1138,53 +1806,80 @@ class DayZTraderEditor:
         self.market_file_combo.pack(side=tk.LEFT, padx=5)
         self.market_file_combo.bind("<<ComboboxSelected>>", self.load_market_file)
         
-        ttk.Button(market_select_frame, text="🔄 Refresh", command=self.refresh_market_files).pack(side=tk.LEFT, padx=5)
+        ttk.Button(market_select_frame, text="🔄 Refresh", command=lambda: self.rescan_folder("market")).pack(side=tk.LEFT, padx=5)
         ttk.Button(market_select_frame, text="➕ New File", command=self.new_market_file, style="Primary.TButton").pack(side=tk.LEFT, padx=5)
         
         self.market_editor_frame = ttk.Frame(self.market_frame)
         self.market_editor_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
-        # Trader tab
+        # Trader and Types tabs are filled in on first visit (see build_trader_tab/build_types_tab)
         self.trader_frame = ttk.Frame(self.notebook)
         self.notebook.add(self.trader_frame, text="Trader Editor")
+        self.types_frame = ttk.Frame(self.notebook)
+        self.notebook.add(self.types_frame, text="Types Viewer")
+        self.validation_frame = ttk.Frame(self.notebook)
+        self.notebook.add(self.validation_frame, text="Validation")
+        self.tab_builders = {str(self.trader_frame): self.build_trader_tab, str(self.types_frame): self.build_types_tab,
+                             str(self.validation_frame): self.build_validation_tab}
+        self.built_tabs = {"market"}
+        self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
+        
+        # Selections and filter state exist from the start so they can be set before the tabs are built
+        self.trader_file_var = tk.StringVar()
+        self.types_file_var = tk.StringVar()
+        self.types_market_file_var = tk.StringVar()
+        self.types_filter_var = tk.StringVar()
+        self.types_filter_var.trace('w', lambda *args: self.filter_types_list())
+        self.types_fuzzy_var = tk.BooleanVar(value=False)
+        self.validation_errors_only_var = tk.BooleanVar(value=False)
         
+        # Status bar
+        self.status_var = tk.StringVar(value="Ready")
+        status_bar = ttk.Label(self.root, textvariable=self.status_var, relief=tk.SUNKEN, anchor=tk.W)
+        status_bar.pack(side=tk.BOTTOM, fill=tk.X)
+    
+    def on_tab_changed(self, event=None):
+        builder = self.tab_builders.pop(self.notebook.select(), None)
+        if builder:
+            builder()
+    
+    def build_trader_tab(self):
+        """Create the Trader tab's widgets and load its files"""
         trader_select_frame = ttk.Frame(self.trader_frame)
         trader_select_frame.pack(fill=tk.X, padx=10, pady=10)
         
         ttk.Label(trader_select_frame, text="Trader File:", style="Heading.TLabel").pack(side=tk.LEFT, padx=(0, 10))
-        self.trader_file_var = tk.StringVar()
         self.trader_file_combo = ttk.Combobox(trader_select_frame, textvariable=self.trader_file_var,
                                                state="readonly", width=45)
         self.trader_file_combo.pack(side=tk.LEFT, padx=5)
         self.trader_file_combo.bind("<<ComboboxSelected>>", self.load_trader_file)
         
-        ttk.Button(trader_select_frame, text="🔄 Refresh", command=self.refresh_trader_files).pack(side=tk.LEFT, padx=5)
+        ttk.Button(trader_select_frame, text="🔄 Refresh", command=lambda: self.rescan_folder("traders")).pack(side=tk.LEFT, padx=5)
         
         self.trader_editor_frame = ttk.Frame(self.trader_frame)
         self.trader_editor_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
-        # Types tab
-        self.types_frame = ttk.Frame(self.notebook)
-        self.notebook.add(self.types_frame, text="Types Viewer")
-        
+        self.built_tabs.add("traders")
+        self.refresh_trader_files()
+    
+    def build_types_tab(self):
+        """Create the Types tab's widgets and load its files"""
         types_select_frame = ttk.Frame(self.types_frame)
         types_select_frame.pack(fill=tk.X, padx=10, pady=10)
         
         ttk.Label(types_select_frame, text="XML File:", style="Heading.TLabel").pack(side=tk.LEFT, padx=(0, 10))
-        self.types_file_var = tk.StringVar()
         self.types_file_combo = ttk.Combobox(types_select_frame, textvariable=self.types_file_var,
                                                state="readonly", width=40)
         self.types_file_combo.pack(side=tk.LEFT, padx=5)
         self.types_file_combo.bind("<<ComboboxSelected>>", self.load_types_file)
         
-        ttk.Button(types_select_frame, text="🔄 Refresh", command=self.refresh_types_files).pack(side=tk.LEFT, padx=5)
+        ttk.Button(types_select_frame, text="🔄 Refresh", command=lambda: self.rescan_folder("types")).pack(side=tk.LEFT, padx=5)
         
         # Add to market file section
         add_frame = ttk.Frame(self.types_frame)
         add_frame.pack(fill=tk.X, padx=10, pady=(0, 10))
         
         ttk.Label(add_frame, text="Add To:", style="Heading.TLabel").pack(side=tk.LEFT, padx=(0, 10))
-        self.types_market_file_var = tk.StringVar()
         self.types_market_file_combo = ttk.Combobox(add_frame, textvariable=self.types_market_file_var,
                                                       state="readonly", width=40)
         self.types_market_file_combo.pack(side=tk.LEFT, padx=5)
@@ -1195,40 +1890,66 @@ class DayZTraderEditor:
         filter_frame.pack(fill=tk.X, padx=10, pady=(0, 10))
         
         ttk.Label(filter_frame, text="🔍 Filter:", style="Heading.TLabel").pack(side=tk.LEFT, padx=(0, 10))
-        self.types_filter_var = tk.StringVar()
         self.types_filter_entry = ttk.Entry(filter_frame, textvariable=self.types_filter_var, width=50)
         self.types_filter_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
-        self.types_filter_var.trace('w', lambda *args: self.filter_types_list())
         
         ttk.Button(filter_frame, text="Clear", command=self.clear_types_filter).pack(side=tk.LEFT, padx=5)
+        ttk.Checkbutton(filter_frame, text="Fuzzy", variable=self.types_fuzzy_var,
+                        command=self.filter_types_list).pack(side=tk.LEFT, padx=5)
         
         # Class names list (with extended selection for bulk selection)
         types_list_frame = ttk.LabelFrame(self.types_frame, text="Class Names (Double-click to copy, Ctrl+Click/Shift+Click to select multiple)")
         types_list_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         
-        listbox_container = ttk.Frame(types_list_frame)
-        listbox_container.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-        
-        self.types_listbox = tk.Listbox(listbox_container, height=25, selectmode=tk.EXTENDED,
-                                        font=("Segoe UI", 9),
-                                        bg="white",
-                                        selectbackground="#4a90e2",
-                                        selectforeground="white",
-                                        borderwidth=1,
-                                        relief=tk.SOLID,
-                                        highlightthickness=1,
-                                        highlightcolor="#4a90e2")
-        self.types_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        # Virtualized: only the visible rows are handed to Tk, the rest stay in the Python list
+        self.types_listbox = VirtualListbox(types_list_frame, height=25, selectmode=tk.EXTENDED,
+                                            font=("Segoe UI", 9),
+                                            bg="white",
+                                            selectbackground="#4a90e2",
+                                            selectforeground="white",
+                                            borderwidth=1,
+                                            relief=tk.SOLID,
+                                            highlightthickness=1,
+                                            highlightcolor="#4a90e2")
+        self.types_listbox.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         self.types_listbox.bind('<Double-Button-1>', self.copy_type_name)
+        self.types_listbox.bind('<<ListboxSelect>>', self.show_type_usage)
         
-        types_scrollbar = ttk.Scrollbar(listbox_container, orient=tk.VERTICAL, command=self.types_listbox.yview)
-        types_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.types_listbox.config(yscrollcommand=types_scrollbar.set)
-        
-        # Status bar
-        self.status_var = tk.StringVar(value="Ready")
-        status_bar = ttk.Label(self.root, textvariable=self.status_var, relief=tk.SUNKEN, anchor=tk.W)
-        status_bar.pack(side=tk.BOTTOM, fill=tk.X)
+        self.built_tabs.add("types")
+        self.refresh_types_market_files()
+        self.refresh_types_files()
+    
+    def build_validation_tab(self):
+        """Create the Validation tab's widgets and run the first full check"""
+        validation_top_frame = ttk.Frame(self.validation_frame)
+        validation_top_frame.pack(fill=tk.X, padx=10, pady=10)
+        
+        ttk.Button(validation_top_frame, text="🔄 Revalidate", command=self.revalidate_project).pack(side=tk.LEFT, padx=5)
+        ttk.Checkbutton(validation_top_frame, text="Errors only", variable=self.validation_errors_only_var,
+                        command=self.show_validation_issues).pack(side=tk.LEFT, padx=5)
+        self.validation_summary_label = ttk.Label(validation_top_frame, text="", style="Info.TLabel")
+        self.validation_summary_label.pack(side=tk.LEFT, padx=15)
+        
+        issues_frame = ttk.LabelFrame(self.validation_frame, text="Issues (Double-click to open the file)")
+        issues_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        self.validation_listbox = VirtualListbox(issues_frame, height=25,
+                                                 font=("Segoe UI", 9),
+                                                 bg="white",
+                                                 selectbackground="#4a90e2",
+                                                 selectforeground="white",
+                                                 borderwidth=1,
+                                                 relief=tk.SOLID,
+                                                 highlightthickness=1,
+                                                 highlightcolor="#4a90e2")
+        self.validation_listbox.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.validation_listbox.bind('<Double-Button-1>', self.open_validation_issue)
+        
+        self.built_tabs.add("validation")
+        if self.validator is None:
+            self.revalidate_project()
+        else:
+            self.show_validation_issues()
     
     def set_market_folder(self):
         folder = filedialog.askdirectory(title="Select Market Folder")
@@ -1242,6 +1963,7 @@ class DayZTraderEditor:
             if self.current_trader_editor:
                 self.current_trader_editor.market_folder = folder
                 self.current_trader_editor.refresh_category_list()
+            self.project_folders_changed()
             # Auto-save to project file if one is set
             if self.project_file_path:
                 self.save_project(silent=True)
@@ -1253,6 +1975,7 @@ class DayZTraderEditor:
             self.traders_label.config(text=f"Traders Folder: {os.path.basename(folder)}")
             self.refresh_trader_files()
             self.status_var.set(f"Traders folder set: {folder}")
+            self.project_folders_changed()
             # Auto-save to project file if one is set
             if self.project_file_path:
                 self.save_project(silent=True)
@@ -1267,18 +1990,20 @@ class DayZTraderEditor:
             # Update market editor's types folder if it exists
             if self.current_market_editor:
                 self.current_market_editor.types_folder = folder
+            self.project_folders_changed()
             # Auto-save to project file if one is set
             if self.project_file_path:
                 self.save_project(silent=True)
     
     def refresh_types_files(self):
         """Refresh the list of XML files in the Types folder"""
+        if "types" not in self.built_tabs:
+            return  # Done when the tab is first shown
         if not self.types_folder or not os.path.isdir(self.types_folder):
             self.types_file_combo['values'] = []
             return
         
-        xml_files = [f for f in os.listdir(self.types_folder) if f.endswith('.xml')]
-        xml_files.sort()
+        xml_files = self.project_files("types")
         self.types_file_combo['values'] = xml_files
         
         if xml_files and not self.types_file_var.get():
@@ -1287,70 +2012,56 @@ class DayZTraderEditor:
     
     def load_types_file(self, event=None):
         """Load and parse XML file to extract type names"""
-        if not self.types_folder or not self.types_file_var.get():
+        if "types" not in self.built_tabs or not self.types_folder or not self.types_file_var.get():
             return
         
-        file_path = os.path.join(self.types_folder, self.types_file_var.get())
+        file_name = self.types_file_var.get()
+        file_path = os.path.join(self.types_folder, file_name)
         
-        try:
-            # Clear existing items
-            self.types_listbox.delete(0, tk.END)
-            
-            # Parse XML file
-            class_names = []
-            
-            # Try parsing as XML first
-            try:
-                tree = ET.parse(file_path)
-                root = tree.getroot()
-                
-                # Find all type elements with name attribute
-                for elem in root.iter():
-                    if 'name' in elem.attrib:
-                        class_names.append(elem.attrib['name'])
-            except ET.ParseError:
-                # If XML parsing fails, try regex extraction
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    # Match <type name="CLASSNAME"> pattern
-                    pattern = r'<type\s+name="([^"]+)"'
-                    matches = re.findall(pattern, content)
-                    class_names.extend(matches)
-            
-            # Remove duplicates and sort
-            class_names = sorted(list(set(class_names)))
-            
+        # Clear existing items
+        self.types_listbox.set_items([])
+        
+        def parse_types(job):
+            # Parsed once per file version by the shared catalog
+            return self.types_catalog.class_names(file_path)
+        
+        def on_loaded(class_names):
             # Store all class names for filtering
             self.all_types_class_names = class_names
+            self.types_name_filter.set_names(class_names)
             
             # Apply current filter or show all
             self.filter_types_list()
             
-            self.status_var.set(f"Loaded {len(class_names)} class names from {self.types_file_var.get()}")
+            self.status_var.set(f"Loaded {len(class_names)} class names from {file_name}")
             
-        except Exception as e:
+            # Index the new file in the background so the first search doesn't pay for it
+            self.jobs.submit("types-index", lambda job: self.types_catalog.search_index())
+        
+        def on_error(e):
             messagebox.showerror("Error", f"Failed to load types file: {str(e)}")
             self.status_var.set(f"Error loading types file: {str(e)}")
+        
+        self.jobs.submit("types-file", parse_types, on_loaded, on_error, description=f"Loading {file_name}")
     
     def filter_types_list(self):
         """Filter the types listbox based on filter text"""
-        if not hasattr(self, 'all_types_class_names'):
+        if "types" not in self.built_tabs:
             return
         
         filter_text = self.types_filter_var.get().strip().lower()
         
-        # Clear listbox
-        self.types_listbox.delete(0, tk.END)
-        
-        # Filter class names
-        if filter_text:
-            filtered_names = [name for name in self.all_types_class_names if filter_text in name.lower()]
+        # Filter class names (lower-cased once per load, narrowed incrementally while typing)
+        if filter_text and self.types_fuzzy_var.get():
+            # Ranked, typo-tolerant token matching
+            filtered_names = self.types_name_filter.fuzzy_filter(filter_text, self.types_catalog.fuzzy_index())
         else:
-            filtered_names = self.all_types_class_names
+            if len(filter_text) >= GRAM_SIZE:
+                self.types_name_filter.index = self.types_catalog.search_index()
+            filtered_names = self.types_name_filter.filter(filter_text)
         
-        # Add filtered names to listbox
-        for name in filtered_names:
-            self.types_listbox.insert(tk.END, name)
+        # Show filtered names (only the visible rows are rendered)
+        self.types_listbox.set_items(filtered_names)
         
         # Update status
         if filter_text:
@@ -1372,6 +2083,23 @@ class DayZTraderEditor:
             self.root.clipboard_append(type_name)
             self.status_var.set(f"Copied '{type_name}' to clipboard")
     
+    def show_type_usage(self, event=None):
+        """Show in the status bar which market files already list the selected class name"""
+        selection = self.types_listbox.curselection()
+        if len(selection) != 1:
+            return
+        class_name = self.types_listbox.get(selection[0])
+        refs = self.project_index.lookup(class_name)
+        if not refs:
+            self.status_var.set(f"{class_name}: not in any market file")
+            return
+        parts = []
+        for ref in refs:
+            label = ref.file if ref.role == ROLE_ITEM else f"{ref.file} ({ref.role})"
+            if label not in parts:
+                parts.append(label)
+        self.status_var.set(f"{class_name}: {', '.join(parts)}")
+    
     def add_types_to_market(self):
         """Add selected type names to the selected market file"""
         # Get selected market file
@@ -1392,62 +2120,85 @@ class DayZTraderEditor:
         selected_class_names = [self.types_listbox.get(index) for index in selections]
         
         # Load the market file
-        market_file_path = os.path.join(self.market_folder, self.types_market_file_var.get())
-        
-        try:
-            # Read the market file
-            with open(market_file_path, 'r', encoding='utf-8') as f:
-                market_data = json.load(f)
-            
-            # Ensure Items array exists
-            if "Items" not in market_data:
-                market_data["Items"] = []
+        market_file_name = self.types_market_file_var.get()
+        market_file_path = os.path.join(self.market_folder, market_file_name)
+        
+        # Class names already sold from a different market file
+        listed_elsewhere = {}
+        for class_name in selected_class_names:
+            other_files = [f for f in self.project_index.files_for(class_name) if f != market_file_name]
+            if other_files:
+                listed_elsewhere[class_name] = other_files
+        
+        # Edits pending in the Market Editor go into the document cache first, so the
+        # items are added to the document the user sees and can be undone there
+        if self.current_market_editor:
+            self.current_market_editor.stash_document()
+        cached = self.documents.get(market_file_path, file_stat(market_file_path))
+        
+        def add_items(document, stat, dirty):
+            # New items for the names the file doesn't list yet
+            new_items, items_skipped = new_market_items(document, selected_class_names)
             
-            # Get existing class names to avoid duplicates
-            existing_class_names = {item.get("ClassName", "") for item in market_data["Items"]}
-            
-            # Add new items (skip if already exists)
-            items_added = 0
-            items_skipped = 0
-            
-            for class_name in selected_class_names:
-                if class_name in existing_class_names:
-                    items_skipped += 1
-                    continue
-                
-                new_item = {
-                    "ClassName": class_name,
-                    "MaxPriceThreshold": 1000,
-                    "MinPriceThreshold": 500,
-                    "SellPricePercent": -1.0,
-                    "MaxStockThreshold": 500,
-                    "MinStockThreshold": 1,
-                    "QuantityPercent": -1,
-                    "SpawnAttachments": [],
-                    "Variants": []
-                }
-                market_data["Items"].append(new_item)
-                existing_class_names.add(class_name)
-                items_added += 1
-            
-            # Save the market file
-            with open(market_file_path, 'w', encoding='utf-8') as f:
-                json.dump(market_data, f, indent=4, ensure_ascii=False)
+            history = self.documents.history_for(market_file_path, document, clean=not dirty)
+            if new_items:
+                operation = InsertItems(enumerate(new_items, len(document.items)), f"Add {len(new_items)} type(s)")
+                operation.redo(document)
+                if not dirty:
+                    # Save the market file; with unsaved edits it is left for the user to save.
+                    # The step is only recorded once saved, so a failed insert can't be redone
+                    try:
+                        document.save(market_file_path)
+                    except Exception as e:
+                        operation.undo(document)
+                        on_error(e)
+                        return
+                history.record(operation)
+                if not dirty:
+                    stat = file_stat(market_file_path)
+                    self.documents.mark_clean(market_file_path, stat)
+                    history.mark_saved()
             
+            self.on_market_items_changed(market_file_path, document)
             # Show result message
-            msg = f"Added {items_added} item(s) to {self.types_market_file_var.get()}"
+            msg = f"Added {len(new_items)} item(s) to {market_file_name}"
             if items_skipped > 0:
                 msg += f"\nSkipped {items_skipped} duplicate(s)"
+            if dirty and new_items:
+                msg += "\nThe file has unsaved edits, so it was not saved - save it from the Market Editor"
+            if listed_elsewhere:
+                msg += f"\n{len(listed_elsewhere)} item(s) are also listed in other market files:"
+                for class_name, other_files in list(listed_elsewhere.items())[:10]:
+                    msg += f"\n  {class_name}: {', '.join(other_files)}"
+                if len(listed_elsewhere) > 10:
+                    msg += f"\n  ... and {len(listed_elsewhere) - 10} more"
             messagebox.showinfo("Success", msg)
             self.status_var.set(msg)
             
             # Refresh market editor if it's viewing this file
-            if self.current_market_editor and self.market_file_var.get() == self.types_market_file_var.get():
-                self.load_market_file()
-            
-        except Exception as e:
+            editor = self.current_market_editor
+            if editor and editor.document is document:
+                editor.show_document(document, stat, dirty, editor.current_item_index)
+        
+        def read_market(job):
+            # Worker thread: file I/O and parsing only
+            stat = file_stat(market_file_path)
+            return MarketDocument.load(market_file_path), stat
+        
+        def on_loaded(result):
+            document, stat = result
+            self.documents.put(market_file_path, document, stat)
+            add_items(document, stat, False)
+        
+        def on_error(e):
             messagebox.showerror("Error", f"Failed to add items to market file: {str(e)}")
             self.status_var.set(f"Error: {str(e)}")
+        
+        if cached is not None:
+            add_items(cached.document, cached.stat, cached.dirty)
+        else:
+            self.jobs.submit(f"market:{market_file_path}", read_market, on_loaded, on_error,
+                             description=f"Adding {len(selected_class_names)} item(s) to {market_file_name}")
     
     def save_project(self, silent=False):
         """Save current folder selections to a project file
@@ -1470,16 +2221,10 @@ class DayZTraderEditor:
             if not file_path:
                 return
             self.project_file_path = file_path
+            self.attach_types_cache()
         
         try:
-            project_data = {
-                "market_folder": self.market_folder or "",
-                "traders_folder": self.traders_folder or "",
-                "types_folder": self.types_folder or ""
-            }
-            
-            with open(self.project_file_path, 'w', encoding='utf-8') as f:
-                json.dump(project_data, f, indent=4, ensure_ascii=False)
+            Project(self.market_folder, self.traders_folder, self.types_folder).save(self.project_file_path)
             
             self.status_var.set(f"Project saved: {os.path.basename(self.project_file_path)}")
             if not silent:
@@ -1503,12 +2248,14 @@ class DayZTraderEditor:
             return
         
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                project_data = json.load(f)
+            project = Project.load(file_path)
+            
+            # Use the project's types cache before any types file gets parsed
+            self.attach_types_cache(file_path)
             
             # Load market folder
-            if "market_folder" in project_data and project_data["market_folder"]:
-                market_folder = project_data["market_folder"]
+            if project.market_folder:
+                market_folder = project.market_folder
                 if os.path.isdir(market_folder):
                     self.market_folder = market_folder
                     self.market_label.config(text=f"Market Folder: {os.path.basename(market_folder)}")
@@ -1519,8 +2266,8 @@ class DayZTraderEditor:
                     messagebox.showwarning("Warning", f"Market folder not found:\n{market_folder}")
             
             # Load traders folder
-            if "traders_folder" in project_data and project_data["traders_folder"]:
-                traders_folder = project_data["traders_folder"]
+            if project.traders_folder:
+                traders_folder = project.traders_folder
                 if os.path.isdir(traders_folder):
                     self.traders_folder = traders_folder
                     self.traders_label.config(text=f"Traders Folder: {os.path.basename(traders_folder)}")
@@ -1529,8 +2276,8 @@ class DayZTraderEditor:
                     messagebox.showwarning("Warning", f"Traders folder not found:\n{traders_folder}")
             
             # Load types folder
-            if "types_folder" in project_data and project_data["types_folder"]:
-                types_folder = project_data["types_folder"]
+            if project.types_folder:
+                types_folder = project.types_folder
                 if os.path.isdir(types_folder):
                     self.types_folder = types_folder
                     self.types_label.config(text=f"Types Folder: {os.path.basename(types_folder)}")
@@ -1542,6 +2289,7 @@ class DayZTraderEditor:
                     messagebox.showwarning("Warning", f"Types folder not found:\n{types_folder}")
             
             self.project_file_path = file_path
+            self.project_folders_changed()
             self.status_var.set(f"Project loaded: {os.path.basename(file_path)}")
             messagebox.showinfo("Success", "Project loaded successfully!")
             
@@ -1550,33 +2298,40 @@ class DayZTraderEditor:
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load project: {str(e)}")
     
+    def attach_types_cache(self, project_file_path: str = None):
+        """Point the types catalog at the on-disk cache stored next to the project file"""
+        project_file_path = project_file_path or self.project_file_path
+        if project_file_path:
+            self.types_catalog.attach_cache(cache_path_for_project(project_file_path))
+    
     def load_default_project(self):
         """Try to load a default project file if it exists"""
-        default_project = "dayz_trader_project.json"
+        default_project = DEFAULT_PROJECT_FILE
         if os.path.isfile(default_project):
             try:
-                with open(default_project, 'r', encoding='utf-8') as f:
-                    project_data = json.load(f)
+                project = Project.load(default_project)
+                
+                self.attach_types_cache(default_project)
                 
                 # Load market folder
-                if "market_folder" in project_data and project_data["market_folder"]:
-                    market_folder = project_data["market_folder"]
+                if project.market_folder:
+                    market_folder = project.market_folder
                     if os.path.isdir(market_folder):
                         self.market_folder = market_folder
                         self.market_label.config(text=f"Market Folder: {os.path.basename(market_folder)}")
                         self.refresh_market_files()
                 
                 # Load traders folder
-                if "traders_folder" in project_data and project_data["traders_folder"]:
-                    traders_folder = project_data["traders_folder"]
+                if project.traders_folder:
+                    traders_folder = project.traders_folder
                     if os.path.isdir(traders_folder):
                         self.traders_folder = traders_folder
                         self.traders_label.config(text=f"Traders Folder: {os.path.basename(traders_folder)}")
                         self.refresh_trader_files()
                 
                 # Load types folder
-                if "types_folder" in project_data and project_data["types_folder"]:
-                    types_folder = project_data["types_folder"]
+                if project.types_folder:
+                    types_folder = project.types_folder
                     if os.path.isdir(types_folder):
                         self.types_folder = types_folder
                         self.types_label.config(text=f"Types Folder: {os.path.basename(types_folder)}")
@@ -1644,66 +2399,321 @@ class DayZTraderEditor:
             messagebox.showerror("Error", f"Failed to create new market file: {str(e)}")
             self.status_var.set(f"Error creating file: {str(e)}")
     
+    def project_files(self, role: str) -> List[str]:
+        """Sorted file names in a project folder ("market", "traders" or "types")
+        
+        Served from the folder watcher's snapshot; the folder is only scanned
+        when it is first watched or when the watcher reports a change.
+        """
+        folder, suffix = {
+            "market": (self.market_folder, ".json"),
+            "traders": (self.traders_folder, ".json"),
+            "types": (self.types_folder, ".xml"),
+        }[role]
+        if not folder or not os.path.isdir(folder):
+            return []
+        if self.folder_watcher.folder(role) != folder:
+            self.folder_watcher.watch(role, folder, suffix)
+        return self.folder_watcher.files(role)
+    
+    def rescan_folder(self, role: str):
+        """Refresh button handler - force a rescan, then refresh the dropdowns"""
+        if not self.folder_watcher.rescan(role):
+            # Nothing changed on disk; still refresh in case the folder itself was switched
+            self.on_folder_events([], roles={role})
+    
+    def on_folder_events(self, events, roles=None):
+        """Update dropdowns and caches for files added, removed or modified in project folders"""
+        roles = roles or {event.role for event in events}
+        
+        if "market" in roles:
+            self.refresh_market_files()
+            self.refresh_types_market_files()
+            if self.current_trader_editor:
+                self.current_trader_editor.refresh_category_list()
+        
+        if "traders" in roles:
+            self.refresh_trader_files()
+        
+        if "types" in roles:
+            for event in events:
+                if event.role == "types" and event.kind == "removed" and self.types_folder:
+                    self.types_catalog.invalidate(os.path.join(self.types_folder, event.name))
+            self.refresh_types_files()
+            if any(event.role == "types" and event.kind == "modified" and
+                   event.name == self.types_file_var.get() for event in events):
+                self.load_types_file()
+        
+        for event in events:
+            if event.kind == "removed" and (
+                    (event.role == "market" and event.name == self.market_file_var.get()) or
+                    (event.role == "traders" and event.name == self.trader_file_var.get())):
+                self.status_var.set(f"Warning: {event.name} was removed from disk")
+        
+        self.revalidate_changed_files(events, roles)
+    
     def refresh_market_files(self):
         if not self.market_folder:
             return
         
-        json_files = [f for f in os.listdir(self.market_folder) if f.endswith('.json')]
-        json_files.sort()
+        json_files = self.project_files("market")
         self.market_file_combo['values'] = json_files
+        self.refresh_project_index()
         
         if json_files and not self.market_file_var.get():
             self.market_file_var.set(json_files[0])
             self.load_market_file()
     
+    def refresh_project_index(self):
+        """Re-scan market files added or changed since they were last indexed"""
+        folder = self.market_folder
+        if not folder or not os.path.isdir(folder):
+            return
+        index = self.project_index
+        if index.folder != folder:
+            index.reset(folder)
+        
+        stats = self.folder_watcher.state("market")
+        index.retain(stats)
+        stale = index.stale_files(stats)
+        if not stale:
+            return
+        
+        paths = [os.path.join(folder, name) for name in stale]
+        
+        def scan(job):
+            return scan_market_files(paths, progress=lambda done, total, name: job.progress(done, total, name))
+        
+        def on_scanned(scans):
+            if index.folder != folder:
+                return  # Market folder switched meanwhile
+            index.apply_scans(scans, stats)
+            self.status_var.set(f"Indexed {len(index)} class names in {len(index.files)} market file(s)")
+        
+        self.jobs.submit("project-index", scan, on_scanned, description="Indexing market files")
+    
+    def on_market_items_changed(self, file_path: str, document: MarketDocument):
+        """Keep the project index and validation results in step with edits to a market file"""
+        if self.market_folder and os.path.dirname(file_path) == self.market_folder:
+            self.project_index.update_file(os.path.basename(file_path), document)
+        self.revalidate_document(file_path, document)
+    
+    def show_validation_tab(self):
+        self.notebook.select(self.validation_frame)
+        self.on_tab_changed()
+    
+    def project_folders_changed(self):
+        """A project folder was switched: results for the old folders no longer apply"""
+        self.validator = None
+        if "validation" in self.built_tabs:
+            self.revalidate_project()
+    
+    def revalidate_project(self):
+        """Check every market and trader file in the background"""
+        self.validator = None
+        if not self.market_folder and not self.traders_folder:
+            self.show_validation_issues()
+            return
+        # Unsaved edits are checked rather than the files on disk
+        for editor in (self.current_market_editor, self.current_trader_editor):
+            if editor:
+                editor.stash_document()
+        project = Project(self.market_folder, self.traders_folder, self.types_folder)
+        folders = (self.market_folder, self.traders_folder, self.types_folder)
+        self.show_validation_issues()
+        
+        def check(job):
+            started = time.perf_counter()
+            validator = build_project_validator(
+                project, progress=lambda done, total, name: job.progress(done, total, name))
+            return validator, (time.perf_counter() - started) * 1000
+        
+        def on_checked(result):
+            if folders != (self.market_folder, self.traders_folder, self.types_folder):
+                return  # A folder was switched meanwhile
+            self.validator, self.validation_time_ms = result
+            for path in self.documents.dirty_paths():
+                self.revalidate_document(path, self.documents.get(path).document, show=False)
+            self.show_validation_issues()
+            errors, warnings = self.validator.counts()
+            self.status_var.set(f"Validated project: {errors} error(s), {warnings} warning(s) "
+                                f"in {self.validation_time_ms:.0f} ms")
+        
+        def on_error(e):
+            self.status_var.set(f"Validation failed: {str(e)}")
+        
+        self.jobs.submit("validation", check, on_checked, on_error, description="Validating project")
+    
+    def revalidate_document(self, file_path: str, document, show=True):
+        """Re-check one edited document and the files that refer to it"""
+        if self.validator is None:
+            return
+        folder = os.path.dirname(file_path)
+        if self.market_folder and folder == self.market_folder:
+            changed = self.validator.update_market(os.path.basename(file_path), document)
+        elif self.traders_folder and folder == self.traders_folder:
+            changed = self.validator.update_trader(os.path.basename(file_path), document)
+        else:
+            return
+        if changed and show:
+            self.show_validation_issues()
+    
+    def revalidate_changed_files(self, events, roles):
+        """Bring the validation results up to date with files changed on disk"""
+        validator = self.validator
+        if validator is None:
+            return
+        changed = set()
+        reload = []
+        dirty_paths = set(self.documents.dirty_paths())
+        for event in events:
+            if event.role == "market" and self.market_folder:
+                path = os.path.join(self.market_folder, event.name)
+            elif event.role == "traders" and self.traders_folder:
+                path = os.path.join(self.traders_folder, event.name)
+            else:
+                continue
+            if event.kind == "removed":
+                if event.role == "market":
+                    changed |= validator.remove_market(event.name)
+                else:
+                    changed |= validator.remove_trader(event.name)
+            elif path not in dirty_paths:
+                reload.append((event.role, path))  # Unsaved edits win over the file on disk
+        if changed:
+            self.show_validation_issues()
+        
+        if reload:
+            def read_files(job):
+                # Worker thread: file I/O and parsing only
+                results = []
+                for role, path in reload:
+                    document_class = MarketDocument if role == "market" else TraderDocument
+                    try:
+                        results.append((role, path, document_class.load(path), None))
+                    except Exception as e:
+                        results.append((role, path, None, e))
+                return results
+            
+            def on_read(results):
+                if self.validator is not validator:
+                    return  # A full check was started meanwhile
+                for role, path, document, error in results:
+                    kind = KIND_MARKET if role == "market" else KIND_TRADER
+                    if error is not None:
+                        validator.add_error(kind, os.path.basename(path), f"can't be read: {error}")
+                    else:
+                        self.revalidate_document(path, document, show=False)
+                self.show_validation_issues()
+            
+            self.jobs.submit("validation-files", read_files, on_read, description="Validating changed files")
+        
+        if "types" in roles:
+            types_folder = self.types_folder
+            
+            def on_types(known_types):
+                if self.validator is validator and self.types_folder == types_folder:
+                    if validator.set_types(known_types):
+                        self.show_validation_issues()
+            
+            self.jobs.submit("validation-types", lambda job: known_type_names(types_folder), on_types,
+                             description="Validating against the types files")
+    
+    def show_validation_issues(self):
+        """Fill the Validation tab from the current results"""
+        if "validation" not in self.built_tabs:
+            return
+        validator = self.validator
+        if validator is None:
+            self.validation_rows = []
+            if not self.market_folder and not self.traders_folder:
+                summary = "Set the Market and Traders folders to validate the project"
+            else:
+                summary = "Validating..."
+            self.notebook.tab(self.validation_frame, text="Validation")
+        else:
+            issues = validator.issues()
+            if self.validation_errors_only_var.get():
+                issues = [issue for issue in issues if issue.severity == SEVERITY_ERROR]
+            self.validation_rows = issues
+            errors, warnings = validator.counts()
+            summary = f"{errors} error(s), {warnings} warning(s) (full check took {self.validation_time_ms:.0f} ms)"
+            self.notebook.tab(self.validation_frame, text=f"Validation ({errors})" if errors else "Validation")
+        self.validation_listbox.set_items([format_issue(issue) for issue in self.validation_rows])
+        self.validation_summary_label.config(text=summary)
+    
+    def open_validation_issue(self, event=None):
+        """Open the file of the double-clicked issue, selecting the item it is about"""
+        selection = self.validation_listbox.curselection()
+        if not selection:
+            return
+        issue = self.validation_rows[selection[0]]
+        if issue.kind == KIND_MARKET:
+            if not self.market_folder:
+                return
+            self.notebook.select(self.market_frame)
+            self.market_file_var.set(issue.file)
+            self.load_market_file(selected_index=issue.position)
+        else:
+            if not self.traders_folder:
+                return
+            self.notebook.select(self.trader_frame)
+            self.on_tab_changed()
+            self.trader_file_var.set(issue.file)
+            self.load_trader_file()
+    
     def refresh_types_market_files(self):
         """Refresh the market file dropdown in Types Viewer tab"""
+        if "types" not in self.built_tabs:
+            return
         if not self.market_folder or not os.path.isdir(self.market_folder):
-            if hasattr(self, 'types_market_file_combo'):
-                self.types_market_file_combo['values'] = []
+            self.types_market_file_combo['values'] = []
             return
         
-        json_files = [f for f in os.listdir(self.market_folder) if f.endswith('.json')]
-        json_files.sort()
-        if hasattr(self, 'types_market_file_combo'):
-            self.types_market_file_combo['values'] = json_files
+        json_files = self.project_files("market")
+        self.types_market_file_combo['values'] = json_files
     
     def refresh_trader_files(self):
-        if not self.traders_folder:
+        if not self.traders_folder or "traders" not in self.built_tabs:
             return
         
-        json_files = [f for f in os.listdir(self.traders_folder) if f.endswith('.json')]
-        json_files.sort()
+        json_files = self.project_files("traders")
         self.trader_file_combo['values'] = json_files
         
         if json_files and not self.trader_file_var.get():
             self.trader_file_var.set(json_files[0])
             self.load_trader_file()
     
-    def load_market_file(self, event=None):
+    def load_market_file(self, event=None, selected_index=None):
         if not self.market_folder or not self.market_file_var.get():
             return
         
         file_path = os.path.join(self.market_folder, self.market_file_var.get())
         
-        # Clear existing editor
-        for widget in self.market_editor_frame.winfo_children():
-            widget.destroy()
-        
-        self.current_market_editor = MarketEditor(self.market_editor_frame, file_path, self.types_folder)
-        self.status_var.set(f"Loaded: {self.market_file_var.get()}")
+        # The editor is built once and re-bound to each file; only its data is re-populated
+        if not self.current_market_editor:
+            self.current_market_editor = MarketEditor(self.market_editor_frame, None, self.types_folder,
+                                                      self.types_catalog, status_callback=self.status_var.set,
+                                                      scheduler=self.jobs,
+                                                      items_changed_callback=self.on_market_items_changed,
+                                                      document_cache=self.documents)
+        self.current_market_editor.types_folder = self.types_folder
+        self.current_market_editor.load_file(file_path, selected_index)
     
     def load_trader_file(self, event=None):
-        if not self.traders_folder or not self.trader_file_var.get():
+        if not self.traders_folder or not self.trader_file_var.get() or "traders" not in self.built_tabs:
             return
         
         file_path = os.path.join(self.traders_folder, self.trader_file_var.get())
         
-        # Clear existing editor
-        for widget in self.trader_editor_frame.winfo_children():
-            widget.destroy()
-        
-        self.current_trader_editor = TraderEditor(self.trader_editor_frame, file_path, self.market_folder)
+        if self.current_trader_editor:
+            self.current_trader_editor.market_folder = self.market_folder
+            self.current_trader_editor.load_file(file_path)
+        else:
+            self.current_trader_editor = TraderEditor(self.trader_editor_frame, file_path, self.market_folder,
+                                                      market_files_provider=lambda: self.project_files("market"),
+                                                      document_cache=self.documents,
+                                                      changed_callback=self.revalidate_document)
         self.status_var.set(f"Loaded: {self.trader_file_var.get()}")
     
     def save_current(self):
@@ -1721,146 +2731,220 @@ class DayZTraderEditor:
                     self.status_var.set("Trader file saved successfully")
                     messagebox.showinfo("Success", "Trader file saved successfully!")
     
+    def current_editor(self):
+        """The editor on the selected tab, if any"""
+        current_tab = self.notebook.index(self.notebook.select())
+        if current_tab == 0:
+            return self.current_market_editor
+        if current_tab == 1:
+            return self.current_trader_editor
+        return None
+    
+    def undo(self):
+        editor = self.current_editor()
+        operation = editor.undo() if editor else None
+        self.status_var.set(f"Undid: {operation.label}" if operation else "Nothing to undo")
+    
+    def redo(self):
+        editor = self.current_editor()
+        operation = editor.redo() if editor else None
+        self.status_var.set(f"Redid: {operation.label}" if operation else "Nothing to redo")
+    
+    def on_close(self):
+        """Warn about unsaved documents before closing the window"""
+        for editor in (self.current_market_editor, self.current_trader_editor):
+            if editor:
+                editor.stash_document()
+        dirty_paths = self.documents.dirty_paths()
+        if dirty_paths:
+            names = "\n".join(os.path.basename(path) for path in dirty_paths[:10])
+            if len(dirty_paths) > 10:
+                names += f"\n... and {len(dirty_paths) - 10} more"
+            if not messagebox.askyesno("Unsaved Changes",
+                                       f"There are unsaved changes in {len(dirty_paths)} file(s):\n\n{names}\n\n"
+                                       "Close without saving?"):
+                return
+        self.root.destroy()
+    
     def remove_duplicates(self):
-        """Scan all Market and Trader files for duplicates and prompt to remove them"""
+        """Ask how duplicates should be resolved, then scan all Market and Trader files"""
         if not self.market_folder and not self.traders_folder:
             messagebox.showwarning("Warning", "Please set Market and/or Traders folders first.")
             return
         
-        all_duplicates = []
-        files_processed = []
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Remove Duplicates")
+        dialog.transient(self.root)
+        dialog.grab_set()
         
-        # Scan Market files
-        if self.market_folder and os.path.isdir(self.market_folder):
-            json_files = [f for f in os.listdir(self.market_folder) if f.endswith('.json')]
-            for json_file in json_files:
-                file_path = os.path.join(self.market_folder, json_file)
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                    
-                    if "Items" in data and isinstance(data["Items"], list):
-                        seen_classnames = {}  # Maps class_name to first occurrence index
-                        duplicates = []
-                        
-                        for index, item in enumerate(data["Items"]):
-                            class_name = item.get("ClassName", "")
-                            if class_name:
-                                if class_name in seen_classnames:
-                                    # This is a duplicate (we've seen this class_name before)
-                                    duplicates.append({
-                                        "index": index,
-                                        "class_name": class_name,
-                                        "file": json_file,
-                                        "file_path": file_path,
-                                        "type": "market"
-                                    })
-                                else:
-                                    # First occurrence - keep this one
-                                    seen_classnames[class_name] = index
-                        
-                        if duplicates:
-                            all_duplicates.extend(duplicates)
-                            files_processed.append((file_path, data, duplicates))
-                except Exception as e:
-                    self.status_var.set(f"Error processing {json_file}: {str(e)}")
+        content_frame = ttk.Frame(dialog, padding=10)
+        content_frame.pack(fill=tk.BOTH, expand=True)
         
-        # Scan Trader files
-        if self.traders_folder and os.path.isdir(self.traders_folder):
-            json_files = [f for f in os.listdir(self.traders_folder) if f.endswith('.json')]
-            for json_file in json_files:
-                file_path = os.path.join(self.traders_folder, json_file)
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                    
-                    if "Categories" in data and isinstance(data["Categories"], list):
-                        seen_categories = {}  # Maps category to first occurrence index
-                        duplicates = []
-                        
-                        for index, category in enumerate(data["Categories"]):
-                            if category in seen_categories:
-                                # This is a duplicate (we've seen this category before)
-                                duplicates.append({
-                                    "index": index,
-                                    "category": category,
-                                    "file": json_file,
-                                    "file_path": file_path,
-                                    "type": "trader"
-                                })
-                            else:
-                                # First occurrence - keep this one
-                                seen_categories[category] = index
-                        
-                        if duplicates:
-                            all_duplicates.extend(duplicates)
-                            files_processed.append((file_path, data, duplicates))
-                except Exception as e:
-                    self.status_var.set(f"Error processing {json_file}: {str(e)}")
+        cross_file_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(content_frame, text="Also find items listed in more than one market file",
+                        variable=cross_file_var).pack(anchor=tk.W, pady=(0, 10))
+        
+        ttk.Label(content_frame, text="When a ClassName is listed more than once:",
+                  font=("Arial", 10, "bold")).pack(anchor=tk.W, pady=5)
+        policy_var = tk.StringVar(value=POLICY_KEEP_FIRST)
+        for policy, label in POLICY_LABELS.items():
+            ttk.Radiobutton(content_frame, text=label, value=policy, variable=policy_var).pack(anchor=tk.W, padx=10)
+        
+        preferred_file_var = tk.StringVar()
+        preferred_combo = ttk.Combobox(content_frame, textvariable=preferred_file_var, state="readonly",
+                                       values=self.project_files("market"), width=40)
+        preferred_combo.pack(anchor=tk.W, padx=30, pady=5)
+        if self.market_file_var.get():
+            preferred_file_var.set(self.market_file_var.get())
+        
+        def start_scan():
+            policy = policy_var.get()
+            preferred_file = preferred_file_var.get()
+            if policy == POLICY_KEEP_IN_FILE and not preferred_file:
+                messagebox.showwarning("No File", "Please choose the market file to keep items in.", parent=dialog)
+                return
+            dialog.destroy()
+            self.scan_duplicates(policy, cross_file_var.get(), preferred_file)
         
-        # Show results and prompt for removal
+        btn_frame = ttk.Frame(content_frame)
+        btn_frame.pack(fill=tk.X, pady=(10, 0))
+        ttk.Button(btn_frame, text="Scan", command=start_scan).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="Cancel", command=dialog.destroy).pack(side=tk.LEFT, padx=5)
+    
+    def scan_duplicates(self, policy: str, cross_file: bool, preferred_file: str = None):
+        """Scan all Market and Trader files for duplicates and show the dry-run summary"""
+        market_paths = [os.path.join(self.market_folder, name) for name in self.project_files("market")]
+        trader_paths = [os.path.join(self.traders_folder, name) for name in self.project_files("traders")]
+        
+        def scan(job):
+            # Worker thread: files are parsed on a process pool, only compact records come back
+            return find_duplicates(market_paths, trader_paths, policy, cross_file, preferred_file,
+                                   progress=lambda done, total, name: job.progress(done, total, name))
+        
+        def on_scanned(result):
+            all_duplicates, plan, report = result
+            if report["errors"]:
+                self.status_var.set(report["errors"][-1])
+            self.prompt_remove_duplicates(all_duplicates, plan, report, policy_description(policy, preferred_file))
+        
+        self.jobs.submit("remove-duplicates", scan, on_scanned,
+                         lambda e: messagebox.showerror("Error", f"Failed to scan for duplicates: {str(e)}"),
+                         description="Scanning for duplicates")
+    
+    def prompt_remove_duplicates(self, all_duplicates, plan, report, keep_rule="the first occurrence will be kept"):
+        """Show the dry-run summary; the user can save it as a report and/or remove the duplicates"""
         if not all_duplicates:
             messagebox.showinfo("No Duplicates", "No duplicates found in any files!")
             self.status_var.set("No duplicates found")
             return
         
-        # Build summary message
-        summary_lines = [f"Found {len(all_duplicates)} duplicate(s) in {len(files_processed)} file(s):\n"]
-        
-        # Group by file
-        by_file = {}
-        for dup in all_duplicates:
-            file_name = dup["file"]
-            if file_name not in by_file:
-                by_file[file_name] = []
-            by_file[file_name].append(dup)
-        
-        for file_name, dups in by_file.items():
-            summary_lines.append(f"\n{file_name} ({len(dups)} duplicate(s)):")
-            for dup in dups[:10]:  # Show first 10 per file
-                if dup["type"] == "market":
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Remove Duplicates")
+        dialog.geometry("700x500")
+        dialog.transient(self.root)
+        
+        content_frame = ttk.Frame(dialog, padding=10)
+        content_frame.pack(fill=tk.BOTH, expand=True)
+        
+        headline = (f"Found {report['duplicates_total']} duplicate(s) in {report['files_affected']} file(s) "
+                    f"({report['cross_file_total']} listed in another market file).")
+        ttk.Label(content_frame, text=headline, font=("Arial", 10, "bold")).pack(anchor=tk.W, pady=5)
+        ttk.Label(content_frame, text=f"Removal keeps one entry per name: {keep_rule}.").pack(anchor=tk.W)
+        
+        # Full per-file listing; a Text widget copes with thousands of lines
+        text_frame = ttk.Frame(content_frame)
+        text_frame.pack(fill=tk.BOTH, expand=True, pady=10)
+        summary_text = tk.Text(text_frame, wrap=tk.NONE, font=("Consolas", 9))
+        text_scrollbar = ttk.Scrollbar(text_frame, orient="vertical", command=summary_text.yview)
+        summary_text.configure(yscrollcommand=text_scrollbar.set)
+        summary_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        text_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        summary_lines = []
+        for dups in group_by_file(all_duplicates).values():
+            summary_lines.append(f"{dups[0]['file']} ({len(dups)} duplicate(s)):")
+            for dup in dups:
+                if dup["type"] == "market" and dup["cross_file"]:
+                    summary_lines.append(f"  - ClassName: {dup['class_name']} (index {dup['index']}, "
+                                         f"kept in {dup['kept_file']})")
+                elif dup["type"] == "market":
                     summary_lines.append(f"  - ClassName: {dup['class_name']} (index {dup['index']})")
                 else:
                     summary_lines.append(f"  - Category: {dup['category']} (index {dup['index']})")
-            if len(dups) > 10:
-                summary_lines.append(f"  ... and {len(dups) - 10} more")
-        
-        summary = "\n".join(summary_lines)
-        summary += "\n\nRemove all duplicates? (First occurrence will be kept)"
+        summary_text.insert(1.0, "\n".join(summary_lines))
+        summary_text.config(state=tk.DISABLED)
         
-        if messagebox.askyesno("Remove Duplicates", summary):
-            removed_count = 0
-            files_saved = 0
+        def save_report():
+            file_path = filedialog.asksaveasfilename(
+                parent=dialog,
+                title="Save Duplicate Report",
+                defaultextension=".json",
+                filetypes=[("JSON files", "*.json"), ("CSV files", "*.csv"), ("All files", "*.*")]
+            )
+            if not file_path:
+                return
+            try:
+                if file_path.lower().endswith(".csv"):
+                    write_report_csv(report, file_path)
+                else:
+                    write_report_json(report, file_path)
+                self.status_var.set(f"Duplicate report saved: {os.path.basename(file_path)}")
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to save report: {str(e)}", parent=dialog)
+        
+        def remove():
+            # Pending edits in the editors go into the document cache first
+            for editor in (self.current_market_editor, self.current_trader_editor):
+                if editor:
+                    editor.stash_document()
+            cached = {path: self.documents.get(path, file_stat(path)) for path in plan}
+            skipped = [path for path, entry in cached.items() if entry is not None and entry.dirty]
+            question = f"Remove {report['duplicates_total']} duplicate(s) from {report['files_affected']} file(s)?"
+            if skipped:
+                question += (f"\n\n{len(skipped)} of these file(s) have unsaved edits and will be skipped - "
+                             "save them and scan again to remove their duplicates.")
+            if not messagebox.askyesno("Remove Duplicates", question, parent=dialog):
+                return
+            dialog.destroy()
             
-            for file_path, data, duplicates in files_processed:
+            # Files the app holds a document for are changed through that document, so the
+            # editors show the result and the removal can be undone; the rest on disk in parallel
+            by_file = group_by_file(all_duplicates)
+            removed_in_documents, documents_saved, document_failures = 0, 0, []
+            disk_plan = {}
+            for path, (kind, stat, indices) in plan.items():
+                entry = cached[path]
+                if entry is not None and entry.dirty:
+                    continue
+                if entry is None or entry.stat != tuple(stat):
+                    disk_plan[path] = plan[path]
+                    continue
                 try:
-                    # Sort duplicates by index in reverse order so we can remove from end to start
-                    sorted_dups = sorted(duplicates, key=lambda x: x["index"], reverse=True)
-                    
-                    # Get the type from first duplicate
-                    dup_type = sorted_dups[0]["type"]
-                    
-                    if dup_type == "market":
-                        # Remove duplicate items from Items array
-                        for dup in sorted_dups:
-                            data["Items"].pop(dup["index"])
-                            removed_count += 1
-                    else:
-                        # Remove duplicate categories
-                        for dup in sorted_dups:
-                            data["Categories"].pop(dup["index"])
-                            removed_count += 1
-                    
-                    # Save the file
-                    with open(file_path, 'w', encoding='utf-8') as f:
-                        json.dump(data, f, indent=4, ensure_ascii=False)
-                    files_saved += 1
+                    removed_in_documents += self.remove_duplicates_in_document(path, entry.document, by_file[path])
+                    documents_saved += 1
                 except Exception as e:
-                    messagebox.showerror("Error", f"Failed to save {os.path.basename(file_path)}: {str(e)}")
+                    document_failures.append(f"Failed to save {os.path.basename(path)}: {str(e)}")
+            
+            def on_disk_removed(result):
+                removed_count, files_saved, failures = result
+                on_removed((removed_count + removed_in_documents, files_saved + documents_saved,
+                            document_failures + failures))
             
-            messagebox.showinfo("Success", 
-                              f"Removed {removed_count} duplicate(s) from {files_saved} file(s).\n\n"
-                              "Please refresh the file lists if needed.")
+            if not disk_plan:
+                on_disk_removed((0, 0, []))
+                return
+            self.jobs.submit("remove-duplicates",
+                             lambda job: remove_duplicates_in_files(
+                                 disk_plan, progress=lambda done, total, name: job.progress(done, total, name)),
+                             on_disk_removed, description="Removing duplicates")
+        
+        def on_removed(result):
+            removed_count, files_saved, failures = result
+            if failures:
+                messagebox.showerror("Error", "\n".join(failures[:20]) +
+                                     (f"\n... and {len(failures) - 20} more" if len(failures) > 20 else ""))
+            
+            messagebox.showinfo("Success", f"Removed {removed_count} duplicate(s) from {files_saved} file(s).")
             self.status_var.set(f"Removed {removed_count} duplicate(s) from {files_saved} file(s)")
             
             # Refresh current editors if they're open
@@ -1868,12 +2952,509 @@ class DayZTraderEditor:
                 self.load_market_file()
             if self.current_trader_editor and self.trader_file_var.get():
                 self.load_trader_file()
+        
+        btn_frame = ttk.Frame(content_frame)
+        btn_frame.pack(fill=tk.X)
+        ttk.Button(btn_frame, text="Save Report...", command=save_report).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="Remove Duplicates", command=remove).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="Close", command=dialog.destroy).pack(side=tk.RIGHT, padx=5)
+    
+    def remove_duplicates_in_document(self, file_path: str, document, duplicates) -> int:
+        """Remove scanned duplicates from a cached document without unsaved edits and save it
+
+        The removal is one undo step. An editor showing the document is re-bound
+        to it afterwards. Raises if the document doesn't match the scan or can't
+        be saved; the document is left unchanged then.
+        """
+        market_editor = self.current_market_editor
+        if market_editor is not None and market_editor.document is not document:
+            market_editor = None
+        trader_editor = self.current_trader_editor
+        if trader_editor is not None and trader_editor.document is not document:
+            trader_editor = None
+        
+        if isinstance(document, MarketDocument):
+            entries = {dup["index"]: dup["class_name"] for dup in duplicates}
+            if any(index >= len(document.items) or document.items[index].class_name != class_name
+                   for index, class_name in entries.items()):
+                raise RuntimeError("file doesn't match the scan - scan again")
+            operation = RemoveItems([(index, document.items[index]) for index in entries],
+                                    f"Remove {len(entries)} duplicate(s)")
+        else:
+            entries = {dup["index"]: dup["category"] for dup in duplicates}
+            categories = document.categories
+            if any(index >= len(categories) or categories[index] != category for index, category in entries.items()):
+                raise RuntimeError("file doesn't match the scan - scan again")
+            operation = SetFields([(None, "categories", categories,
+                                    [category for index, category in enumerate(categories) if index not in entries])],
+                                  f"Remove {len(entries)} duplicate(s)")
+        
+        # Detach the Market Editor's selection first: once items move, its index would point at
+        # another item and the next stash would write the selected item's fields over that one
+        selected_index = market_editor.current_item_index if market_editor else None
+        selected_item = document.items[selected_index] if selected_index is not None else None
+        if market_editor:
+            market_editor.current_item_index = None
+        operation.redo(document)
+        try:
+            document.save(file_path)
+        except Exception:
+            operation.undo(document)
+            if market_editor:
+                market_editor.current_item_index = selected_index
+            raise
+        stat = file_stat(file_path)
+        history = self.documents.history_for(file_path, document)
+        history.record(operation)
+        self.documents.mark_clean(file_path, stat)
+        history.mark_saved()
+        
+        if market_editor:
+            still_listed = [index for index, item in enumerate(document.items) if item is selected_item]
+            market_editor.show_document(document, stat, False, still_listed[0] if still_listed else None)
+        if trader_editor:
+            trader_editor.file_stat = stat
+            trader_editor.dirty = False
+            trader_editor.clean_state = document.to_dict()
+            trader_editor.refresh_ui()
+        self.revalidate_document(file_path, document)
+        return len(entries)
+    
+    def price_analysis(self):
+        """List price inconsistencies and buy/sell arbitrage across all market files"""
+        # Imported on first use: it pulls in NumPy, which would add to every startup
+        from batch_transform import load_documents
+        from price_analyzer import FINDING_LABELS, analyze, format_finding, summarize, write_findings
+        
+        if not self.market_folder:
+            messagebox.showwarning("Warning", "Please set the Market folder first.")
+            return
+        
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Price Analysis")
+        dialog.geometry("900x600")
+        dialog.transient(self.root)
+        
+        content_frame = ttk.Frame(dialog, padding=10)
+        content_frame.pack(fill=tk.BOTH, expand=True)
+        
+        ttk.Label(content_frame, text="Checks: " + "; ".join(FINDING_LABELS.values()),
+                  wraplength=860).pack(anchor=tk.W)
+        summary_var = tk.StringVar(value="Analyzing...")
+        ttk.Label(content_frame, textvariable=summary_var, font=("Arial", 10, "bold")).pack(anchor=tk.W, pady=5)
+        
+        list_frame = ttk.LabelFrame(content_frame, text="Findings (Double-click to open the item)")
+        list_frame.pack(fill=tk.BOTH, expand=True)
+        findings_listbox = VirtualListbox(list_frame, height=20, font=("Consolas", 9))
+        findings_listbox.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        
+        folder = self.market_folder
+        result = {"findings": []}
+        
+        def open_finding(event=None):
+            selection = findings_listbox.curselection()
+            if not selection or folder != self.market_folder:
+                return
+            finding = result["findings"][selection[0]]
+            self.notebook.select(self.market_frame)
+            self.market_file_var.set(finding.file)
+            self.load_market_file(selected_index=finding.position)
+        
+        findings_listbox.bind('<Double-Button-1>', open_finding)
+        
+        def export():
+            file_path = filedialog.asksaveasfilename(
+                title="Export Price Analysis", parent=dialog, defaultextension=".csv",
+                filetypes=[("CSV files", "*.csv"), ("JSON files", "*.json"), ("All files", "*.*")])
+            if not file_path:
+                return
+            try:
+                write_findings(result["findings"], file_path)
+                self.status_var.set(f"Price analysis exported to {file_path}")
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to export: {str(e)}", parent=dialog)
+        
+        def run_analysis():
+            # Documents open in this session are analyzed with their unsaved edits
+            if self.current_market_editor:
+                self.current_market_editor.stash_document()
+            paths = [os.path.join(folder, name) for name in self.project_files("market")]
+            loaded = {}
+            for path in paths:
+                cached = self.documents.get(path, file_stat(path))
+                if cached is not None:
+                    loaded[path] = (cached.document, cached.stat)
+            summary_var.set("Analyzing...")
+            
+            def compute(job):
+                documents, errors = load_documents(
+                    paths, loaded, progress=lambda done, total, name: job.progress(done, total, name))
+                job.check_cancelled()
+                named = [(os.path.basename(path), document) for path, (document, _) in documents.items()]
+                return analyze(named), errors
+            
+            def on_computed(computed):
+                if not dialog.winfo_exists():
+                    return
+                findings, errors = computed
+                result["findings"] = findings
+                findings_listbox.set_items([format_finding(finding) for finding in findings])
+                summary = summarize(findings)
+                if errors:
+                    summary += f" ({len(errors)} file(s) could not be read)"
+                summary_var.set(summary)
+                export_button.config(state=tk.NORMAL if findings else tk.DISABLED)
+            
+            self.jobs.submit("price-analysis", compute, on_computed,
+                             lambda e: messagebox.showerror("Error", f"Price analysis failed: {str(e)}",
+                                                            parent=dialog),
+                             description="Analyzing prices")
+        
+        btn_frame = ttk.Frame(content_frame)
+        btn_frame.pack(fill=tk.X, pady=(10, 0))
+        ttk.Button(btn_frame, text="Reanalyze", command=run_analysis).pack(side=tk.LEFT, padx=5)
+        export_button = ttk.Button(btn_frame, text="Export...", command=export, state=tk.DISABLED)
+        export_button.pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="Close", command=dialog.destroy).pack(side=tk.RIGHT, padx=5)
+        
+        run_analysis()
+    
+    def economy_simulator(self):
+        """Simulate a month of player trading on all market files and plot stock and price per item"""
+        # Imported on first use: it needs NumPy, which would add to every startup
+        from batch_transform import load_documents
+        from economy_sim import LoadModel, SimulationError, simulate
+        
+        if not self.market_folder:
+            messagebox.showwarning("Warning", "Please set the Market folder first.")
+            return
+        
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Economy Simulator")
+        dialog.geometry("1000x700")
+        dialog.transient(self.root)
+        
+        content_frame = ttk.Frame(dialog, padding=10)
+        content_frame.pack(fill=tk.BOTH, expand=True)
+        
+        # Load model parameters, one entry each
+        options_frame = ttk.Frame(content_frame)
+        options_frame.pack(fill=tk.X)
+        defaults = LoadModel()
+        option_vars = {}
+        for key, label in (("days", "Days"), ("buys_per_day", "Buys/day"), ("sells_per_day", "Sells/day"),
+                           ("elasticity", "Elasticity"), ("popularity_spread", "Popularity spread"),
+                           ("seed", "Seed")):
+            ttk.Label(options_frame, text=f"{label}:").pack(side=tk.LEFT, padx=(0, 3))
+            value = getattr(defaults, key)
+            option_vars[key] = tk.StringVar(value="" if value is None else str(value))
+            ttk.Entry(options_frame, textvariable=option_vars[key], width=7).pack(side=tk.LEFT, padx=(0, 10))
+        
+        summary_var = tk.StringVar(value="Run a simulation to see which items run out of stock.")
+        ttk.Label(content_frame, textvariable=summary_var, wraplength=960).pack(anchor=tk.W, pady=5)
+        
+        body = ttk.Frame(content_frame)
+        body.pack(fill=tk.BOTH, expand=True)
+        list_frame = ttk.LabelFrame(body, text="Items (first to run out first)")
+        list_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        items_listbox = VirtualListbox(list_frame, height=20, font=("Consolas", 9))
+        items_listbox.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        plot_frame = ttk.LabelFrame(body, text="Stock (blue) and buy price (red) per day")
+        plot_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(10, 0))
+        canvas = tk.Canvas(plot_frame, bg="white", width=460, height=400, highlightthickness=0)
+        canvas.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        
+        simulated = {"result": None, "order": []}
+        
+        def plot(event=None):
+            canvas.delete("all")
+            result = simulated["result"]
+            selection = items_listbox.curselection()
+            if result is None or not selection:
+                return
+            index = simulated["order"][selection[0]]
+            width, height, margin = canvas.winfo_width(), canvas.winfo_height(), 30
+            
+            def line(values, color, label):
+                values = [float(value) for value in values]
+                low, high = min(values), max(values)
+                span = (high - low) or 1.0
+                step = (width - 2 * margin) / max(len(values) - 1, 1)
+                points = []
+                for day, value in enumerate(values):
+                    points.extend((margin + day * step, height - margin - (value - low) / span * (height - 2 * margin)))
+                if len(points) >= 4:
+                    canvas.create_line(*points, fill=color, width=2)
+                canvas.create_text(margin, margin / 2 if color == "blue" else height - margin / 2, anchor=tk.W,
+                                   fill=color, text=f"{label}: {low:g} - {high:g}")
+            
+            canvas.create_rectangle(margin, margin, width - margin, height - margin, outline="#cccccc")
+            line(result.stock[:, index], "blue", "Stock")
+            line(result.prices[:, index].round(2), "red", "Buy price")
+        
+        items_listbox.bind('<<ListboxSelect>>', plot)
+        canvas.bind("<Configure>", plot)
+        
+        def export():
+            if simulated["result"] is None:
+                return
+            file_path = filedialog.asksaveasfilename(
+                title="Export Simulation", parent=dialog, defaultextension=".csv",
+                filetypes=[("CSV files", "*.csv"), ("JSON files (with daily curves)", "*.json"), ("All files", "*.*")])
+            if not file_path:
+                return
+            try:
+                simulated["result"].write(file_path)
+                self.status_var.set(f"Simulation exported to {file_path}")
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to export: {str(e)}", parent=dialog)
+        
+        def run():
+            try:
+                load = LoadModel(days=int(option_vars["days"].get()),
+                                 buys_per_day=float(option_vars["buys_per_day"].get()),
+                                 sells_per_day=float(option_vars["sells_per_day"].get()),
+                                 elasticity=float(option_vars["elasticity"].get()),
+                                 popularity_spread=float(option_vars["popularity_spread"].get()),
+                                 seed=int(option_vars["seed"].get()) if option_vars["seed"].get().strip() else None)
+            except ValueError:
+                messagebox.showerror("Invalid Parameters", "Days and seed must be whole numbers, "
+                                     "the other parameters numbers.", parent=dialog)
+                return
+            # The documents as the Market Editor has them, unsaved edits included
+            if self.current_market_editor:
+                self.current_market_editor.stash_document()
+            folder = self.market_folder
+            paths = [os.path.join(folder, name) for name in self.project_files("market")]
+            loaded = {}
+            for path in paths:
+                cached = self.documents.get(path, file_stat(path))
+                if cached is not None:
+                    loaded[path] = (cached.document, cached.stat)
+            summary_var.set("Simulating...")
+            
+            def compute(job):
+                documents, errors = load_documents(paths, loaded)
+                named = [(os.path.basename(path), document) for path, (document, _) in documents.items()]
+                return simulate(named, load, progress=lambda done, total, name: job.progress(done, total, name)), errors
+            
+            def on_computed(computed):
+                if not dialog.winfo_exists():
+                    return
+                result, errors = computed
+                simulated.update(result=result, order=result.depletion_order())
+                lines = []
+                for row in result.rows():
+                    when = f"day {row['DepletedDay']}" if row["DepletedDay"] is not None else "never"
+                    lines.append(f"{row['ClassName']} ({row['File']}): out of stock {when}, "
+                                 f"stock {row['StartStock']} -> {row['EndStock']}")
+                items_listbox.set_items(lines)
+                summary = result.summary()
+                if errors:
+                    summary += f" ({len(errors)} file(s) could not be read)"
+                summary_var.set(summary)
+                export_button.config(state=tk.NORMAL)
+                plot()
+            
+            def on_error(e):
+                if isinstance(e, SimulationError):
+                    messagebox.showerror("Economy Simulator", str(e), parent=dialog)
+                else:
+                    messagebox.showerror("Error", f"Simulation failed: {str(e)}", parent=dialog)
+                summary_var.set("Simulation failed.")
+            
+            self.jobs.submit("economy-simulation", compute, on_computed, on_error, description="Simulating market")
+        
+        btn_frame = ttk.Frame(content_frame)
+        btn_frame.pack(fill=tk.X, pady=(10, 0))
+        ttk.Button(btn_frame, text="Run", command=run, style="Primary.TButton").pack(side=tk.LEFT, padx=5)
+        export_button = ttk.Button(btn_frame, text="Export...", command=export, state=tk.DISABLED)
+        export_button.pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="Close", command=dialog.destroy).pack(side=tk.RIGHT, padx=5)
+    
+    def batch_transform(self):
+        """Edit prices and stock across all market files with a transform script"""
+        # Imported on first use: it pulls in NumPy, which would add to every startup
+        from batch_transform import (ROUND_NEAREST, ROUNDING_MODES, TransformError, apply_changes, changed_files,
+                                     commit_documents, format_change, history_changes, load_documents,
+                                     parse_script, preview, revert_changes, summarize)
+        
+        if not self.market_folder:
+            messagebox.showwarning("Warning", "Please set the Market folder first.")
+            return
+        
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Batch Transform")
+        dialog.geometry("800x600")
+        dialog.transient(self.root)
+        dialog.grab_set()
+        
+        content_frame = ttk.Frame(dialog, padding=10)
+        content_frame.pack(fill=tk.BOTH, expand=True)
+        
+        ttk.Label(content_frame, text="One statement per line, e.g.  MaxPriceThreshold *= 1.15 where ClassName ~ \"^AK\"",
+                  font=("Arial", 10, "bold")).pack(anchor=tk.W)
+        ttk.Label(content_frame, text="Fields: MaxPriceThreshold, MinPriceThreshold, MaxStockThreshold, "
+                                      "MinStockThreshold, SellPricePercent, QuantityPercent. "
+                                      "Conditions: ClassName / File ~ \"regex\", numeric comparisons, joined with and."
+                  ).pack(anchor=tk.W, pady=(0, 5))
+        script_text = tk.Text(content_frame, height=6, wrap=tk.NONE, font=("Consolas", 10))
+        script_text.pack(fill=tk.X)
+        
+        options_frame = ttk.Frame(content_frame)
+        options_frame.pack(fill=tk.X, pady=5)
+        ttk.Label(options_frame, text="Round whole numbers:").pack(side=tk.LEFT)
+        rounding_var = tk.StringVar(value=ROUND_NEAREST)
+        ttk.Combobox(options_frame, textvariable=rounding_var, values=ROUNDING_MODES, state="readonly",
+                     width=10).pack(side=tk.LEFT, padx=5)
+        ttk.Label(options_frame, text="to a multiple of").pack(side=tk.LEFT)
+        step_var = tk.StringVar(value="1")
+        ttk.Entry(options_frame, textvariable=step_var, width=6).pack(side=tk.LEFT, padx=5)
+        
+        summary_var = tk.StringVar(value="Preview to see what would change; nothing is saved until you apply.")
+        ttk.Label(content_frame, textvariable=summary_var).pack(anchor=tk.W, pady=5)
+        
+        text_frame = ttk.Frame(content_frame)
+        text_frame.pack(fill=tk.BOTH, expand=True)
+        diff_text = tk.Text(text_frame, wrap=tk.NONE, font=("Consolas", 9), state=tk.DISABLED)
+        diff_scrollbar = ttk.Scrollbar(text_frame, orient="vertical", command=diff_text.yview)
+        diff_text.configure(yscrollcommand=diff_scrollbar.set)
+        diff_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        diff_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        folder = self.market_folder
+        previewed = {}  # Result of the last preview: changes, documents and stats by path
+        
+        def show_diff(lines):
+            diff_text.config(state=tk.NORMAL)
+            diff_text.delete(1.0, tk.END)
+            diff_text.insert(1.0, "\n".join(lines))
+            diff_text.config(state=tk.DISABLED)
+        
+        def run_preview():
+            script = script_text.get(1.0, tk.END)
+            try:
+                parse_script(script)
+                step = int(step_var.get() or 1)
+            except TransformError as e:
+                messagebox.showerror("Invalid Script", str(e), parent=dialog)
+                return
+            except ValueError:
+                messagebox.showerror("Invalid Rounding", "The rounding step must be a whole number.", parent=dialog)
+                return
+            rounding = rounding_var.get()
+            previewed.clear()
+            apply_button.config(state=tk.DISABLED)
+            
+            # Documents open in this session (with their unsaved edits) are transformed as the user sees them
+            if self.current_market_editor:
+                self.current_market_editor.stash_document()
+            paths = [os.path.join(folder, name) for name in self.project_files("market")]
+            loaded = {}
+            for path in paths:
+                cached = self.documents.get(path, file_stat(path))
+                if cached is not None:
+                    loaded[path] = (cached.document, cached.stat)
+            
+            def compute(job):
+                documents, errors = load_documents(
+                    paths, loaded, progress=lambda done, total, name: job.progress(done, total, name))
+                job.check_cancelled()
+                named = [(os.path.basename(path), document) for path, (document, _) in documents.items()]
+                return documents, preview(named, script, rounding, step), errors
+            
+            def on_computed(result):
+                if not dialog.winfo_exists():
+                    return
+                documents, changes, errors = result
+                previewed.update(documents=documents, changes=changes)
+                lines = [format_change(change) for change in changes[:5000]]
+                if len(changes) > 5000:
+                    lines.append(f"... and {len(changes) - 5000} more")
+                lines.extend(f"Skipped {error}" for error in errors)
+                show_diff(lines)
+                summary = summarize(changes)
+                summary_var.set(f"Would change {summary}." if summary else "Nothing would change.")
+                if changes:
+                    apply_button.config(state=tk.NORMAL)
+            
+            self.jobs.submit("batch-transform", compute, on_computed,
+                             lambda e: messagebox.showerror("Error", f"Failed to preview transform: {str(e)}",
+                                                            parent=dialog),
+                             description="Previewing batch transform")
+        
+        def apply():
+            changes = previewed.get("changes")
+            if not changes:
+                return
+            names = changed_files(changes)
+            dirty_paths = set(self.documents.dirty_paths())
+            dirty = [name for name in names if os.path.join(folder, name) in dirty_paths]
+            question = f"Save {summarize(changes)}?"
+            if dirty:
+                question += (f"\n\n{len(dirty)} of these file(s) also have unsaved edits, "
+                             "which will be saved with the transform.")
+            if not messagebox.askyesno("Batch Transform", question, parent=dialog):
+                return
+            
+            documents = {os.path.basename(path): document for path, (document, _) in previewed["documents"].items()}
+            targets = {os.path.join(folder, name): documents[name] for name in names}
+            expected = {path: previewed["documents"][path][1] for path in targets}
+            editor = self.current_market_editor
+            
+            def refresh_editor(stat, dirty):
+                # Re-populate the Market Editor if it shows one of the transformed files
+                if editor and editor.document_path in targets:
+                    editor.show_document(editor.document, stat, dirty, editor.current_item_index)
+            
+            apply_changes(documents, changes)
+            for path, document in targets.items():
+                self.revalidate_document(path, document)
+            refresh_editor(editor.file_stat if editor else None, True)
+            dialog.destroy()
+            
+            def on_committed(stats):
+                for path, document in targets.items():
+                    self.documents.put(path, document, stats[path])
+                    history = self.documents.history_for(path, document)
+                    history.record(SetFields(history_changes(changes, os.path.basename(path)),
+                                             "Batch transform"))
+                    history.mark_saved()
+                refresh_editor(stats.get(editor.document_path) if editor else None, False)
+                message = f"Batch transform saved {summarize(changes)}"
+                self.status_var.set(message)
+                messagebox.showinfo("Success", message + ".")
+            
+            def on_failed(e):
+                # Nothing was written; take the new values back out of the documents
+                revert_changes(documents, changes)
+                for path, document in targets.items():
+                    self.revalidate_document(path, document)
+                if editor and editor.document_path in targets:
+                    refresh_editor(editor.file_stat, editor.document_path in dirty_paths)
+                messagebox.showerror("Error", f"Batch transform was not saved: {str(e)}")
+            
+            self.jobs.submit("batch-transform", lambda job: commit_documents(targets, expected),
+                             on_committed, on_failed, description="Saving batch transform")
+        
+        btn_frame = ttk.Frame(content_frame)
+        btn_frame.pack(fill=tk.X, pady=(10, 0))
+        ttk.Button(btn_frame, text="Preview", command=run_preview).pack(side=tk.LEFT, padx=5)
+        apply_button = ttk.Button(btn_frame, text="Apply and Save", command=apply, state=tk.DISABLED)
+        apply_button.pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="Close", command=dialog.destroy).pack(side=tk.RIGHT, padx=5)
 
 
 def main():
+    # Required for the types parsing process pool in frozen (PyInstaller) builds
+    multiprocessing.freeze_support()
     root = tk.Tk()
     app = DayZTraderEditor(root)
     root.mainloop()
+    app.jobs.shutdown()
+    app.folder_watcher.close()
+    if app.startup_failed:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,126 @@
+"""Bounded LRU cache of parsed market and trader documents.
+
+Switching back to a recently opened file reuses its parsed document
+instead of re-reading the JSON, and a document with unsaved edits stays
+in the cache until it is saved, so switching files never throws edits
+away. Entries are validated against the file's (size, mtime) and only
+clean documents are ever evicted. Each entry also carries the document's
+undo history, which lives exactly as long as the parsed document does.
+Used from the Tk thread only.
+"""
+import os
+from collections import OrderedDict
+from typing import Any, List, Optional, Tuple
+
+from undo_history import UndoHistory
+
+# Clean documents kept around; dirty ones are kept regardless
+DOCUMENT_CACHE_SIZE = 16
+
+FileStat = Tuple[int, int]  # (size, mtime_ns)
+
+
+def file_stat(file_path: str) -> Optional[FileStat]:
+    """(size, mtime_ns) of file_path, or None if it can't be read"""
+    try:
+        stat_result = os.stat(file_path)
+    except OSError:
+        return None
+    return stat_result.st_size, stat_result.st_mtime_ns
+
+
+class CachedDocument:
+    """A parsed document plus what is needed to reuse it"""
+
+    __slots__ = ("path", "document", "stat", "dirty", "view_state", "history")
+
+    def __init__(self, path: str, document: Any, stat: Optional[FileStat], dirty: bool = False,
+                 view_state: Any = None, history: Optional[UndoHistory] = None):
+        self.path = path
+        self.document = document
+        self.stat = stat  # File state the document was read from (or last saved as)
+        self.dirty = dirty  # Has edits that are not on disk
+        self.view_state = view_state  # Editor state to restore, e.g. the selected item
+        self.history = history  # Undo/redo steps for document, created on first use
+
+
+class DocumentCache:
+    """LRU map of file path -> CachedDocument that never evicts unsaved edits"""
+
+    def __init__(self, capacity: int = DOCUMENT_CACHE_SIZE):
+        self.capacity = capacity
+        self._entries: "OrderedDict[str, CachedDocument]" = OrderedDict()
+
+    @staticmethod
+    def _key(file_path: str) -> str:
+        return os.path.normcase(os.path.abspath(file_path))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, file_path: str) -> bool:
+        return self._key(file_path) in self._entries
+
+    def get(self, file_path: str, stat: Optional[FileStat] = None) -> Optional[CachedDocument]:
+        """Return the cached entry for file_path if it can still be used
+
+        A clean entry whose file changed on disk (stat differs) is dropped.
+        A dirty entry is always returned - the caller decides what to do
+        when the file also changed underneath it (see changed_on_disk).
+        """
+        key = self._key(file_path)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if not entry.dirty and stat is not None and entry.stat != stat:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    @staticmethod
+    def changed_on_disk(entry: CachedDocument, stat: Optional[FileStat]) -> bool:
+        return stat is not None and entry.stat is not None and entry.stat != stat
+
+    def put(self, file_path: str, document: Any, stat: Optional[FileStat], dirty: bool = False,
+            view_state: Any = None) -> CachedDocument:
+        key = self._key(file_path)
+        previous = self._entries.get(key)
+        # Re-putting the same document (e.g. after a save) keeps its undo history
+        history = previous.history if previous is not None and previous.document is document else None
+        entry = CachedDocument(file_path, document, stat, dirty, view_state, history)
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        self._evict()
+        return entry
+
+    def mark_clean(self, file_path: str, stat: Optional[FileStat]):
+        """Record that file_path was just saved"""
+        entry = self._entries.get(self._key(file_path))
+        if entry is not None:
+            entry.dirty = False
+            entry.stat = stat
+            self._evict()
+
+    def history_for(self, file_path: str, document: Any, clean: bool = True) -> UndoHistory:
+        """The undo history of the cached document, or a detached one if document isn't cached"""
+        entry = self._entries.get(self._key(file_path))
+        if entry is None or entry.document is not document:
+            return UndoHistory(document, clean)
+        if entry.history is None:
+            entry.history = UndoHistory(document, clean)
+        return entry.history
+
+    def discard(self, file_path: str):
+        self._entries.pop(self._key(file_path), None)
+
+    def dirty_paths(self) -> List[str]:
+        return [entry.path for entry in self._entries.values() if entry.dirty]
+
+    def _evict(self):
+        # Oldest clean entries go first; dirty entries may push the cache over capacity
+        excess = len(self._entries) - self.capacity
+        if excess <= 0:
+            return
+        for key in [key for key, entry in self._entries.items() if not entry.dirty][:excess]:
+            del self._entries[key]
@@ -0,0 +1,332 @@
+"""Duplicate detection and removal for Market and Trader files.
+
+The engine works in three steps:
+
+1. scan_files reads every market and trader file on a process pool and
+   returns only compact per-item records (ClassName and prices) or the
+   category list, plus the file's (size, mtime) at scan time.
+2. find_market_duplicates groups market items by ClassName in a single
+   hash-join pass over all files, so an item listed twice in one file and
+   an item listed in two different files (usually at different prices) are
+   found the same way. Each group keeps one occurrence chosen by a policy.
+   find_trader_duplicates does the same for categories within one trader.
+3. remove_duplicates_in_files rebuilds each affected list in one filtering
+   pass and rewrites only the files that actually lost entries, skipping
+   any file that changed on disk since it was scanned.
+
+build_report / write_report_json / write_report_csv turn the result of
+step 2 into a machine-readable dry-run report.
+"""
+import csv
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from types_catalog import PARALLEL_MIN_FILES, ProgressCallback
+
+# Which occurrence of a duplicated ClassName survives
+POLICY_KEEP_FIRST = "keep-first"
+POLICY_KEEP_CHEAPEST = "keep-cheapest"
+POLICY_KEEP_IN_FILE = "keep-in-file"
+
+POLICY_LABELS = {
+    POLICY_KEEP_FIRST: "Keep the first occurrence (file name order)",
+    POLICY_KEEP_CHEAPEST: "Keep the cheapest occurrence",
+    POLICY_KEEP_IN_FILE: "Keep the occurrence in a chosen file",
+}
+
+KIND_MARKET = "market"
+KIND_TRADER = "trader"
+
+# The JSON list each file kind is deduplicated in
+LIST_KEYS = {KIND_MARKET: "Items", KIND_TRADER: "Categories"}
+
+REPORT_FORMAT_VERSION = 1
+REPORT_CSV_FIELDS = ["type", "file", "index", "name", "cross_file", "kept_file", "kept_index"]
+
+
+class ItemRecord(NamedTuple):
+    """The parts of a market item that duplicate detection needs"""
+    class_name: str
+    price: Tuple[float, float]  # See item_price
+
+
+class ScannedFile(NamedTuple):
+    """Result of scanning one market or trader file"""
+    kind: str  # KIND_MARKET or KIND_TRADER
+    file_name: str
+    file_path: str
+    stat: Tuple[int, int]  # (size, mtime_ns) when read
+    entries: list  # ItemRecords for markets, category names for traders
+
+
+def item_price(item: Dict[str, Any]) -> Tuple[float, float]:
+    """Sort key for keep-cheapest: (MinPriceThreshold, MaxPriceThreshold), unparsable prices last"""
+    prices = []
+    for prop in ("MinPriceThreshold", "MaxPriceThreshold"):
+        try:
+            value = float(item.get(prop))
+        except (TypeError, ValueError):
+            value = math.inf
+        prices.append(value if value >= 0 else math.inf)
+    return prices[0], prices[1]
+
+
+def _file_stat(file_path: str) -> Tuple[int, int]:
+    stat_result = os.stat(file_path)
+    return stat_result.st_size, stat_result.st_mtime_ns
+
+
+def scan_file(kind: str, file_path: str) -> ScannedFile:
+    """Read one file and keep only what duplicate detection needs"""
+    stat = _file_stat(file_path)
+    with open(file_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    values = data.get(LIST_KEYS[kind]) if isinstance(data, dict) else None
+    if not isinstance(values, list):
+        values = []
+    if kind == KIND_MARKET:
+        entries = [ItemRecord(item.get("ClassName", "") or "", item_price(item)) if isinstance(item, dict)
+                   else ItemRecord("", (math.inf, math.inf)) for item in values]
+    else:
+        entries = values
+    return ScannedFile(kind, os.path.basename(file_path), file_path, stat, entries)
+
+
+def _run_in_pool(func: Callable, tasks: Sequence[tuple], max_workers: int = None,
+                 progress: ProgressCallback = None) -> List[Any]:
+    """Run func(*task) for each task, on a process pool when it pays off
+
+    Returns results in task order; a task that raised yields the exception
+    object instead. progress(done, total, file name) is called in the calling
+    thread; the file path is taken to be the last element of each task.
+    """
+    results: List[Any] = [None] * len(tasks)
+    total = len(tasks)
+    if max_workers is None:
+        max_workers = min(total, os.cpu_count() or 1)
+
+    if total >= PARALLEL_MIN_FILES and max_workers > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                futures = {executor.submit(func, *task): position for position, task in enumerate(tasks)}
+                for done, future in enumerate(as_completed(futures), 1):
+                    position = futures[future]
+                    try:
+                        results[position] = future.result()
+                    except Exception as e:
+                        results[position] = e
+                    if progress:
+                        progress(done, total, os.path.basename(tasks[position][-1]))
+            return results
+        except (OSError, RuntimeError, ImportError):
+            pass  # No process support here - go serial
+
+    for position, task in enumerate(tasks):
+        try:
+            results[position] = func(*task)
+        except Exception as e:
+            results[position] = e
+        if progress:
+            progress(position + 1, total, os.path.basename(task[-1]))
+    return results
+
+
+def scan_files(market_paths: Iterable[str] = (), trader_paths: Iterable[str] = (), max_workers: int = None,
+               progress: ProgressCallback = None) -> Tuple[List[ScannedFile], List[ScannedFile], List[str]]:
+    """Scan market and trader files in parallel
+
+    Returns (markets, traders, errors); markets keep the order of market_paths,
+    which is the order keep-first follows.
+    """
+    tasks = [(KIND_MARKET, path) for path in market_paths] + [(KIND_TRADER, path) for path in trader_paths]
+    markets, traders, errors = [], [], []
+    for (kind, path), result in zip(tasks, _run_in_pool(scan_file, tasks, max_workers, progress)):
+        if isinstance(result, Exception):
+            errors.append(f"Error processing {os.path.basename(path)}: {str(result)}")
+        elif kind == KIND_MARKET:
+            markets.append(result)
+        else:
+            traders.append(result)
+    return markets, traders, errors
+
+
+def choose_keeper(group: List[Tuple[int, int]], markets: Sequence[ScannedFile], policy: str,
+                  preferred_file: str = None) -> Tuple[int, int]:
+    """Pick the (file position, item index) to keep out of a group of occurrences
+
+    group is in scan order, so its first element is the first occurrence.
+    """
+    if policy == POLICY_KEEP_CHEAPEST:
+        # min() returns the first of equally cheap occurrences
+        return min(group, key=lambda occurrence: markets[occurrence[0]].entries[occurrence[1]].price)
+    if policy == POLICY_KEEP_IN_FILE and preferred_file:
+        for occurrence in group:
+            if markets[occurrence[0]].file_name == preferred_file:
+                return occurrence
+    return group[0]
+
+
+def find_market_duplicates(markets: Sequence[ScannedFile], policy: str = POLICY_KEEP_FIRST,
+                           cross_file: bool = True, preferred_file: str = None) -> List[Dict[str, Any]]:
+    """Return one record per market item that should be removed, in file and item order
+
+    With cross_file False only repeats inside the same file are reported
+    (the keeper is then always chosen within that file).
+    """
+    occurrences: Dict[Any, List[Tuple[int, int]]] = {}
+    for file_position, scanned in enumerate(markets):
+        for index, record in enumerate(scanned.entries):
+            if not record.class_name:
+                continue
+            key = record.class_name if cross_file else (file_position, record.class_name)
+            group = occurrences.get(key)
+            if group is None:
+                occurrences[key] = [(file_position, index)]
+            else:
+                group.append((file_position, index))
+
+    removals = []
+    for group in occurrences.values():
+        if len(group) < 2:
+            continue
+        keeper = choose_keeper(group, markets, policy, preferred_file)
+        for occurrence in group:
+            if occurrence != keeper:
+                removals.append((occurrence, keeper))
+    removals.sort()
+
+    duplicates = []
+    for (file_position, index), (kept_position, kept_index) in removals:
+        scanned = markets[file_position]
+        duplicates.append({
+            "index": index,
+            "class_name": scanned.entries[index].class_name,
+            "file": scanned.file_name,
+            "file_path": scanned.file_path,
+            "type": KIND_MARKET,
+            "kept_file": markets[kept_position].file_name,
+            "kept_index": kept_index,
+            "cross_file": file_position != kept_position,
+        })
+    return duplicates
+
+
+def find_trader_duplicates(scanned: ScannedFile) -> List[Dict[str, Any]]:
+    """Return one record per repeated category in a trader file (first occurrence is kept)"""
+    first_seen: Dict[Any, int] = {}
+    duplicates = []
+    for index, category in enumerate(scanned.entries):
+        try:
+            kept_index = first_seen.setdefault(category, index)
+        except TypeError:
+            continue  # Not a category name
+        if kept_index != index:
+            duplicates.append({
+                "index": index,
+                "category": category,
+                "file": scanned.file_name,
+                "file_path": scanned.file_path,
+                "type": KIND_TRADER,
+                "kept_file": scanned.file_name,
+                "kept_index": kept_index,
+                "cross_file": False,
+            })
+    return duplicates
+
+
+def group_by_file(duplicates: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """{file path: duplicate records} preserving first-seen order"""
+    by_file: Dict[str, List[Dict[str, Any]]] = {}
+    for dup in duplicates:
+        by_file.setdefault(dup["file_path"], []).append(dup)
+    return by_file
+
+
+def build_removal_plan(duplicates: List[Dict[str, Any]],
+                       scanned_files: Iterable[ScannedFile]) -> Dict[str, Tuple[str, Tuple[int, int], List[int]]]:
+    """{file path: (kind, stat at scan time, indices to remove)} for every file with duplicates"""
+    stats = {scanned.file_path: scanned.stat for scanned in scanned_files}
+    return {file_path: (dups[0]["type"], stats[file_path], [dup["index"] for dup in dups])
+            for file_path, dups in group_by_file(duplicates).items()}
+
+
+def remove_indices(kind: str, expected_stat: Tuple[int, int], indices: List[int], file_path: str) -> int:
+    """Drop the given list positions from one file in a single pass; return how many were removed
+
+    Raises if the file changed since it was scanned, so stale positions are
+    never applied. The file is only written when something was removed.
+    """
+    if _file_stat(file_path) != tuple(expected_stat):
+        raise RuntimeError("file changed on disk since the scan - scan again")
+    with open(file_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    list_key = LIST_KEYS[kind]
+    values = data.get(list_key, [])
+    remove = set(indices)
+    kept = [value for index, value in enumerate(values) if index not in remove]
+    removed = len(values) - len(kept)
+    if removed:
+        data[list_key] = kept
+        with open(file_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=4, ensure_ascii=False)
+    return removed
+
+
+def remove_duplicates_in_files(plan: Dict[str, Tuple[str, Tuple[int, int], List[int]]], max_workers: int = None,
+                               progress: ProgressCallback = None) -> Tuple[int, int, List[str]]:
+    """Apply a removal plan in parallel; return (entries removed, files written, failures)"""
+    tasks = [(kind, stat, indices, file_path) for file_path, (kind, stat, indices) in plan.items()]
+    removed_count = 0
+    files_saved = 0
+    failures = []
+    for task, result in zip(tasks, _run_in_pool(remove_indices, tasks, max_workers, progress)):
+        if isinstance(result, Exception):
+            failures.append(f"Failed to save {os.path.basename(task[-1])}: {str(result)}")
+        elif result:
+            removed_count += result
+            files_saved += 1
+    return removed_count, files_saved, failures
+
+
+def policy_description(policy: str, preferred_file: Optional[str] = None) -> str:
+    if policy == POLICY_KEEP_IN_FILE and preferred_file:
+        return f"the occurrence in {preferred_file} will be kept where there is one"
+    if policy == POLICY_KEEP_CHEAPEST:
+        return "the cheapest occurrence will be kept"
+    return "the first occurrence will be kept"
+
+
+def build_report(duplicates: List[Dict[str, Any]], policy: str, cross_file: bool,
+                 preferred_file: str = None, files_scanned: int = 0, errors: List[str] = ()) -> Dict[str, Any]:
+    """Machine-readable summary of a duplicate scan (nothing is modified)"""
+    by_file = group_by_file(duplicates)
+    return {
+        "version": REPORT_FORMAT_VERSION,
+        "policy": policy,
+        "preferred_file": preferred_file or None,
+        "cross_file": cross_file,
+        "files_scanned": files_scanned,
+        "files_affected": len(by_file),
+        "duplicates_total": len(duplicates),
+        "cross_file_total": sum(1 for dup in duplicates if dup["cross_file"]),
+        "errors": list(errors),
+        "duplicates": [{"type": dup["type"], "file": dup["file"], "index": dup["index"],
+                        "name": dup.get("class_name", dup.get("category")), "cross_file": dup["cross_file"],
+                        "kept_file": dup["kept_file"], "kept_index": dup["kept_index"]}
+                       for dup in duplicates],
+    }
+
+
+def write_report_json(report: Dict[str, Any], file_path: str):
+    with open(file_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=4, ensure_ascii=False)
+
+
+def write_report_csv(report: Dict[str, Any], file_path: str):
+    with open(file_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=REPORT_CSV_FIELDS)
+        writer.writeheader()
+        writer.writerows(report["duplicates"])
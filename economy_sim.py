@@ -0,0 +1,215 @@
+"""Offline market economy simulator for tuning stock and price thresholds.
+
+Every item of the given market documents is simulated at once with NumPy:
+each tick (an hour by default) players buy and sell a Poisson-distributed
+number of each item and the trader's stock and prices move accordingly.
+
+The model follows Expansion's stock-based pricing:
+
+* An item's buy price moves linearly from MaxPriceThreshold when the stock
+  is at MinStockThreshold to MinPriceThreshold when it is at
+  MaxStockThreshold; it sells for SellPricePercent of the buy price
+  (see price_analyzer.sell_fraction).
+* The stock starts at the market's InitStockPercent of MaxStockThreshold.
+  Items with a MaxStockThreshold of 0 have unlimited stock at their
+  MinPriceThreshold.
+* Players can't buy below MinStockThreshold and the trader takes no more
+  than MaxStockThreshold.
+
+Player load is synthetic: buys_per_day and sells_per_day are the average
+demand of an item at its mid price, scaled per item by a log-normal
+popularity and by price elasticity (a buy price twice the mid price halves
+the demand at elasticity 1). Variants are not simulated separately.
+"""
+import csv
+import json
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from market_model import MarketDocument
+from price_analyzer import DEFAULT_SELL_PERCENT, sell_fraction
+
+try:
+    import numpy as np
+except ImportError:  # Only this module needs NumPy; the editor runs without it
+    np = None
+
+TICKS_PER_DAY = 24
+
+REPORT_FIELDS = ["File", "Position", "ClassName", "StartStock", "EndStock", "MinStock", "MaxStock", "DepletedDay",
+                 "Bought", "Sold", "StartPrice", "EndPrice", "Revenue", "Payout"]
+
+
+class SimulationError(ValueError):
+    """The simulation can't run (bad parameters or NumPy missing)"""
+
+
+class LoadModel(NamedTuple):
+    """Synthetic player behaviour"""
+    days: int = 30
+    buys_per_day: float = 2.0  # Average buys of one item per day at its mid price
+    sells_per_day: float = 1.5  # Average sells of one item per day at its mid sell price
+    elasticity: float = 1.0  # How strongly demand reacts to price
+    popularity_spread: float = 1.0  # Sigma of the log-normal per-item popularity (0 = all items alike)
+    seed: Optional[int] = None
+    default_sell_percent: float = DEFAULT_SELL_PERCENT
+
+
+class SimulationResult:
+    """Daily stock and price curves of every simulated item"""
+
+    def __init__(self, files: List[str], positions: List[int], class_names: List[str], stock, prices,
+                 min_stock, max_stock, unlimited, depleted, bought, sold, revenue, payout):
+        self.files = files
+        self.positions = positions
+        self.class_names = class_names
+        self.stock = stock  # (days + 1, items): stock at the start of each day and at the end
+        self.prices = prices  # (days + 1, items): buy price at the same moments
+        self.min_stock = min_stock
+        self.max_stock = max_stock
+        self.unlimited = unlimited
+        self.depleted = depleted  # Day (1-based, 0 = from the start) stock first hit MinStockThreshold, -1 if never
+        self.bought = bought  # Units players bought, per item
+        self.sold = sold  # Units players sold, per item
+        self.revenue = revenue  # Money players paid the traders, per item
+        self.payout = payout  # Money the traders paid players, per item
+
+    @property
+    def days(self) -> int:
+        return self.stock.shape[0] - 1
+
+    def __len__(self) -> int:
+        return len(self.class_names)
+
+    def depletion_order(self) -> List[int]:
+        """Item indices, the ones running out first first; those that never run out last"""
+        days = self.depleted
+        return np.lexsort((np.arange(len(days)), np.where(days < 0, self.days + 1, days))).tolist()
+
+    def summary(self) -> str:
+        depleted = int((self.depleted >= 0).sum())
+        full = int(((self.stock[-1] >= self.max_stock) & ~self.unlimited).sum())
+        return (f"{len(self)} item(s) over {self.days} day(s): {depleted} ran out of stock, "
+                f"{full} ended at MaxStockThreshold; players paid {self.revenue.sum():,.0f} "
+                f"and were paid {self.payout.sum():,.0f}")
+
+    def rows(self) -> List[Dict[str, object]]:
+        """One report row per item, in depletion order"""
+        days = self.depleted
+        rows = []
+        for index in self.depletion_order():
+            rows.append({
+                "File": self.files[index],
+                "Position": self.positions[index],
+                "ClassName": self.class_names[index],
+                "StartStock": int(self.stock[0, index]),
+                "EndStock": int(self.stock[-1, index]),
+                "MinStock": int(self.min_stock[index]),
+                "MaxStock": int(self.max_stock[index]),
+                "DepletedDay": int(days[index]) if days[index] >= 0 else None,
+                "Bought": int(self.bought[index]),
+                "Sold": int(self.sold[index]),
+                "StartPrice": round(float(self.prices[0, index]), 2),
+                "EndPrice": round(float(self.prices[-1, index]), 2),
+                "Revenue": round(float(self.revenue[index]), 2),
+                "Payout": round(float(self.payout[index]), 2),
+            })
+        return rows
+
+    def write(self, file_path: str):
+        """Write the report to a .csv file, or to a .json file including the daily curves"""
+        rows = self.rows()
+        if file_path.lower().endswith(".csv"):
+            with open(file_path, 'w', encoding='utf-8', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS)
+                writer.writeheader()
+                writer.writerows(rows)
+            return
+        for row, index in zip(rows, self.depletion_order()):
+            row["StockCurve"] = self.stock[:, index].astype(int).tolist()
+            row["PriceCurve"] = np.round(self.prices[:, index], 2).tolist()
+        with open(file_path, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, indent=4, ensure_ascii=False)
+
+
+def _buy_prices(stock, min_stock, max_stock, min_price, max_price):
+    span = max_stock - min_stock
+    fill = np.clip((stock - min_stock) / np.where(span > 0, span, 1), 0.0, 1.0)
+    fill = np.where(span > 0, fill, 1.0)
+    return max_price + (min_price - max_price) * fill
+
+
+def simulate(documents: Sequence[Tuple[str, MarketDocument]], load: LoadModel = LoadModel(),
+             ticks_per_day: int = TICKS_PER_DAY, progress=None) -> SimulationResult:
+    """Simulate load.days of trading on every item of (file name, document) pairs"""
+    if np is None:
+        raise SimulationError("The economy simulator needs NumPy (pip install numpy)")
+    if load.days < 1 or ticks_per_day < 1:
+        raise SimulationError("Simulate at least one day of at least one tick")
+    if min(load.buys_per_day, load.sells_per_day, load.elasticity, load.popularity_spread) < 0:
+        raise SimulationError("Rates, elasticity and popularity spread can't be negative")
+
+    files, positions, class_names = [], [], []
+    values = []
+    for file_name, document in documents:
+        init_fraction = min(max(float(document.init_stock_percent), 0.0), 100.0) / 100.0
+        for position, item in enumerate(document.items):
+            if not item.class_name:
+                continue
+            files.append(file_name)
+            positions.append(position)
+            class_names.append(item.class_name)
+            values.append((item.min_price_threshold, item.max_price_threshold,
+                           item.min_stock_threshold, item.max_stock_threshold,
+                           sell_fraction(item.sell_price_percent, load.default_sell_percent), init_fraction))
+    columns = np.array(values, dtype=np.float64).reshape(-1, 6)
+    min_price, max_price, min_stock, max_stock, fraction, init_fraction = columns.T
+    count = len(class_names)
+
+    unlimited = max_stock <= 0
+    min_stock = np.where(unlimited, 0.0, np.minimum(min_stock, max_stock))
+    max_stock = np.where(unlimited, 0.0, max_stock)
+    stock = np.where(unlimited, 0.0, np.clip(np.round(max_stock * init_fraction), min_stock, max_stock))
+
+    rng = np.random.default_rng(load.seed)
+    popularity = rng.lognormal(0.0, load.popularity_spread, count) if load.popularity_spread else np.ones(count)
+    mid_price = np.maximum((min_price + max_price) / 2, 1e-9)
+    buy_rate = load.buys_per_day / ticks_per_day * popularity
+    sell_rate = load.sells_per_day / ticks_per_day * popularity
+
+    def prices_now():
+        return np.where(unlimited, min_price, _buy_prices(stock, min_stock, max_stock, min_price, max_price))
+
+    depleted = np.where(~unlimited & (stock <= min_stock), 0, -1)
+    stock_curve = np.empty((load.days + 1, count))
+    price_curve = np.empty((load.days + 1, count))
+    bought = np.zeros(count)
+    sold = np.zeros(count)
+    revenue = np.zeros(count)
+    payout = np.zeros(count)
+    for day in range(load.days):
+        stock_curve[day] = stock
+        price_curve[day] = prices_now()
+        for _ in range(ticks_per_day):
+            price = prices_now()
+            # Demand falls as the price rises above the mid price; supply rises with it
+            relative = np.maximum(price, 1e-9) / mid_price
+            buys = rng.poisson(buy_rate * relative ** -load.elasticity).astype(np.float64)
+            buys = np.where(unlimited, buys, np.minimum(buys, np.maximum(stock - min_stock, 0)))
+            sells = rng.poisson(sell_rate * relative ** load.elasticity).astype(np.float64)
+            sells = np.where(unlimited, sells, np.minimum(sells, np.maximum(max_stock - stock + buys, 0)))
+            # Buys go first at this tick's price; sells are paid at the price after them
+            revenue += buys * price
+            stock = np.where(unlimited, stock, stock - buys)
+            sell_price = prices_now() * fraction
+            payout += sells * sell_price
+            stock = np.where(unlimited, stock, stock + sells)
+            bought += buys
+            sold += sells
+            # Stock may recover within the day, so running out is checked every tick
+            depleted = np.where((depleted < 0) & ~unlimited & (stock - sells <= min_stock), day + 1, depleted)
+        if progress:
+            progress(day + 1, load.days, f"day {day + 1}")
+    stock_curve[-1] = stock
+    price_curve[-1] = prices_now()
+    return SimulationResult(files, positions, class_names, stock_curve, price_curve, min_stock, max_stock, unlimited,
+                            depleted, bought, sold, revenue, payout)
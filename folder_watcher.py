@@ -0,0 +1,217 @@
+"""Directory-state service for the project's Market, Traders and Types folders.
+
+The watcher keeps a {file name: (size, mtime)} snapshot of every watched
+folder and publishes added/removed/modified events to subscribers. On Linux
+it listens to inotify (through ctypes, no extra dependency) and only rescans
+a folder when the kernel reports a change in it; elsewhere it falls back to
+periodic os.scandir polling. All checks and callbacks run on the thread that
+owns the schedule function (the Tk thread, via root.after).
+"""
+import ctypes
+import ctypes.util
+import os
+import struct
+import sys
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+# Check intervals (ms): inotify reads are a cheap non-blocking syscall, polling rescans the folder
+INOTIFY_INTERVAL_MS = 250
+POLL_INTERVAL_MS = 2000
+
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_IN_MODIFY = 0x002
+_IN_ATTRIB = 0x004
+_IN_CLOSE_WRITE = 0x008
+_IN_MOVED_FROM = 0x040
+_IN_MOVED_TO = 0x080
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_IN_DELETE_SELF = 0x400
+_IN_MOVE_SELF = 0x800
+_WATCH_MASK = (_IN_MODIFY | _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO |
+               _IN_CREATE | _IN_DELETE | _IN_DELETE_SELF | _IN_MOVE_SELF)
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class FolderEvent(NamedTuple):
+    """A change to one file in a watched folder"""
+    role: str  # "market", "traders" or "types"
+    kind: str  # "added", "removed" or "modified"
+    name: str  # File name inside the folder
+
+
+FolderState = Dict[str, Tuple[int, int]]
+
+
+def scan_folder(folder: str, suffix: str) -> FolderState:
+    """Return {file name: (size, mtime_ns)} for files in folder ending with suffix"""
+    state: FolderState = {}
+    try:
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                if entry.name.endswith(suffix) and entry.is_file():
+                    stat_result = entry.stat()
+                    state[entry.name] = (stat_result.st_size, stat_result.st_mtime_ns)
+    except OSError:
+        pass  # Folder missing or unreadable - treat as empty
+    return state
+
+
+def diff_states(role: str, old: FolderState, new: FolderState) -> List[FolderEvent]:
+    events = []
+    for name in sorted(new):
+        if name not in old:
+            events.append(FolderEvent(role, "added", name))
+        elif old[name] != new[name]:
+            events.append(FolderEvent(role, "modified", name))
+    for name in sorted(old):
+        if name not in new:
+            events.append(FolderEvent(role, "removed", name))
+    return events
+
+
+class _Inotify:
+    """Minimal non-blocking inotify wrapper (Linux only)"""
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._libc = libc
+        self.fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+    def add_watch(self, folder: str) -> int:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(folder), _WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {folder}")
+        return wd
+
+    def remove_watch(self, wd: int):
+        self._libc.inotify_rm_watch(self.fd, wd)
+
+    def read_changed(self) -> set:
+        """Return the watch descriptors that reported events since the last call"""
+        changed = set()
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return changed
+            if not data:
+                return changed
+            offset = 0
+            while offset + _EVENT_HEADER.size <= len(data):
+                wd, _mask, _cookie, name_length = _EVENT_HEADER.unpack_from(data, offset)
+                changed.add(wd)
+                offset += _EVENT_HEADER.size + name_length
+
+    def close(self):
+        os.close(self.fd)
+
+
+class FolderWatcher:
+    """Watches the project folders and publishes incremental change events"""
+
+    def __init__(self, schedule: Callable[[int, Callable], object]):
+        self._schedule = schedule  # e.g. root.after
+        self._folders: Dict[str, Tuple[str, str]] = {}  # role -> (folder, suffix)
+        self._states: Dict[str, FolderState] = {}
+        self._watch_descriptors: Dict[str, int] = {}
+        self._subscribers: List[Callable[[List[FolderEvent]], None]] = []
+        self._running = False
+        self._inotify: Optional[_Inotify] = None
+        if sys.platform.startswith("linux"):
+            try:
+                self._inotify = _Inotify()
+            except (OSError, AttributeError):
+                self._inotify = None  # Fall back to polling
+
+    @property
+    def uses_inotify(self) -> bool:
+        return self._inotify is not None
+
+    def subscribe(self, callback: Callable[[List[FolderEvent]], None]):
+        """Call callback(events) whenever a watched folder changes"""
+        self._subscribers.append(callback)
+
+    def watch(self, role: str, folder: str, suffix: str):
+        """Start watching folder under role, replacing any folder previously watched for that role"""
+        self.unwatch(role)
+        self._folders[role] = (folder, suffix)
+        self._states[role] = scan_folder(folder, suffix)
+        if self._inotify is not None:
+            try:
+                self._watch_descriptors[role] = self._inotify.add_watch(folder)
+            except OSError:
+                pass  # This folder is polled on every tick instead
+        self.start()
+
+    def unwatch(self, role: str):
+        self._folders.pop(role, None)
+        self._states.pop(role, None)
+        wd = self._watch_descriptors.pop(role, None)
+        if wd is not None and self._inotify is not None:
+            self._inotify.remove_watch(wd)
+
+    def files(self, role: str) -> List[str]:
+        """Sorted file names currently known for role (no disk access)"""
+        return sorted(self._states.get(role, ()))
+
+    def state(self, role: str) -> FolderState:
+        """Copy of the {file name: (size, mtime_ns)} snapshot for role (no disk access)"""
+        return dict(self._states.get(role, {}))
+
+    def folder(self, role: str) -> Optional[str]:
+        entry = self._folders.get(role)
+        return entry[0] if entry else None
+
+    def rescan(self, role: str = None) -> List[FolderEvent]:
+        """Re-read one folder (or all), publish and return the resulting events"""
+        roles = [role] if role is not None else list(self._folders)
+        events = []
+        for current_role in roles:
+            if current_role not in self._folders:
+                continue
+            folder, suffix = self._folders[current_role]
+            new_state = scan_folder(folder, suffix)
+            events.extend(diff_states(current_role, self._states.get(current_role, {}), new_state))
+            self._states[current_role] = new_state
+        if events:
+            for callback in list(self._subscribers):
+                callback(events)
+        return events
+
+    def start(self):
+        if not self._running:
+            self._running = True
+            self._schedule(self._interval(), self._tick)
+
+    def stop(self):
+        self._running = False
+
+    def close(self):
+        self.stop()
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    def _interval(self) -> int:
+        return INOTIFY_INTERVAL_MS if self._inotify is not None else POLL_INTERVAL_MS
+
+    def _tick(self):
+        if not self._running:
+            return
+        try:
+            if self._inotify is None:
+                self.rescan()
+            else:
+                changed = self._inotify.read_changed()
+                for role in list(self._folders):
+                    wd = self._watch_descriptors.get(role)
+                    # Folders without a watch descriptor are polled every tick
+                    if wd is None or wd in changed:
+                        self.rescan(role)
+        finally:
+            if self._running:
+                self._schedule(self._interval(), self._tick)
@@ -0,0 +1,340 @@
+"""Typed models for Market and Trader JSON files.
+
+Documents are validated once when they are loaded: every known field is
+coerced to its type (bad values fall back to the field default and are
+listed in the document's problems). Unknown keys and the original key
+order are kept, so a file that was valid to begin with serializes back
+exactly as it was read. All records use __slots__, so a market with
+thousands of items holds no per-item dicts besides the optional extras.
+"""
+import json
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+
+class Field(NamedTuple):
+    """One known JSON key of a record"""
+    key: str  # JSON key
+    attr: str  # Attribute name on the record
+    kind: str  # "str", "int", "float", "strings" (list of str), "dict" or "items"
+    default: Any
+
+
+# Every distinct key order seen so far, shared by all records that use it
+_KEY_ORDERS: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+
+def _intern_order(keys: Tuple[str, ...]) -> Tuple[str, ...]:
+    return _KEY_ORDERS.setdefault(keys, keys)
+
+
+def _fresh(default: Any) -> Any:
+    # Mutable defaults are copied so records never share lists or dicts
+    if isinstance(default, list):
+        return []
+    if isinstance(default, dict):
+        return {}
+    return default
+
+
+def coerce_value(kind: str, value: Any, default: Any) -> Tuple[Any, bool]:
+    """Return (value as kind, whether the original was valid)
+
+    Numbers keep their JSON type (100 stays 100, -1.0 stays -1.0) so
+    valid files round-trip unchanged; numeric strings are converted.
+    """
+    if kind == "str":
+        if isinstance(value, str):
+            return value, True
+        return (str(value), False) if value is not None else (default, False)
+    if kind in ("int", "float"):
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return value, True
+        if isinstance(value, bool):
+            return int(value), True
+        try:
+            number = float(str(value).strip())
+        except (TypeError, ValueError):
+            return default, False
+        return (int(number) if kind == "int" else number), False
+    if kind == "strings":
+        if isinstance(value, list) and all(isinstance(entry, str) for entry in value):
+            return list(value), True
+        if isinstance(value, list):
+            return [entry for entry in value if isinstance(entry, str)], False
+        return [], False
+    if kind == "dict":
+        if isinstance(value, dict):
+            return dict(value), True
+        return {}, False
+    return value, True
+
+
+def parse_text(kind: str, text: str, default: Any) -> Any:
+    """Convert an editor field's text to a value of kind; empty or invalid text gives default"""
+    text = text.strip()
+    if kind == "str":
+        return text
+    if not text:
+        return default
+    try:
+        if kind == "int":
+            try:
+                return int(text)
+            except ValueError:
+                return int(float(text))
+        if kind == "float":
+            return float(text)
+    except ValueError:
+        return default
+    return text
+
+
+def is_valid_text(kind: str, text: str) -> bool:
+    """Whether parse_text reads text as written (empty text, meaning the default, counts as valid)"""
+    text = text.strip()
+    if kind not in ("int", "float") or not text:
+        return True
+    try:
+        float(text)
+    except ValueError:
+        return False
+    return True
+
+
+def format_value(value: Any) -> str:
+    """Text shown in an editor field for a stored value"""
+    return "" if value is None else str(value)
+
+
+class _Record:
+    """Base for slot-based records loaded from and saved to JSON objects"""
+
+    __slots__ = ("extra", "key_order")
+    FIELDS: Tuple[Field, ...] = ()
+    _BY_KEY: Dict[str, Field] = {}
+    _CANONICAL_ORDER: Tuple[str, ...] = ()
+    # Keys written even when the source file lacked them and they hold their default
+    ALWAYS_WRITTEN: Tuple[str, ...] = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._BY_KEY = {field.key: field for field in cls.FIELDS}
+        cls._CANONICAL_ORDER = _intern_order(tuple(field.key for field in cls.FIELDS))
+
+    def __init__(self, **values):
+        for field in self.FIELDS:
+            setattr(self, field.attr, values[field.attr] if field.attr in values else _fresh(field.default))
+        self.extra: Optional[Dict[str, Any]] = None  # Unknown keys, kept as loaded
+        self.key_order = self._CANONICAL_ORDER
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], problems: List[str] = None, context: str = ""):
+        """Build a record from a JSON object, validating every known field once"""
+        record = cls.__new__(cls)
+        extra = None
+        for field in cls.FIELDS:
+            if field.key in data:
+                value, valid = record._load_value(field, data[field.key], problems, context)
+                if not valid and problems is not None:
+                    problems.append(f"{context}{field.key}: invalid value {data[field.key]!r}")
+            else:
+                value = _fresh(field.default)
+            setattr(record, field.attr, value)
+        for key, value in data.items():
+            if key not in cls._BY_KEY:
+                if extra is None:
+                    extra = {}
+                extra[key] = value
+        record.extra = extra
+        record.key_order = _intern_order(tuple(data))
+        return record
+
+    def _load_value(self, field: Field, value: Any, problems: Optional[List[str]], context: str) -> Tuple[Any, bool]:
+        return coerce_value(field.kind, value, field.default)
+
+    def _dump_value(self, field: Field) -> Any:
+        value = getattr(self, field.attr)
+        if isinstance(value, list):
+            return list(value)
+        if isinstance(value, dict):
+            return dict(value)
+        return value
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize back to a JSON object in the original key order"""
+        result: Dict[str, Any] = {}
+        extra = self.extra or {}
+        by_key = self._BY_KEY
+        for key in self.key_order:
+            field = by_key.get(key)
+            if field is not None:
+                result[key] = self._dump_value(field)
+            elif key in extra:
+                result[key] = extra[key]
+        # Other fields the original file did not have are only written once they hold something
+        for field in self.FIELDS:
+            if field.key not in result and (field.key in self.ALWAYS_WRITTEN
+                                            or getattr(self, field.attr) != field.default):
+                result[field.key] = self._dump_value(field)
+        for key, value in extra.items():
+            if key not in result:
+                result[key] = value
+        return result
+
+    def get(self, key: str) -> Any:
+        """Value of a known field by JSON key"""
+        return getattr(self, self._BY_KEY[key].attr)
+
+    def text(self, key: str) -> str:
+        return format_value(self.get(key))
+
+    def is_valid_text(self, key: str, text: str) -> bool:
+        return is_valid_text(self._BY_KEY[key].kind, text)
+
+    def set_text(self, key: str, text: str) -> bool:
+        """Set a known field from editor text; return True if the value changed
+
+        Unchanged text is not re-parsed, so a value like -1.0 keeps its type
+        until the user actually edits it.
+        """
+        if text.strip() == self.text(key):
+            return False
+        field = self._BY_KEY[key]
+        value = parse_text(field.kind, text, field.default)
+        if value == getattr(self, field.attr) and type(value) is type(getattr(self, field.attr)):
+            return False
+        setattr(self, field.attr, value)
+        return True
+
+
+class MarketItem(_Record):
+    """One entry of a market file's Items list"""
+
+    FIELDS = (
+        Field("ClassName", "class_name", "str", ""),
+        Field("MaxPriceThreshold", "max_price_threshold", "int", 0),
+        Field("MinPriceThreshold", "min_price_threshold", "int", 0),
+        Field("SellPricePercent", "sell_price_percent", "float", -1.0),
+        Field("MaxStockThreshold", "max_stock_threshold", "int", 0),
+        Field("MinStockThreshold", "min_stock_threshold", "int", 0),
+        Field("QuantityPercent", "quantity_percent", "int", -1),
+        Field("SpawnAttachments", "spawn_attachments", "strings", []),
+        Field("Variants", "variants", "strings", []),
+    )
+    __slots__ = tuple(field.attr for field in FIELDS)
+
+    @classmethod
+    def new(cls, class_name: str) -> "MarketItem":
+        """A new item with the editor's default prices and stock"""
+        return cls(class_name=class_name, max_price_threshold=1000, min_price_threshold=500,
+                   sell_price_percent=-1.0, max_stock_threshold=500, min_stock_threshold=1,
+                   quantity_percent=-1)
+
+    def copy(self) -> "MarketItem":
+        item = MarketItem.__new__(MarketItem)
+        for field in self.FIELDS:
+            value = getattr(self, field.attr)
+            setattr(item, field.attr, list(value) if isinstance(value, list) else value)
+        item.extra = dict(self.extra) if self.extra else None
+        item.key_order = self.key_order
+        return item
+
+
+class MarketDocument(_Record):
+    """A market (category) file: metadata plus its items"""
+
+    FIELDS = (
+        Field("m_Version", "version", "int", 12),
+        Field("DisplayName", "display_name", "str", ""),
+        Field("Icon", "icon", "str", ""),
+        Field("Color", "color", "str", ""),
+        Field("IsExchange", "is_exchange", "int", 0),
+        Field("InitStockPercent", "init_stock_percent", "float", 75.0),
+        Field("Items", "items", "items", []),
+    )
+    __slots__ = tuple(field.attr for field in FIELDS) + ("problems",)
+    # Expansion expects the whole metadata block, as the editor has always written it
+    ALWAYS_WRITTEN = tuple(field.key for field in FIELDS)
+
+    def __init__(self, **values):
+        super().__init__(**values)
+        self.problems: List[str] = []
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], problems: List[str] = None, context: str = ""):
+        problems = [] if problems is None else problems
+        document = super().from_dict(data, problems, context)
+        document.problems = problems
+        return document
+
+    def _load_value(self, field: Field, value: Any, problems: Optional[List[str]], context: str) -> Tuple[Any, bool]:
+        if field.kind != "items":
+            return super()._load_value(field, value, problems, context)
+        if not isinstance(value, list):
+            return [], False
+        items = []
+        for index, entry in enumerate(value):
+            if isinstance(entry, dict):
+                items.append(MarketItem.from_dict(entry, problems, f"{context}Items[{index}]."))
+            elif problems is not None:
+                problems.append(f"{context}Items[{index}]: not an object, dropped")
+        return items, True
+
+    def _dump_value(self, field: Field) -> Any:
+        if field.kind == "items":
+            return [item.to_dict() for item in self.items]
+        return super()._dump_value(field)
+
+    @classmethod
+    def load(cls, file_path: str) -> "MarketDocument":
+        with open(file_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if not isinstance(data, dict):
+            raise ValueError("market file must contain a JSON object")
+        return cls.from_dict(data)
+
+    def save(self, file_path: str):
+        with open(file_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=4, ensure_ascii=False)
+
+    def class_names(self) -> List[str]:
+        return [item.class_name for item in self.items]
+
+
+class TraderDocument(_Record):
+    """A trader file: metadata, the market categories it sells and per-item overrides"""
+
+    FIELDS = (
+        Field("DisplayName", "display_name", "str", ""),
+        Field("MinRequiredReputation", "min_required_reputation", "int", 0),
+        Field("MaxRequiredReputation", "max_required_reputation", "int", 0),
+        Field("RequiredFaction", "required_faction", "str", ""),
+        Field("RequiredCompletedQuestID", "required_completed_quest_id", "int", 0),
+        Field("TraderIcon", "trader_icon", "str", ""),
+        Field("Categories", "categories", "strings", []),
+        Field("Items", "items", "dict", {}),
+    )
+    __slots__ = tuple(field.attr for field in FIELDS) + ("problems",)
+
+    def __init__(self, **values):
+        super().__init__(**values)
+        self.problems: List[str] = []
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], problems: List[str] = None, context: str = ""):
+        problems = [] if problems is None else problems
+        document = super().from_dict(data, problems, context)
+        document.problems = problems
+        return document
+
+    @classmethod
+    def load(cls, file_path: str) -> "TraderDocument":
+        with open(file_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if not isinstance(data, dict):
+            raise ValueError("trader file must contain a JSON object")
+        return cls.from_dict(data)
+
+    def save(self, file_path: str):
+        with open(file_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=4, ensure_ascii=False)
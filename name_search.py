@@ -0,0 +1,368 @@
+"""Class name search helpers for the Types Viewer and the class name picker."""
+import re
+import threading
+from array import array
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence, Iterable, Set, Container
+
+# Length of the n-grams kept by TrigramIndex
+GRAM_SIZE = 3
+
+
+def iter_grams(text: str) -> Iterable[str]:
+    """Return the distinct GRAM_SIZE-character substrings of text"""
+    return {text[i:i + GRAM_SIZE] for i in range(len(text) - GRAM_SIZE + 1)}
+
+
+class TrigramIndex:
+    """Substring index over a set of class names
+
+    Every lower-cased name is broken into trigrams and each trigram maps to
+    a compact array of name ids. A query is answered by taking the shortest
+    posting list among the query's trigrams and verifying those candidates
+    with a plain substring test, so cost scales with the rarest trigram
+    rather than with the number of names. Names can be added and removed
+    incrementally; removed ids are tombstoned and the index compacts itself
+    once tombstones outnumber live names.
+    """
+
+    def __init__(self, names: Iterable[str] = ()):
+        # Updated on a worker while the Tk thread searches; held for both
+        self._lock = threading.RLock()
+        self.clear()
+        self.add_names(names)
+
+    def clear(self):
+        self._names: List[Optional[str]] = []
+        self._lowered: List[Optional[str]] = []
+        self._ids: Dict[str, int] = {}
+        self._postings: Dict[str, array] = {}
+        self._dead = 0
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._ids
+
+    def add_names(self, names: Iterable[str]):
+        with self._lock:
+            postings = self._postings
+            for name in names:
+                if name in self._ids:
+                    continue
+                name_id = len(self._names)
+                lowered = name.lower()
+                self._ids[name] = name_id
+                self._names.append(name)
+                self._lowered.append(lowered)
+                for gram in iter_grams(lowered):
+                    posting = postings.get(gram)
+                    if posting is None:
+                        posting = postings[gram] = array('i')
+                    posting.append(name_id)
+
+    def remove_names(self, names: Iterable[str]):
+        with self._lock:
+            for name in names:
+                name_id = self._ids.pop(name, None)
+                if name_id is None:
+                    continue
+                self._names[name_id] = None
+                self._lowered[name_id] = None
+                self._dead += 1
+            if self._dead > len(self._ids):
+                self._compact()
+
+    def _compact(self):
+        live = [name for name in self._names if name is not None]
+        self.clear()
+        self.add_names(live)
+
+    def search(self, query: str) -> List[str]:
+        """Return all names containing query (case-insensitive), sorted"""
+        with self._lock:
+            query = query.strip().lower()
+            names = self._names
+            lowered = self._lowered
+            if not query:
+                return sorted(self._ids)
+            if len(query) < GRAM_SIZE:
+                # Too short for the index - a scan of the lower-cased names is still cheap
+                return sorted(names[i] for i, text in enumerate(lowered) if text is not None and query in text)
+
+            shortest = None
+            for gram in iter_grams(query):
+                posting = self._postings.get(gram)
+                if posting is None:
+                    return []
+                if shortest is None or len(posting) < len(shortest):
+                    shortest = posting
+            return sorted(names[i] for i in shortest if lowered[i] is not None and query in lowered[i])
+
+
+# Splits "Mag_M4A1_30Rnd" / "AmmoBox_556x45" into word-ish tokens
+TOKEN_PATTERN = re.compile(r'[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+')
+WORD_PATTERN = re.compile(r'[A-Za-z0-9]+')
+
+# Token match scores used by FuzzyIndex ranking
+SCORE_EXACT = 3.0
+SCORE_PREFIX = 2.0
+SCORE_TYPO = 1.0
+
+# Query tokens shorter than this are never matched with typos
+MIN_TYPO_LENGTH = 4
+
+
+def tokenize(name: str) -> Set[str]:
+    """Return the lower-cased search tokens of a class name
+
+    Both the underscore/punctuation separated words ("m4a1") and their
+    camelCase / letter-digit parts ("m", "4", "a", "1", "ammo", "box") are
+    included, so queries can hit either granularity.
+    """
+    tokens = set()
+    for word in WORD_PATTERN.findall(name):
+        tokens.add(word.lower())
+        for part in TOKEN_PATTERN.findall(word):
+            tokens.add(part.lower())
+    return tokens
+
+
+def deletes(token: str) -> Set[str]:
+    """Return every string obtained by deleting one character from token"""
+    return {token[:i] + token[i + 1:] for i in range(len(token))}
+
+
+def within_one_edit(a: str, b: str) -> bool:
+    """True if a and b differ by one insertion, deletion, substitution or adjacent swap"""
+    if a == b:
+        return True
+    la, lb = len(a), len(b)
+    if abs(la - lb) > 1:
+        return False
+    if la == lb:
+        diffs = [i for i in range(la) if a[i] != b[i]]
+        if len(diffs) == 1:
+            return True
+        return (len(diffs) == 2 and diffs[1] == diffs[0] + 1
+                and a[diffs[0]] == b[diffs[1]] and a[diffs[1]] == b[diffs[0]])
+    if la > lb:
+        a, b = b, a
+    # b is one character longer than a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    return a[i:] == b[i + 1:]
+
+
+class FuzzyIndex:
+    """Token index for ranked, typo-tolerant class name search
+
+    Each name is split into tokens (see tokenize). The index keeps
+    token -> name ids postings, a sorted vocabulary for prefix lookups and a
+    one-deletion neighbourhood of every token for typo lookups, so a query
+    never has to touch names that share no token with it.
+
+    Every query token must match some token of a name, scored as exact >
+    prefix > one typo. Whole-name exact and prefix matches are ranked above
+    everything else; ties go to the shorter name.
+    """
+
+    def __init__(self, names: Iterable[str] = ()):
+        # Updated on a worker while the Tk thread searches; held for both
+        self._lock = threading.RLock()
+        self.clear()
+        self.add_names(names)
+
+    def clear(self):
+        self._names: List[Optional[str]] = []
+        self._ids: Dict[str, int] = {}
+        self._postings: Dict[str, Set[int]] = {}
+        self._vocabulary: List[str] = []  # Sorted tokens with at least one posting
+        self._deletes: Dict[str, Set[str]] = {}  # one-deletion variant -> tokens
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def add_names(self, names: Iterable[str]):
+        with self._lock:
+            postings = self._postings
+            new_tokens = []
+            for name in names:
+                if name in self._ids:
+                    continue
+                name_id = len(self._names)
+                self._ids[name] = name_id
+                self._names.append(name)
+                for token in tokenize(name):
+                    posting = postings.get(token)
+                    if posting is None:
+                        posting = postings[token] = set()
+                        new_tokens.append(token)
+                    posting.add(name_id)
+
+            if new_tokens:
+                # One sort per batch; timsort merges the already sorted run cheaply
+                self._vocabulary.extend(new_tokens)
+                self._vocabulary.sort()
+                typo_deletes = self._deletes
+                for token in new_tokens:
+                    if len(token) >= MIN_TYPO_LENGTH - 1:
+                        for variant in deletes(token):
+                            tokens = typo_deletes.get(variant)
+                            if tokens is None:
+                                typo_deletes[variant] = {token}
+                            else:
+                                tokens.add(token)
+
+    def remove_names(self, names: Iterable[str]):
+        with self._lock:
+            for name in names:
+                name_id = self._ids.pop(name, None)
+                if name_id is None:
+                    continue
+                self._names[name_id] = None
+                for token in tokenize(name):
+                    posting = self._postings.get(token)
+                    if posting is None:
+                        continue
+                    posting.discard(name_id)
+                    if not posting:
+                        del self._postings[token]
+                        index = bisect_left(self._vocabulary, token)
+                        if index < len(self._vocabulary) and self._vocabulary[index] == token:
+                            del self._vocabulary[index]
+                        for variant in deletes(token):
+                            tokens = self._deletes.get(variant)
+                            if tokens is not None:
+                                tokens.discard(token)
+                                if not tokens:
+                                    del self._deletes[variant]
+
+    def _token_scores(self, query_token: str) -> Dict[int, float]:
+        """Best score per name id for a single query token"""
+        scores: Dict[int, float] = {}
+
+        def credit(token, score):
+            for name_id in self._postings.get(token, ()):
+                if scores.get(name_id, 0.0) < score:
+                    scores[name_id] = score
+
+        # Prefix matches (this includes the exact token)
+        vocabulary = self._vocabulary
+        index = bisect_left(vocabulary, query_token)
+        while index < len(vocabulary) and vocabulary[index].startswith(query_token):
+            token = vocabulary[index]
+            credit(token, SCORE_EXACT if token == query_token else SCORE_PREFIX)
+            index += 1
+
+        if len(query_token) >= MIN_TYPO_LENGTH:
+            candidates = set(self._deletes.get(query_token, ()))
+            for variant in deletes(query_token):
+                if variant in self._postings:
+                    candidates.add(variant)
+                candidates.update(self._deletes.get(variant, ()))
+            for token in candidates:
+                if token != query_token and within_one_edit(token, query_token):
+                    credit(token, SCORE_TYPO)
+        return scores
+
+    def search(self, query: str, allowed: Container[str] = None, limit: int = None) -> List[str]:
+        """Return names matching every token of query, best first"""
+        with self._lock:
+            query_tokens = sorted({word.lower() for word in WORD_PATTERN.findall(query)}, key=len, reverse=True)
+            if not query_tokens:
+                return []
+
+            combined: Optional[Dict[int, float]] = None
+            for query_token in query_tokens:
+                scores = self._token_scores(query_token)
+                if combined is None:
+                    combined = scores
+                else:
+                    combined = {name_id: total + scores[name_id]
+                                for name_id, total in combined.items() if name_id in scores}
+                if not combined:
+                    return []
+
+            names = self._names
+            compact_query = "".join(WORD_PATTERN.findall(query)).lower()
+            ranked = []
+            for name_id, score in combined.items():
+                name = names[name_id]
+                if allowed is not None and name not in allowed:
+                    continue
+                compact_name = "".join(WORD_PATTERN.findall(name)).lower()
+                if compact_name == compact_query:
+                    score += 100.0
+                elif compact_name.startswith(compact_query):
+                    score += 50.0
+                ranked.append((-score, len(name), name))
+            ranked.sort()
+            if limit is not None:
+                ranked = ranked[:limit]
+            return [name for _, _, name in ranked]
+
+
+class IncrementalFilter:
+    """Case-insensitive substring filter that narrows its previous result
+
+    Lower-cased names are computed once when the name list is set. While the
+    user keeps typing, each new query contains the previous one, so only the
+    previous matches need to be re-checked instead of the whole list. Fresh
+    queries of GRAM_SIZE characters or more are answered from a TrigramIndex
+    when one is supplied (it may cover a superset of names).
+    """
+
+    def __init__(self, names: Sequence[str] = (), index: TrigramIndex = None):
+        self.set_names(names, index)
+
+    def set_names(self, names: Sequence[str], index: TrigramIndex = None):
+        """Replace the searchable names (call once per load)"""
+        self.names = list(names)
+        self.lowered = [name.lower() for name in self.names]
+        self.index = index
+        self._positions = None  # name -> position, built on first indexed query
+        self._last_query = ""
+        self._last_indices = None  # None means "all names"
+
+    def filter_indices(self, query: str) -> List[int]:
+        """Return indices into names whose lower-cased text contains query"""
+        query = query.strip().lower()
+        if not query:
+            self._last_query = ""
+            self._last_indices = None
+            return list(range(len(self.names)))
+
+        lowered = self.lowered
+        if self._last_indices is not None and self._last_query in query:
+            # Every match for the new query also matched the old one
+            indices = [i for i in self._last_indices if query in lowered[i]]
+        elif self.index is not None and len(query) >= GRAM_SIZE:
+            if self._positions is None:
+                self._positions = {name: i for i, name in enumerate(self.names)}
+            positions = self._positions
+            indices = sorted(positions[name] for name in self.index.search(query) if name in positions)
+        else:
+            indices = [i for i, name in enumerate(lowered) if query in name]
+
+        self._last_query = query
+        self._last_indices = indices
+        return indices
+
+    def fuzzy_filter(self, query: str, fuzzy_index: FuzzyIndex) -> List[str]:
+        """Return ranked fuzzy matches for query, restricted to this filter's names"""
+        if not query.strip():
+            return self.filter("")
+        if self._positions is None:
+            self._positions = {name: i for i, name in enumerate(self.names)}
+        return fuzzy_index.search(query, allowed=self._positions)
+
+    def filter(self, query: str) -> List[str]:
+        """Return names containing query (case-insensitive), in their original order"""
+        if not query.strip():
+            self.filter_indices("")
+            return self.names
+        names = self.names
+        return [names[i] for i in self.filter_indices(query)]
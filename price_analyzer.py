@@ -0,0 +1,248 @@
+"""Price consistency checks across every market file of a project.
+
+Every item is one row of a set of columns; each Variant of an item becomes
+a row as well, priced like its parent, because that is what Expansion
+charges for it. With all rows laid out together (NumPy arrays when NumPy is
+available, plain lists otherwise) the whole project is analyzed in one
+pass of grouped reductions by lower-cased ClassName:
+
+* price-range - MinPriceThreshold above MaxPriceThreshold.
+* sell-above-buy - the lowest price a ClassName can be sold for somewhere
+  is above the highest price it can be bought for somewhere else, so
+  buying and selling always makes money.
+* arbitrage - selling at one listing's best price beats buying at another
+  listing's best price; profitable at some stock levels.
+* variant-price - a variant also listed on its own at other prices than
+  its parent item.
+
+A listing's buy price moves between MinPriceThreshold (stock full) and
+MaxPriceThreshold (stock low); it sells for SellPricePercent of that.
+SellPricePercent below zero means the market default (default_sell_percent);
+values above 1 are read as a percentage and values up to 1 as a fraction.
+"""
+import csv
+import json
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from market_model import MarketDocument
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; the pure-Python path gives the same results
+    np = None
+
+FINDING_PRICE_RANGE = "price-range"
+FINDING_SELL_ABOVE_BUY = "sell-above-buy"
+FINDING_ARBITRAGE = "arbitrage"
+FINDING_VARIANT_PRICE = "variant-price"
+
+FINDING_LABELS = {
+    FINDING_PRICE_RANGE: "MinPriceThreshold above MaxPriceThreshold",
+    FINDING_SELL_ABOVE_BUY: "Always sells for more than it costs elsewhere",
+    FINDING_ARBITRAGE: "Can sell for more than it costs elsewhere",
+    FINDING_VARIANT_PRICE: "Variant priced differently from its parent",
+}
+
+# Expansion's market-wide SellPricePercent, used for items that set it to -1
+DEFAULT_SELL_PERCENT = 75.0
+
+EXPORT_FIELDS = ["kind", "class_name", "file", "position", "other_file", "other_position", "amount", "message"]
+
+
+class Finding(NamedTuple):
+    """One price problem; other_* is the listing it conflicts with, if any"""
+    kind: str  # One of the FINDING_* constants
+    class_name: str
+    file: str
+    position: int  # Item index in file (the parent item for a variant)
+    other_file: Optional[str]
+    other_position: Optional[int]
+    amount: float  # Price difference (profit per unit for arbitrage findings)
+    message: str
+
+
+def sell_fraction(value: float, default_percent: float = DEFAULT_SELL_PERCENT) -> float:
+    """Fraction of the buy price an item sells for, given its SellPricePercent"""
+    if value < 0:
+        value = default_percent
+    return value / 100.0 if value > 1 else value
+
+
+class PriceColumns:
+    """Every listing of every document as one column per value"""
+
+    def __init__(self, documents: Sequence[Tuple[str, MarketDocument]],
+                 default_sell_percent: float = DEFAULT_SELL_PERCENT):
+        self.files: List[str] = []  # Per row
+        self.positions: List[int] = []
+        self.class_names: List[str] = []
+        self.parents: List[Optional[str]] = []  # Parent ClassName for variant rows
+        min_prices = []
+        max_prices = []
+        fractions = []
+        for file_name, document in documents:
+            for position, item in enumerate(document.items):
+                if not item.class_name:
+                    continue
+                fraction = sell_fraction(item.sell_price_percent, default_sell_percent)
+                for class_name, parent in [(item.class_name, None)] + [(variant, item.class_name)
+                                                                       for variant in item.variants]:
+                    self.files.append(file_name)
+                    self.positions.append(position)
+                    self.class_names.append(class_name)
+                    self.parents.append(parent)
+                    min_prices.append(item.min_price_threshold)
+                    max_prices.append(item.max_price_threshold)
+                    fractions.append(fraction)
+        self.size = len(self.files)
+        # Rows of one ClassName share a group code
+        codes: Dict[str, int] = {}
+        self.codes = self._column([codes.setdefault(name.lower(), len(codes)) for name in self.class_names], int)
+        self.groups = len(codes)
+        self.min_prices = self._column(min_prices)
+        self.max_prices = self._column(max_prices)
+        self.fractions = self._column(fractions)
+        self.standalone = self._column([parent is None for parent in self.parents], bool)
+
+    def _column(self, values: list, kind=float):
+        if np is not None:
+            return np.array(values, dtype={float: np.float64, int: np.int64, bool: bool}[kind])
+        return [kind(value) for value in values]
+
+
+def _group_best(columns: PriceColumns, values, lowest: bool, rows=None) -> Dict[int, int]:
+    """Row with the lowest (or highest) value in each group, among rows (all by default)
+
+    Ties go to the earliest row.
+    """
+    if np is not None:
+        candidates = np.arange(columns.size) if rows is None else np.asarray(rows, dtype=np.int64)
+        if not len(candidates):
+            return {}
+        keys = values[candidates] if lowest else -values[candidates]
+        order = candidates[np.lexsort((candidates, keys, columns.codes[candidates]))]
+        groups, starts = np.unique(columns.codes[order], return_index=True)
+        return dict(zip(groups.tolist(), order[starts].tolist()))
+    best: Dict[int, int] = {}
+    for row in (range(columns.size) if rows is None else rows):
+        group = columns.codes[row]
+        current = best.get(group)
+        if current is None or (values[row] < values[current] if lowest else values[row] > values[current]):
+            best[group] = row
+    return best
+
+
+def _column_product(a, b):
+    if np is not None:
+        return a * b
+    return [x * y for x, y in zip(a, b)]
+
+
+def _price(value) -> str:
+    return f"{float(value):.2f}".rstrip("0").rstrip(".")
+
+
+def _finding(columns: PriceColumns, kind: str, row: int, other: Optional[int], amount: float,
+             message: str) -> Finding:
+    return Finding(kind, columns.class_names[row], columns.files[row], columns.positions[row],
+                   columns.files[other] if other is not None else None,
+                   columns.positions[other] if other is not None else None,
+                   round(float(amount), 2), message)
+
+
+def _where(columns: PriceColumns, row: int) -> str:
+    parent = columns.parents[row]
+    via = f" (variant of {parent})" if parent else ""
+    return f"{columns.files[row]} [{columns.positions[row]}]{via}"
+
+
+def analyze(documents: Sequence[Tuple[str, MarketDocument]],
+            default_sell_percent: float = DEFAULT_SELL_PERCENT) -> List[Finding]:
+    """Every price finding for (file name, document) pairs, grouped by kind"""
+    columns = PriceColumns(documents, default_sell_percent)
+    if not columns.size:
+        return []
+    findings = []
+
+    # MinPriceThreshold above MaxPriceThreshold, once per item rather than per variant row
+    if np is not None:
+        inverted = np.nonzero(columns.standalone & (columns.min_prices > columns.max_prices))[0].tolist()
+    else:
+        inverted = [row for row in range(columns.size)
+                    if columns.standalone[row] and columns.min_prices[row] > columns.max_prices[row]]
+    for row in inverted:
+        findings.append(_finding(columns, FINDING_PRICE_RANGE, row, None,
+                                 columns.min_prices[row] - columns.max_prices[row],
+                                 f"MinPriceThreshold {_price(columns.min_prices[row])} is above "
+                                 f"MaxPriceThreshold {_price(columns.max_prices[row])}"))
+
+    # Buy/sell across listings: worst case (always profitable) and best case (sometimes)
+    lowest_sell = _column_product(columns.min_prices, columns.fractions)
+    highest_sell = _column_product(columns.max_prices, columns.fractions)
+    cheapest_worst = _group_best(columns, columns.max_prices, lowest=True)
+    best_worst_sell = _group_best(columns, lowest_sell, lowest=False)
+    cheapest_best = _group_best(columns, columns.min_prices, lowest=True)
+    best_best_sell = _group_best(columns, highest_sell, lowest=False)
+    for group, buy_row in cheapest_worst.items():
+        sell_row = best_worst_sell[group]
+        profit = lowest_sell[sell_row] - columns.max_prices[buy_row]
+        if sell_row != buy_row and profit > 0:
+            findings.append(_finding(columns, FINDING_SELL_ABOVE_BUY, sell_row, buy_row, profit,
+                                     f"sells for at least {_price(lowest_sell[sell_row])} in {_where(columns, sell_row)}, "
+                                     f"costs at most {_price(columns.max_prices[buy_row])} in {_where(columns, buy_row)}"))
+            continue
+        buy_row = cheapest_best[group]
+        sell_row = best_best_sell[group]
+        profit = highest_sell[sell_row] - columns.min_prices[buy_row]
+        if sell_row != buy_row and columns.files[sell_row] != columns.files[buy_row] and profit > 0:
+            findings.append(_finding(columns, FINDING_ARBITRAGE, sell_row, buy_row, profit,
+                                     f"sells for up to {_price(highest_sell[sell_row])} in {_where(columns, sell_row)}, "
+                                     f"costs from {_price(columns.min_prices[buy_row])} in {_where(columns, buy_row)}"))
+
+    # Variants that are also listed on their own, against the first such listing
+    if np is not None:
+        standalone_rows = np.nonzero(columns.standalone)[0]
+        variant_rows = np.nonzero(~columns.standalone)[0].tolist()
+    else:
+        standalone_rows = [row for row in range(columns.size) if columns.standalone[row]]
+        variant_rows = [row for row in range(columns.size) if not columns.standalone[row]]
+    first_listing = _group_best(columns, columns.codes, lowest=True, rows=standalone_rows)
+    for row in variant_rows:
+        own = first_listing.get(int(columns.codes[row]))
+        if own is None:
+            continue
+        if (columns.min_prices[row], columns.max_prices[row]) != (columns.min_prices[own], columns.max_prices[own]):
+            findings.append(_finding(columns, FINDING_VARIANT_PRICE, own, row,
+                                     columns.max_prices[own] - columns.max_prices[row],
+                                     f"listed at {_price(columns.min_prices[own])}-{_price(columns.max_prices[own])}, but at "
+                                     f"{_price(columns.min_prices[row])}-{_price(columns.max_prices[row])} "
+                                     f"in {_where(columns, row)}"))
+
+    order = {kind: index for index, kind in enumerate(FINDING_LABELS)}
+    findings.sort(key=lambda finding: (order[finding.kind], finding.file, finding.position, finding.class_name))
+    return findings
+
+
+def format_finding(finding: Finding) -> str:
+    return f"{finding.kind}: {finding.class_name}: {finding.message}"
+
+
+def summarize(findings: Sequence[Finding]) -> str:
+    if not findings:
+        return "No price problems found"
+    counts = {kind: 0 for kind in FINDING_LABELS}
+    for finding in findings:
+        counts[finding.kind] += 1
+    return ", ".join(f"{count} {kind}" for kind, count in counts.items() if count)
+
+
+def write_findings(findings: Sequence[Finding], file_path: str):
+    """Write findings to a .csv or .json file"""
+    if file_path.lower().endswith(".csv"):
+        with open(file_path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=EXPORT_FIELDS)
+            writer.writeheader()
+            writer.writerows(finding._asdict() for finding in findings)
+    else:
+        with open(file_path, 'w', encoding='utf-8') as f:
+            json.dump([finding._asdict() for finding in findings], f, indent=4, ensure_ascii=False)
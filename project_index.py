@@ -0,0 +1,204 @@
+"""Project-wide index of every ClassName used in the Market folder.
+
+Maps a class name to the market files (and item positions) that list it,
+either as an item's own ClassName or inside an item's Variants or
+SpawnAttachments, so "which file already sells this?" is a dict lookup
+instead of opening every market file. The index is owned by the Tk thread:
+market files are scanned on workers (scan_market_files) and the results are
+merged with apply_scans; edits in the Market Editor replace a single file's
+entries with update_file.
+"""
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from market_model import MarketDocument
+from types_catalog import PARALLEL_MIN_FILES, ProgressCallback
+
+# Where a class name appears inside a market item
+ROLE_ITEM = "item"
+ROLE_VARIANT = "variant"
+ROLE_ATTACHMENT = "attachment"
+
+# (class name, item position, role) as produced by market_references
+Reference = Tuple[str, int, str]
+
+
+class ClassRef(NamedTuple):
+    """One occurrence of a class name in a market file"""
+    file: str  # Market file name inside the Market folder
+    position: int  # Index of the owning item in "Items"
+    role: str  # ROLE_ITEM, ROLE_VARIANT or ROLE_ATTACHMENT
+
+
+def market_references(data: Dict[str, Any]) -> List[Reference]:
+    """Return every class name reference in a loaded market file"""
+    references: List[Reference] = []
+    items = data.get("Items") if isinstance(data, dict) else None
+    if not isinstance(items, list):
+        return references
+    for position, item in enumerate(items):
+        if not isinstance(item, dict):
+            continue
+        class_name = item.get("ClassName")
+        if class_name:
+            references.append((class_name, position, ROLE_ITEM))
+        for variant in item.get("Variants") or ():
+            if isinstance(variant, str) and variant:
+                references.append((variant, position, ROLE_VARIANT))
+        for attachment in item.get("SpawnAttachments") or ():
+            if isinstance(attachment, str) and attachment:
+                references.append((attachment, position, ROLE_ATTACHMENT))
+    return references
+
+
+def document_references(document: MarketDocument) -> List[Reference]:
+    """Return every class name reference in a MarketDocument (same order as market_references)"""
+    references: List[Reference] = []
+    for position, item in enumerate(document.items):
+        if item.class_name:
+            references.append((item.class_name, position, ROLE_ITEM))
+        references.extend((variant, position, ROLE_VARIANT) for variant in item.variants if variant)
+        references.extend((attachment, position, ROLE_ATTACHMENT) for attachment in item.spawn_attachments
+                          if attachment)
+    return references
+
+
+def scan_market_file(file_path: str) -> List[Reference]:
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return market_references(json.load(f))
+
+
+def _scan_in_worker(file_path: str) -> Tuple[str, List[Reference]]:
+    # Module-level so it can be pickled into pool worker processes
+    return file_path, scan_market_file(file_path)
+
+
+def scan_market_files(file_paths: List[str], max_workers: int = None,
+                      progress: ProgressCallback = None) -> Dict[str, Optional[List[Reference]]]:
+    """Scan several market files, using a process pool when it pays off
+
+    Returns {file path: references}; files that could not be read map to
+    None. progress is called in the calling thread as each file completes.
+    """
+    results: Dict[str, Optional[List[Reference]]] = {path: None for path in file_paths}
+    total = len(file_paths)
+    if max_workers is None:
+        max_workers = min(total, os.cpu_count() or 1)
+
+    if total >= PARALLEL_MIN_FILES and max_workers > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                futures = {executor.submit(_scan_in_worker, path): path for path in file_paths}
+                for done, future in enumerate(as_completed(futures), 1):
+                    path = futures[future]
+                    try:
+                        results[path] = future.result()[1]
+                    except Exception:
+                        pass  # Skip files that can't be read
+                    if progress:
+                        progress(done, total, os.path.basename(path))
+            return results
+        except (OSError, RuntimeError, ImportError):
+            pass  # No process support here - go serial
+
+    for done, path in enumerate(file_paths, 1):
+        try:
+            results[path] = scan_market_file(path)
+        except Exception:
+            pass  # Skip files that can't be read
+        if progress:
+            progress(done, total, os.path.basename(path))
+    return results
+
+
+class ProjectIndex:
+    """ClassName -> market file occurrences for one Market folder"""
+
+    def __init__(self, folder: str = None):
+        self.reset(folder)
+
+    def reset(self, folder: str = None):
+        """Forget everything and start indexing folder"""
+        self.folder = folder
+        self._by_name: Dict[str, Dict[str, List[Tuple[int, str]]]] = {}
+        self._names_by_file: Dict[str, List[str]] = {}
+        self._stats: Dict[str, Tuple[int, int]] = {}  # file name -> (size, mtime_ns) when scanned
+
+    def __contains__(self, class_name: str) -> bool:
+        return class_name in self._by_name
+
+    def __len__(self) -> int:
+        return len(self._by_name)
+
+    @property
+    def files(self) -> List[str]:
+        return sorted(self._names_by_file)
+
+    def stale_files(self, stats: Dict[str, Tuple[int, int]]) -> List[str]:
+        """Return the file names in stats (name -> (size, mtime_ns)) not indexed at that state"""
+        return sorted(name for name, stat in stats.items() if self._stats.get(name) != stat)
+
+    def retain(self, file_names: Iterable[str]):
+        """Drop every file that is not in file_names"""
+        keep = set(file_names)
+        for file_name in [name for name in self._names_by_file if name not in keep]:
+            self.remove_file(file_name)
+
+    def remove_file(self, file_name: str):
+        for class_name in self._names_by_file.pop(file_name, ()):
+            files = self._by_name.get(class_name)
+            if files is not None:
+                files.pop(file_name, None)
+                if not files:
+                    del self._by_name[class_name]
+        self._stats.pop(file_name, None)
+
+    def set_references(self, file_name: str, references: Iterable[Reference], stat: Tuple[int, int] = None):
+        """Replace the entries of one file"""
+        previous_stat = self._stats.get(file_name)
+        self.remove_file(file_name)
+        by_name = self._by_name
+        names = []
+        for class_name, position, role in references:
+            files = by_name.get(class_name)
+            if files is None:
+                files = by_name[class_name] = {}
+            occurrences = files.get(file_name)
+            if occurrences is None:
+                occurrences = files[file_name] = []
+                names.append(class_name)
+            occurrences.append((position, role))
+        self._names_by_file[file_name] = names
+        stat = stat if stat is not None else previous_stat
+        if stat is not None:
+            self._stats[file_name] = stat
+
+    def update_file(self, file_name: str, document: MarketDocument):
+        """Re-index one file from its in-memory document (after an edit or a save)"""
+        self.set_references(file_name, document_references(document))
+
+    def apply_scans(self, scans: Dict[str, Optional[List[Reference]]], stats: Dict[str, Tuple[int, int]]):
+        """Merge scan_market_files results keyed by path; stats is keyed by file name"""
+        for path, references in scans.items():
+            file_name = os.path.basename(path)
+            if references is None:
+                self.remove_file(file_name)  # Unreadable - don't serve stale entries
+            else:
+                self.set_references(file_name, references, stats.get(file_name))
+
+    def lookup(self, class_name: str, role: str = None) -> List[ClassRef]:
+        """Every occurrence of class_name, optionally only in one role"""
+        refs = []
+        for file_name, occurrences in self._by_name.get(class_name, {}).items():
+            for position, occurrence_role in occurrences:
+                if role is None or occurrence_role == role:
+                    refs.append(ClassRef(file_name, position, occurrence_role))
+        refs.sort()
+        return refs
+
+    def files_for(self, class_name: str, role: str = ROLE_ITEM) -> List[str]:
+        """Sorted market file names that list class_name in the given role"""
+        return sorted(file_name for file_name, occurrences in self._by_name.get(class_name, {}).items()
+                      if role is None or any(occurrence_role == role for _, occurrence_role in occurrences))
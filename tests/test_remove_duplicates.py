@@ -0,0 +1,130 @@
+"""Removing duplicates from files that are open in the editors.
+
+These drive the real Tk editors and are skipped without a display.
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from background_jobs import InlineScheduler
+from duplicates import group_by_file
+from trader_core import find_duplicates
+
+try:
+    import tkinter as tk
+    ROOT = tk.Tk()
+    ROOT.withdraw()
+except Exception:  # No display
+    ROOT = None
+
+
+def market_item(class_name, max_price):
+    return {"ClassName": class_name, "MaxPriceThreshold": max_price, "MinPriceThreshold": max_price // 2,
+            "SellPricePercent": -1, "MaxStockThreshold": 100, "MinStockThreshold": 1, "QuantityPercent": -1,
+            "SpawnAttachments": [], "Variants": []}
+
+
+@unittest.skipIf(ROOT is None, "needs a display")
+class RemoveDuplicatesInOpenFilesTest(unittest.TestCase):
+
+    def setUp(self):
+        from dayz_trader_editor import DayZTraderEditor
+        self.folder = tempfile.mkdtemp(prefix="trader-test-")
+        self.market_folder = os.path.join(self.folder, "Market")
+        self.traders_folder = os.path.join(self.folder, "Traders")
+        os.makedirs(self.market_folder)
+        os.makedirs(self.traders_folder)
+        self.market_path = os.path.join(self.market_folder, "Weapons.json")
+        self.trader_path = os.path.join(self.traders_folder, "Trader.json")
+        self.write(self.market_path, {
+            "m_Version": 12, "DisplayName": "Weapons", "Icon": "Deliver", "Color": "FBFCFEFF", "IsExchange": 0,
+            "InitStockPercent": 75.0,
+            "Items": [market_item("AK74", 1000), market_item("AKM", 2000), market_item("AK74", 3000),
+                      market_item("M4A1", 4000), market_item("SKS", 5000)],
+        })
+        self.write(self.trader_path, {"m_Version": 12, "DisplayName": "Trader", "TraderIcon": "Trader",
+                                      "Categories": ["Weapons", "Weapons", "Ammo"], "Items": {}})
+
+        self.app = DayZTraderEditor(ROOT)
+        self.app.jobs.shutdown()
+        self.app.jobs = InlineScheduler(self.app.status_var.set)  # Loads finish before the assertions
+        self.app.market_folder = self.market_folder
+        self.app.traders_folder = self.traders_folder
+        self.app.build_trader_tab()
+
+    def tearDown(self):
+        self.app.folder_watcher.close()
+        for child in ROOT.winfo_children():
+            child.destroy()
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    @staticmethod
+    def write(path, data):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=4)
+
+    @staticmethod
+    def read(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def remove_duplicates(self):
+        # What the dialog does once confirmed, followed by its refresh of the editors
+        for editor in (self.app.current_market_editor, self.app.current_trader_editor):
+            editor.stash_document()
+        duplicates, plan, _ = find_duplicates([self.market_path], [self.trader_path])
+        by_file = group_by_file(duplicates)
+        for path in plan:
+            entry = self.app.documents.get(path)
+            self.app.remove_duplicates_in_document(path, entry.document, by_file[path])
+        self.app.load_market_file()
+        self.app.load_trader_file()
+
+    def test_selected_item_after_a_duplicate_is_kept_intact(self):
+        self.app.market_file_var.set("Weapons.json")
+        self.app.load_market_file(selected_index=3)  # M4A1, after the duplicate AK74 at index 2
+        self.app.trader_file_var.set("Trader.json")
+        self.app.load_trader_file()
+        market_editor = self.app.current_market_editor
+        self.assertEqual(market_editor.current_item_index, 3)
+
+        self.remove_duplicates()
+
+        items = [(item["ClassName"], item["MaxPriceThreshold"]) for item in self.read(self.market_path)["Items"]]
+        self.assertEqual(items, [("AK74", 1000), ("AKM", 2000), ("M4A1", 4000), ("SKS", 5000)])
+        self.assertEqual([(item.class_name, item.max_price_threshold) for item in market_editor.document.items],
+                         items)
+        self.assertEqual(market_editor.current_item_index, 2)
+        self.assertFalse(market_editor.dirty)
+        self.assertFalse(self.app.current_trader_editor.dirty)
+        self.assertEqual(self.app.documents.dirty_paths(), [])
+
+        # Saving again writes what is on disk already
+        self.assertTrue(market_editor.save_file())
+        self.assertTrue(self.app.current_trader_editor.save_file())
+        saved = [(item["ClassName"], item["MaxPriceThreshold"]) for item in self.read(self.market_path)["Items"]]
+        self.assertEqual(saved, items)
+        self.assertEqual(self.read(self.trader_path)["Categories"], ["Weapons", "Ammo"])
+
+    def test_removal_can_be_undone_in_the_editor(self):
+        self.app.market_file_var.set("Weapons.json")
+        self.app.load_market_file(selected_index=4)
+        self.app.trader_file_var.set("Trader.json")
+        self.app.load_trader_file()
+
+        self.remove_duplicates()
+
+        market_editor = self.app.current_market_editor
+        self.assertEqual(market_editor.undo().label, "Remove 1 duplicate(s)")
+        self.assertEqual([item.class_name for item in market_editor.document.items],
+                         ["AK74", "AKM", "AK74", "M4A1", "SKS"])
+        self.assertTrue(market_editor.dirty)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,267 @@
+"""Command line interface for pipelines and headless machines.
+
+    python -m trader_cli [--project FILE | --market DIR --traders DIR --types DIR] COMMAND ...
+
+Commands:
+    validate                         check every market and trader file
+    dedupe [--apply]                 find (and remove) duplicate items and categories
+    add-types MARKET NAME...         add items to a market file (names or --types-file)
+    transform SCRIPT [--apply]       run a batch transform (see batch_transform)
+    prices [--output FILE]           find inconsistent prices and buy/sell arbitrage
+    simulate [--days N]              simulate a month of trading (needs NumPy)
+    export OUTPUT                    write all market items to a .csv or .json table
+    gui                              start the editor window
+
+Without --project, dayz_trader_project.json in the working directory is
+used when present. Commands that change files are dry runs unless --apply
+is given. tkinter is only imported by the gui command, so the rest runs
+without a display. Exit status is 0 on success, 1 when validate finds
+errors or a command fails, and 2 for bad arguments.
+"""
+import argparse
+import json
+import os
+import sys
+from typing import List, Optional
+
+from duplicates import POLICY_KEEP_FIRST, POLICY_KEEP_IN_FILE, POLICY_LABELS, write_report_csv, write_report_json
+from trader_core import (DEFAULT_PROJECT_FILE, Project, add_types_to_market, analyze_market_prices, export_markets,
+                         find_duplicates, remove_duplicates, simulate_markets, transform_markets, validate_project)
+from types_cache import cache_path_for_project
+from types_catalog import get_types_catalog
+from validation import SEVERITY_ERROR, format_issue
+
+
+class CommandError(Exception):
+    """A command could not run; the message is printed without a traceback"""
+
+
+def load_project(args) -> Project:
+    project_file = args.project
+    if project_file is None and os.path.isfile(DEFAULT_PROJECT_FILE):
+        project_file = DEFAULT_PROJECT_FILE
+    project = Project()
+    if project_file:
+        try:
+            project = Project.load(project_file)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Can't load project {project_file}: {e}")
+        get_types_catalog().attach_cache(cache_path_for_project(project_file))
+    # Folders given on the command line override the project file
+    for key in Project.KEYS:
+        value = getattr(args, key)
+        if value:
+            setattr(project, key, value)
+    return project
+
+
+def require_folder(folder: Optional[str], option: str):
+    if not folder or not os.path.isdir(folder):
+        raise CommandError(f"No such folder: {folder}" if folder else f"No folder set (use {option} or --project)")
+
+
+def cmd_validate(args, project: Project) -> int:
+    if not project.market_folder and not project.traders_folder:
+        raise CommandError("No Market or Traders folder set (use --market/--traders or --project)")
+    issues = validate_project(project)
+    errors = sum(1 for issue in issues if issue.severity == SEVERITY_ERROR)
+    if args.json:
+        print(json.dumps([issue._asdict() for issue in issues], indent=4, ensure_ascii=False))
+    else:
+        for issue in issues:
+            print(format_issue(issue))
+        print(f"{errors} error(s), {len(issues) - errors} warning(s)", file=sys.stderr)
+    return 1 if errors else 0
+
+
+def cmd_dedupe(args, project: Project) -> int:
+    if not project.market_folder and not project.traders_folder:
+        raise CommandError("No Market or Traders folder set (use --market/--traders or --project)")
+    if args.policy == POLICY_KEEP_IN_FILE and not args.preferred_file:
+        raise CommandError(f"--policy {POLICY_KEEP_IN_FILE} needs --preferred-file")
+    all_duplicates, plan, report = find_duplicates(project.market_paths(), project.trader_paths(), args.policy,
+                                                   not args.no_cross_file, args.preferred_file)
+    if args.report:
+        if args.report.lower().endswith(".csv"):
+            write_report_csv(report, args.report)
+        else:
+            write_report_json(report, args.report)
+    for error in report["errors"]:
+        print(error, file=sys.stderr)
+    print(f"{report['duplicates_total']} duplicate(s) in {report['files_affected']} file(s) "
+          f"({report['cross_file_total']} listed in another market file)")
+    if not args.apply or not all_duplicates:
+        return 0
+    removed, saved, failures = remove_duplicates(plan)
+    for failure in failures:
+        print(failure, file=sys.stderr)
+    print(f"Removed {removed} duplicate(s) from {saved} file(s)")
+    return 1 if failures else 0
+
+
+def cmd_add_types(args, project: Project) -> int:
+    market_file_path = project.market_path(args.market_file)
+    if not os.path.isfile(market_file_path):
+        raise CommandError(f"No such market file: {market_file_path}")
+    class_names: List[str] = list(args.names)
+    catalog = get_types_catalog()
+    for types_file in args.types_file or ():
+        try:
+            class_names.extend(catalog.class_names(types_file))
+        except OSError as e:
+            raise CommandError(f"Can't read {types_file}: {e}")
+    if not class_names:
+        raise CommandError("No class names given (list them or use --types-file)")
+    added, skipped = add_types_to_market(market_file_path, class_names, save=args.apply)
+    verb = "Added" if args.apply else "Would add"
+    print(f"{verb} {added} item(s) to {os.path.basename(market_file_path)}, skipped {skipped} already listed")
+    return 0
+
+
+def cmd_transform(args, project: Project) -> int:
+    from batch_transform import format_change, summarize
+    require_folder(project.market_folder, "--market")
+    script = args.script
+    if script.startswith("@"):
+        with open(script[1:], 'r', encoding='utf-8') as f:
+            script = f.read()
+    changes, errors = transform_markets(project.market_paths(), script, args.rounding, args.step,
+                                        apply=args.apply)
+    for error in errors:
+        print(f"Skipped {error}", file=sys.stderr)
+    if not args.quiet:
+        for change in changes:
+            print(format_change(change))
+    summary = summarize(changes)
+    if not summary:
+        print("Nothing would change", file=sys.stderr)
+    else:
+        print(f"{'Saved' if args.apply else 'Would change'} {summary}", file=sys.stderr)
+    return 0
+
+
+def cmd_prices(args, project: Project) -> int:
+    from price_analyzer import format_finding, summarize, write_findings
+    require_folder(project.market_folder, "--market")
+    findings, errors = analyze_market_prices(project.market_paths(), args.default_sell_percent)
+    for error in errors:
+        print(f"Skipped {error}", file=sys.stderr)
+    if args.output:
+        write_findings(findings, args.output)
+    elif not args.quiet:
+        for finding in findings:
+            print(format_finding(finding))
+    print(summarize(findings), file=sys.stderr)
+    return 0
+
+
+def cmd_simulate(args, project: Project) -> int:
+    from economy_sim import LoadModel
+    require_folder(project.market_folder, "--market")
+    load = LoadModel(days=args.days, buys_per_day=args.buys_per_day, sells_per_day=args.sells_per_day,
+                     elasticity=args.elasticity, popularity_spread=args.popularity_spread, seed=args.seed)
+    result, errors = simulate_markets(project.market_paths(), load)
+    for error in errors:
+        print(f"Skipped {error}", file=sys.stderr)
+    if args.output:
+        result.write(args.output)
+    for row in result.rows()[:args.top]:
+        if row["DepletedDay"] is None:
+            break
+        print(f"{row['ClassName']} ({row['File']} [{row['Position']}]): out of stock on day {row['DepletedDay']}, "
+              f"price {row['StartPrice']:g} -> {row['EndPrice']:g}")
+    print(result.summary(), file=sys.stderr)
+    return 0
+
+
+def cmd_export(args, project: Project) -> int:
+    require_folder(project.market_folder, "--market")
+    count, errors = export_markets(project.market_paths(), args.output)
+    for error in errors:
+        print(f"Skipped {error}", file=sys.stderr)
+    print(f"Exported {count} item(s) to {args.output}")
+    return 0
+
+
+def cmd_gui(args, project: Project) -> int:
+    # The only command that needs tkinter (and a display)
+    import dayz_trader_editor
+    dayz_trader_editor.main()
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m trader_cli",
+                                     description="DayZ Expansion market and trader file tools")
+    parser.add_argument("--project", help=f"project file (default: {DEFAULT_PROJECT_FILE} if present)")
+    parser.add_argument("--market", dest="market_folder", help="Market folder")
+    parser.add_argument("--traders", dest="traders_folder", help="Traders folder")
+    parser.add_argument("--types", dest="types_folder", help="Types folder")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    validate = commands.add_parser("validate", help="check market and trader files")
+    validate.add_argument("--json", action="store_true", help="print the issues as JSON")
+    validate.set_defaults(run=cmd_validate)
+
+    dedupe = commands.add_parser("dedupe", help="find or remove duplicate items and categories")
+    dedupe.add_argument("--policy", choices=list(POLICY_LABELS), default=POLICY_KEEP_FIRST)
+    dedupe.add_argument("--preferred-file", help=f"market file to keep items in (--policy {POLICY_KEEP_IN_FILE})")
+    dedupe.add_argument("--no-cross-file", action="store_true", help="only duplicates within one file")
+    dedupe.add_argument("--report", help="write the dry-run report to a .json or .csv file")
+    dedupe.add_argument("--apply", action="store_true", help="remove the duplicates")
+    dedupe.set_defaults(run=cmd_dedupe)
+
+    add_types = commands.add_parser("add-types", help="add class names to a market file")
+    add_types.add_argument("market_file", help="market file name or path")
+    add_types.add_argument("names", nargs="*", help="class names to add")
+    add_types.add_argument("--types-file", action="append", help="add every class name of a types XML file")
+    add_types.add_argument("--apply", action="store_true", help="save the market file")
+    add_types.set_defaults(run=cmd_add_types)
+
+    transform = commands.add_parser("transform", help="run a batch transform script")
+    transform.add_argument("script", help="transform statements, or @FILE to read them from a file")
+    transform.add_argument("--rounding", choices=["nearest", "up", "down"], default="nearest")
+    transform.add_argument("--step", type=int, default=1, help="round whole numbers to a multiple of this")
+    transform.add_argument("--apply", action="store_true", help="save the changed files")
+    transform.add_argument("--quiet", action="store_true", help="don't list every change")
+    transform.set_defaults(run=cmd_transform)
+
+    prices = commands.add_parser("prices", help="find inconsistent prices and buy/sell arbitrage")
+    prices.add_argument("--output", help="write the findings to a .json or .csv file instead of listing them")
+    prices.add_argument("--default-sell-percent", type=float,
+                        help="SellPricePercent of items that use the market default (default: 75)")
+    prices.add_argument("--quiet", action="store_true", help="only print the summary")
+    prices.set_defaults(run=cmd_prices)
+
+    simulate = commands.add_parser("simulate", help="simulate player trading to tune stock and price thresholds")
+    simulate.add_argument("--days", type=int, default=30)
+    simulate.add_argument("--buys-per-day", type=float, default=2.0, help="average buys of an item per day")
+    simulate.add_argument("--sells-per-day", type=float, default=1.5, help="average sells of an item per day")
+    simulate.add_argument("--elasticity", type=float, default=1.0, help="how strongly demand reacts to price")
+    simulate.add_argument("--popularity-spread", type=float, default=1.0,
+                          help="spread of per-item popularity (0 = every item equally popular)")
+    simulate.add_argument("--seed", type=int, help="random seed for a repeatable run")
+    simulate.add_argument("--top", type=int, default=20, help="list this many of the first items to run out")
+    simulate.add_argument("--output", help="write the report to a .csv file, or .json with daily curves")
+    simulate.set_defaults(run=cmd_simulate)
+
+    export = commands.add_parser("export", help="write all market items to a table")
+    export.add_argument("output", help="output .csv or .json file")
+    export.set_defaults(run=cmd_export)
+
+    gui = commands.add_parser("gui", help="start the editor window")
+    gui.set_defaults(run=cmd_gui)
+    return parser
+
+
+def main(argv: List[str] = None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        return args.run(args, load_project(args))
+    except (CommandError, OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,211 @@
+"""Project file operations without any UI.
+
+The editor window and the command line (trader_cli) both go through these
+functions, so neither tkinter nor a display is needed to validate, dedupe,
+add types, transform or export a project. Nothing here shows dialogs:
+problems are returned or raised as ordinary exceptions.
+"""
+import csv
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from duplicates import (POLICY_KEEP_FIRST, build_removal_plan, build_report, find_market_duplicates,
+                        find_trader_duplicates, remove_duplicates_in_files, scan_files)
+from market_model import MarketDocument, MarketItem
+from types_catalog import ProgressCallback, get_types_catalog
+from validation import Issue, ProjectValidator, build_validator
+
+# Loaded automatically from the working directory when present
+DEFAULT_PROJECT_FILE = "dayz_trader_project.json"
+
+# Columns of an exported market table, after File
+EXPORT_FIELDS = [field.key for field in MarketItem.FIELDS]
+
+
+class Project:
+    """The Market, Traders and Types folders of one project"""
+
+    KEYS = ("market_folder", "traders_folder", "types_folder")
+
+    def __init__(self, market_folder: str = None, traders_folder: str = None, types_folder: str = None):
+        self.market_folder = market_folder or None
+        self.traders_folder = traders_folder or None
+        self.types_folder = types_folder or None
+
+    @classmethod
+    def load(cls, file_path: str) -> "Project":
+        with open(file_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if not isinstance(data, dict):
+            raise ValueError("project file must contain a JSON object")
+        return cls(*(data.get(key) or None for key in cls.KEYS))
+
+    def save(self, file_path: str):
+        data = {key: getattr(self, key) or "" for key in self.KEYS}
+        with open(file_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=4, ensure_ascii=False)
+
+    @staticmethod
+    def _list(folder: Optional[str], suffix: str) -> List[str]:
+        if not folder or not os.path.isdir(folder):
+            return []
+        return [os.path.join(folder, name) for name in sorted(os.listdir(folder))
+                if name.lower().endswith(suffix) and os.path.isfile(os.path.join(folder, name))]
+
+    def market_paths(self) -> List[str]:
+        return self._list(self.market_folder, ".json")
+
+    def trader_paths(self) -> List[str]:
+        return self._list(self.traders_folder, ".json")
+
+    def types_paths(self) -> List[str]:
+        return self._list(self.types_folder, ".xml")
+
+    def market_path(self, file_name: str) -> str:
+        """Path of a market file given by name (".json" optional) or path"""
+        if os.path.dirname(file_name) or not self.market_folder:
+            return file_name
+        if not file_name.lower().endswith(".json"):
+            file_name += ".json"
+        return os.path.join(self.market_folder, file_name)
+
+
+def known_type_names(types_folder: Optional[str], progress: ProgressCallback = None) -> Optional[set]:
+    """Lower-cased class names of every types file, or None without a types folder"""
+    if not types_folder or not os.path.isdir(types_folder):
+        return None
+    return {name.lower() for name in get_types_catalog().folder_class_names(types_folder, progress=progress)}
+
+
+def build_project_validator(project: Project, progress: ProgressCallback = None) -> ProjectValidator:
+    """Check every market and trader file; the result can then be kept current file by file"""
+    return build_validator(project.market_paths(), project.trader_paths(), known_type_names(project.types_folder),
+                           progress=progress)
+
+
+def validate_project(project: Project, progress: ProgressCallback = None) -> List[Issue]:
+    return build_project_validator(project, progress).issues()
+
+
+def find_duplicates(market_paths: Sequence[str], trader_paths: Sequence[str], policy: str = POLICY_KEEP_FIRST,
+                    cross_file: bool = True, preferred_file: str = None,
+                    progress: ProgressCallback = None) -> Tuple[List[Dict[str, Any]], Dict[str, tuple], Dict[str, Any]]:
+    """Scan for duplicates; returns (duplicates, removal plan, dry-run report)"""
+    markets, traders, errors = scan_files(market_paths, trader_paths, progress=progress)
+    all_duplicates = find_market_duplicates(markets, policy, cross_file, preferred_file)
+    for scanned in traders:
+        all_duplicates.extend(find_trader_duplicates(scanned))
+    plan = build_removal_plan(all_duplicates, markets + traders)
+    report = build_report(all_duplicates, policy, cross_file, preferred_file,
+                          files_scanned=len(markets) + len(traders), errors=errors)
+    return all_duplicates, plan, report
+
+
+def remove_duplicates(plan: Dict[str, tuple], progress: ProgressCallback = None) -> Tuple[int, int, List[str]]:
+    """Apply a removal plan; returns (entries removed, files saved, failures)"""
+    return remove_duplicates_in_files(plan, progress=progress)
+
+
+def new_market_items(document: MarketDocument, class_names: Iterable[str]) -> Tuple[List[MarketItem], int]:
+    """Items for the class names the document doesn't list yet, and how many were skipped"""
+    existing_class_names = set(document.class_names())
+    new_items = []
+    skipped = 0
+    for class_name in class_names:
+        if class_name in existing_class_names:
+            skipped += 1
+            continue
+        new_items.append(MarketItem.new(class_name))
+        existing_class_names.add(class_name)
+    return new_items, skipped
+
+
+def add_types_to_market(market_file_path: str, class_names: Iterable[str], save: bool = True) -> Tuple[int, int]:
+    """Append items for class_names to a market file; returns (added, skipped)"""
+    document = MarketDocument.load(market_file_path)
+    new_items, skipped = new_market_items(document, class_names)
+    if new_items and save:
+        document.items.extend(new_items)
+        document.save(market_file_path)
+    return len(new_items), skipped
+
+
+def transform_markets(market_paths: Sequence[str], script: str, rounding: str = None, step: int = 1,
+                      apply: bool = False, progress: ProgressCallback = None):
+    """Run a batch transform script over market files; returns (changes, errors)
+
+    With apply=False this is a dry run. With apply=True every changed file
+    is saved as one unit (see batch_transform.commit_documents).
+    """
+    # NumPy (if present) is only imported by commands that transform
+    from batch_transform import (ROUND_NEAREST, apply_changes, changed_files, commit_documents, load_documents,
+                                 parse_script, preview)
+    parse_script(script)  # Fail on a bad script before reading any file
+    documents, errors = load_documents(market_paths, progress=progress)
+    named = [(os.path.basename(path), document) for path, (document, _) in documents.items()]
+    changes = preview(named, script, rounding or ROUND_NEAREST, step)
+    if apply and changes:
+        by_name = {os.path.basename(path): path for path in documents}
+        apply_changes(dict(named), changes)
+        targets = {by_name[name]: documents[by_name[name]][0] for name in changed_files(changes)}
+        commit_documents(targets, {path: documents[path][1] for path in targets})
+    return changes, errors
+
+
+def analyze_market_prices(market_paths: Sequence[str], default_sell_percent: float = None,
+                          progress: ProgressCallback = None):
+    """Price consistency findings across market files; returns (findings, errors)"""
+    # NumPy (if present) is only imported by commands that analyze
+    from batch_transform import load_documents
+    from price_analyzer import DEFAULT_SELL_PERCENT, analyze
+    documents, errors = load_documents(market_paths, progress=progress)
+    named = [(os.path.basename(path), document) for path, (document, _) in documents.items()]
+    return analyze(named, DEFAULT_SELL_PERCENT if default_sell_percent is None else default_sell_percent), errors
+
+
+def simulate_markets(market_paths: Sequence[str], load=None, progress: ProgressCallback = None):
+    """Simulate player trading on every item of the market files; returns (result, errors)
+
+    load is an economy_sim.LoadModel (its defaults if None).
+    """
+    from batch_transform import load_documents
+    from economy_sim import LoadModel, simulate
+    documents, errors = load_documents(market_paths)
+    named = [(os.path.basename(path), document) for path, (document, _) in documents.items()]
+    return simulate(named, load or LoadModel(), progress=progress), errors
+
+
+def market_rows(market_paths: Sequence[str]) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """One row per market item across files; returns (rows, errors)"""
+    rows = []
+    errors = []
+    for path in market_paths:
+        file_name = os.path.basename(path)
+        try:
+            document = MarketDocument.load(path)
+        except Exception as e:
+            errors.append(f"{file_name}: {e}")
+            continue
+        for item in document.items:
+            row = {"File": file_name}
+            for key in EXPORT_FIELDS:
+                row[key] = item.get(key)
+            rows.append(row)
+    return rows, errors
+
+
+def export_markets(market_paths: Sequence[str], output_path: str) -> Tuple[int, List[str]]:
+    """Write every market item to a .csv or .json table; returns (rows written, errors)"""
+    rows, errors = market_rows(market_paths)
+    if output_path.lower().endswith(".csv"):
+        with open(output_path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=["File"] + EXPORT_FIELDS)
+            writer.writeheader()
+            for row in rows:
+                writer.writerow({key: ";".join(value) if isinstance(value, list) else value
+                                 for key, value in row.items()})
+    else:
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, indent=4, ensure_ascii=False)
+    return len(rows), errors
@@ -0,0 +1,156 @@
+"""Persistent on-disk cache of parsed types XML files.
+
+The cache lives next to the project file as a small SQLite database. Each
+row is keyed by the absolute file path and validated against the file's
+size, mtime and content hash, so opening a project whose types files have
+not changed costs a cache read instead of an XML parse.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from typing import Dict, Any, Optional, Iterable
+
+# Bump whenever the payload layout or the parser output changes
+CACHE_FORMAT_VERSION = 1
+
+CACHE_SUFFIX = ".typescache.sqlite"
+
+
+def cache_path_for_project(project_file_path: str) -> str:
+    """Return the cache database path that belongs to a project file"""
+    base, _ = os.path.splitext(os.path.abspath(project_file_path))
+    return base + CACHE_SUFFIX
+
+
+def hash_file(file_path: str) -> str:
+    """Return a hex content hash of file_path, read in chunks"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def encode_types(types: Dict[str, Dict[str, Any]]) -> bytes:
+    return zlib.compress(json.dumps(types, separators=(',', ':'), ensure_ascii=False).encode('utf-8'))
+
+
+def decode_types(payload: bytes) -> Dict[str, Dict[str, Any]]:
+    return json.loads(zlib.decompress(payload).decode('utf-8'))
+
+
+class TypesIndexCache:
+    """SQLite-backed store of {class name: attributes} per types file
+
+    Safe to share between threads. Once closed, loads miss and stores are
+    dropped, so a worker still holding a replaced cache finishes normally.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._ensure_schema()
+
+    def _ensure_schema(self):
+        with self._lock:
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+            if version != CACHE_FORMAT_VERSION:
+                # Unknown or outdated layout - start over rather than migrate
+                self._conn.execute("DROP TABLE IF EXISTS types_files")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS types_files ("
+                " path TEXT PRIMARY KEY,"
+                " size INTEGER NOT NULL,"
+                " mtime_ns INTEGER NOT NULL,"
+                " content_hash TEXT NOT NULL,"
+                " payload BLOB NOT NULL)"
+            )
+            self._conn.execute(f"PRAGMA user_version = {CACHE_FORMAT_VERSION}")
+            self._conn.commit()
+
+    @staticmethod
+    def _key(file_path: str) -> str:
+        return os.path.normcase(os.path.abspath(file_path))
+
+    def load(self, file_path: str, stat_result: os.stat_result) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Return cached types for file_path, or None if missing or stale
+
+        A size/mtime match is trusted outright. If only the mtime moved (file
+        touched or copied) the content hash decides, and a match refreshes the
+        stored mtime so the next open skips hashing again.
+        """
+        key = self._key(file_path)
+        with self._lock:
+            if self._conn is None:
+                return None
+            row = self._conn.execute(
+                "SELECT size, mtime_ns, content_hash, payload FROM types_files WHERE path = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+
+        size, mtime_ns, content_hash, payload = row
+        if size != stat_result.st_size:
+            return None
+        if mtime_ns != stat_result.st_mtime_ns:
+            try:
+                if hash_file(file_path) != content_hash:
+                    return None
+            except OSError:
+                return None
+            with self._lock:
+                if self._conn is not None:
+                    self._conn.execute("UPDATE types_files SET mtime_ns = ? WHERE path = ?",
+                                       (stat_result.st_mtime_ns, key))
+                    self._conn.commit()
+
+        try:
+            return decode_types(payload)
+        except (zlib.error, ValueError):
+            return None
+
+    def store(self, file_path: str, stat_result: os.stat_result, types: Dict[str, Dict[str, Any]]):
+        """Save the parsed types of file_path, read when it had stat_result
+
+        Skipped when the file changed since then, so the hash stored always
+        belongs to the content that was parsed.
+        """
+        try:
+            content_hash = hash_file(file_path)
+            current = os.stat(file_path)
+        except OSError:
+            return
+        if (current.st_size, current.st_mtime_ns) != (stat_result.st_size, stat_result.st_mtime_ns):
+            return
+        with self._lock:
+            if self._conn is None:
+                return
+            self._conn.execute(
+                "INSERT OR REPLACE INTO types_files (path, size, mtime_ns, content_hash, payload) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (self._key(file_path), stat_result.st_size, stat_result.st_mtime_ns,
+                 content_hash, encode_types(types))
+            )
+            self._conn.commit()
+
+    def evict_missing(self, keep_paths: Iterable[str] = ()):
+        """Drop rows whose file no longer exists on disk"""
+        keep = {self._key(p) for p in keep_paths}
+        with self._lock:
+            if self._conn is None:
+                return
+            paths = [row[0] for row in self._conn.execute("SELECT path FROM types_files")]
+            stale = [(p,) for p in paths if p not in keep and not os.path.isfile(p)]
+            if stale:
+                self._conn.executemany("DELETE FROM types_files WHERE path = ?", stale)
+                self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,435 @@
+"""Shared in-process catalog of DayZ types XML files.
+
+Every types XML file is parsed at most once per (size, mtime) pair. The
+catalog keeps a per-file list of class names plus a project-wide
+name -> (file, attributes) index that the Types Viewer and the Market
+Editor "Replace" dialog both query.
+"""
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+import xml.etree.ElementTree as ET
+from typing import Dict, List, Any, Optional, Tuple, Iterator, NamedTuple, Callable, Union
+
+from types_cache import TypesIndexCache
+from name_search import TrigramIndex, FuzzyIndex
+
+
+TYPE_NAME_PATTERN = re.compile(r'<type\s+name="([^"]+)"')
+
+# Chunk size used by the streaming regex fallback
+REGEX_CHUNK_SIZE = 1 << 20
+
+# Below this many stale files a process pool costs more than it saves
+PARALLEL_MIN_FILES = 4
+
+# progress(files_done, files_total, file_name)
+ProgressCallback = Callable[[int, int, Optional[str]], None]
+
+
+class TypeRecord(NamedTuple):
+    """One <type> entry read from a types XML file"""
+    name: str
+    attributes: Dict[str, Any]
+
+
+class TypesFileEntry:
+    """Parsed contents of a single types XML file"""
+
+    __slots__ = ("path", "size", "mtime_ns", "class_names", "types")
+
+    def __init__(self, path: str, size: int, mtime_ns: int,
+                 class_names: List[str], types: Dict[str, Dict[str, Any]]):
+        self.path = path
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.class_names = class_names  # Sorted, unique
+        self.types = types  # class name -> attributes
+
+    def is_current(self, stat_result: os.stat_result) -> bool:
+        return self.size == stat_result.st_size and self.mtime_ns == stat_result.st_mtime_ns
+
+
+def extract_type_attributes(elem: ET.Element) -> Dict[str, Any]:
+    """Extract the interesting values of a <type> element into a plain dict"""
+    attributes: Dict[str, Any] = {}
+    usage = []
+    value = []
+    for child in elem:
+        if child.tag == "category":
+            attributes["category"] = child.attrib.get("name", "")
+        elif child.tag == "usage":
+            usage.append(child.attrib.get("name", ""))
+        elif child.tag == "value":
+            value.append(child.attrib.get("name", ""))
+        elif child.tag == "flags":
+            attributes["flags"] = dict(child.attrib)
+        elif child.text and child.text.strip():
+            attributes[child.tag] = child.text.strip()
+    if usage:
+        attributes["usage"] = usage
+    if value:
+        attributes["value"] = value
+    return attributes
+
+
+def iter_type_names_regex(file_path: str) -> Iterator[str]:
+    """Yield <type name="..."> names from a (possibly malformed) file, chunk by chunk
+
+    Only the unmatched tail of each chunk is carried over, so memory stays
+    bounded by the chunk size rather than the file size.
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        carry = ""
+        while True:
+            chunk = f.read(REGEX_CHUNK_SIZE)
+            buffer = carry + chunk
+            if not chunk:
+                for match in TYPE_NAME_PATTERN.finditer(buffer):
+                    yield match.group(1)
+                return
+            # Keep everything from the last '<' on; a tag may be split across chunks
+            cut = buffer.rfind('<')
+            if cut == -1:
+                cut = len(buffer)
+            for match in TYPE_NAME_PATTERN.finditer(buffer, 0, cut):
+                yield match.group(1)
+            carry = buffer[cut:]
+
+
+def iter_type_records(file_path: str) -> Iterator[TypeRecord]:
+    """Stream TypeRecords from a types XML file with iterparse
+
+    Each <type> subtree is discarded as soon as its record has been yielded,
+    so peak memory does not grow with the file. If the file turns out to be
+    malformed part-way through, the rest is recovered with the streaming
+    regex fallback (names only) and names already yielded are skipped.
+    """
+    seen = set()
+    try:
+        context = ET.iterparse(file_path, events=("start", "end"))
+        root = None
+        for event, elem in context:
+            if event == "start":
+                if root is None:
+                    root = elem
+                continue
+            if elem.tag != "type":
+                continue
+            name = elem.attrib.get("name")
+            if name and name not in seen:
+                seen.add(name)
+                yield TypeRecord(name, extract_type_attributes(elem))
+            # Drop the processed subtree and detach it from the root
+            elem.clear()
+            if root is not None:
+                root.clear()
+    except ET.ParseError:
+        # If XML parsing fails, fall back to regex extraction
+        for name in iter_type_names_regex(file_path):
+            if name not in seen:
+                seen.add(name)
+                yield TypeRecord(name, {})
+
+
+def parse_types_file(file_path: str) -> Dict[str, Dict[str, Any]]:
+    """Parse a types XML file into a {class name: attributes} dict
+
+    Falls back to regex extraction of <type name="..."> when the file is not
+    well-formed XML (common with hand-edited mod types files).
+    """
+    return {record.name: record.attributes for record in iter_type_records(file_path)}
+
+
+def _parse_in_worker(file_path: str) -> Tuple[str, Dict[str, Dict[str, Any]]]:
+    # Module-level so it can be pickled into pool worker processes
+    return file_path, parse_types_file(file_path)
+
+
+def parse_types_files(file_paths: List[str], max_workers: int = None,
+                      progress: ProgressCallback = None) -> Dict[str, Union[Dict[str, Dict[str, Any]], Exception]]:
+    """Parse several types files, using a process pool when it pays off
+
+    Returns {file path: types} in the order of file_paths; a file that could
+    not be parsed maps to the exception instead. Files whose worker process
+    died are parsed again serially. progress is called in the calling thread
+    as each file completes.
+    """
+    results: Dict[str, Union[Dict[str, Dict[str, Any]], Exception, None]] = {path: None for path in file_paths}
+    total = len(file_paths)
+    done = 0
+    if max_workers is None:
+        max_workers = min(total, os.cpu_count() or 1)
+
+    if total >= PARALLEL_MIN_FILES and max_workers > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                futures = {executor.submit(_parse_in_worker, path): path for path in file_paths}
+                for future in as_completed(futures):
+                    path = futures[future]
+                    try:
+                        results[path] = future.result()[1]
+                    except BrokenProcessPool:
+                        continue  # Not the file's fault - parsed serially below
+                    except Exception as e:
+                        results[path] = e
+                    done += 1
+                    if progress:
+                        progress(done, total, os.path.basename(path))
+        except (OSError, RuntimeError, ImportError):
+            pass  # No process support here (sandbox, frozen without freeze_support) - go serial
+
+    for path in file_paths:
+        if results[path] is not None:
+            continue
+        try:
+            results[path] = parse_types_file(path)
+        except Exception as e:
+            results[path] = e
+        done += 1
+        if progress:
+            progress(done, total, os.path.basename(path))
+    return results
+
+
+def list_types_files(folder: str) -> List[str]:
+    """Return sorted XML file names directly inside folder"""
+    if not folder or not os.path.isdir(folder):
+        return []
+    return sorted(f for f in os.listdir(folder) if f.endswith('.xml'))
+
+
+class TypesCatalog:
+    """Project-wide cache of parsed types XML files with mtime invalidation"""
+
+    def __init__(self):
+        self._entries: Dict[str, TypesFileEntry] = {}
+        self._name_index: Dict[str, TypesFileEntry] = {}
+        self._index_dirty = False
+        self._lock = threading.RLock()
+        self._disk_cache: Optional[TypesIndexCache] = None
+        self._search_index = TrigramIndex()
+        self._fuzzy_index: Optional[FuzzyIndex] = None  # Built on first fuzzy search
+        self._search_counts: Dict[str, int] = {}  # name -> number of indexed files defining it
+        self._indexed_entries: Dict[str, TypesFileEntry] = {}
+
+    def attach_cache(self, db_path: str):
+        """Use a persistent on-disk cache at db_path (replaces any previous one)"""
+        if self._disk_cache is not None and self._disk_cache.db_path == db_path:
+            return
+        try:
+            cache = TypesIndexCache(db_path)
+            cache.evict_missing()
+        except Exception:
+            cache = None  # Read-only folder or corrupt database - run without disk cache
+        with self._lock:
+            old_cache, self._disk_cache = self._disk_cache, cache
+        if old_cache is not None:
+            # A load still running on a worker may hold old_cache; once closed it
+            # just misses and drops stores instead of failing
+            old_cache.close()
+
+    @staticmethod
+    def _key(file_path: str) -> str:
+        return os.path.normcase(os.path.abspath(file_path))
+
+    def _cached_types(self, file_path: str, stat_result: os.stat_result):
+        """Return a current in-memory entry or disk-cached types for file_path, else None"""
+        with self._lock:
+            entry = self._entries.get(self._key(file_path))
+            disk_cache = self._disk_cache
+        if entry is not None and entry.is_current(stat_result):
+            return entry
+        if disk_cache is not None:
+            types = disk_cache.load(file_path, stat_result)
+            if types is not None:
+                return self._store_entry(file_path, stat_result, types, persist=False)
+        return None
+
+    def _store_entry(self, file_path: str, stat_result: os.stat_result,
+                     types: Dict[str, Dict[str, Any]], persist: bool = True) -> TypesFileEntry:
+        with self._lock:
+            disk_cache = self._disk_cache
+        if persist and disk_cache is not None:
+            disk_cache.store(file_path, stat_result, types)
+        entry = TypesFileEntry(file_path, stat_result.st_size, stat_result.st_mtime_ns,
+                               sorted(types), types)
+        with self._lock:
+            self._entries[self._key(file_path)] = entry
+            self._index_dirty = True
+        return entry
+
+    def get_entry(self, file_path: str) -> TypesFileEntry:
+        """Return the parsed entry for file_path, re-parsing only if it changed on disk
+
+        Raises OSError if the file can't be read.
+        """
+        stat_result = os.stat(file_path)
+        entry = self._cached_types(file_path, stat_result)
+        if entry is None:
+            entry = self._store_entry(file_path, stat_result, parse_types_file(file_path))
+        return entry
+
+    def class_names(self, file_path: str) -> List[str]:
+        """Sorted unique class names defined in a single types file"""
+        return self.get_entry(file_path).class_names
+
+    def refresh_folder(self, folder: str, progress: ProgressCallback = None,
+                       max_workers: int = None, errors: List[str] = None) -> List[TypesFileEntry]:
+        """Bring every XML file in folder up to date and drop entries for deleted files
+
+        Changed files are parsed concurrently (see parse_types_files) and the
+        results are merged in file name order, so the outcome does not depend
+        on which worker finished first. Files that can't be read are skipped
+        and, when an errors list is given, reported in it.
+        """
+        file_paths = [os.path.join(folder, xml_file) for xml_file in list_types_files(folder)]
+        total = len(file_paths)
+        entries: Dict[str, TypesFileEntry] = {}
+        stale: Dict[str, os.stat_result] = {}
+        for file_path in file_paths:
+            try:
+                stat_result = os.stat(file_path)
+            except OSError:
+                continue
+            entry = self._cached_types(file_path, stat_result)
+            if entry is None:
+                stale[file_path] = stat_result
+            else:
+                entries[file_path] = entry
+
+        if progress:
+            progress(len(entries), total, None)
+        if stale:
+            cached_count = len(entries)
+
+            def on_parsed(done, _stale_total, file_name):
+                if progress:
+                    progress(cached_count + done, total, file_name)
+
+            parsed = parse_types_files(list(stale), max_workers=max_workers, progress=on_parsed)
+            for file_path, types in parsed.items():
+                if isinstance(types, Exception):
+                    if errors is not None:
+                        errors.append(f"Error processing {os.path.basename(file_path)}: {str(types)}")
+                else:
+                    entries[file_path] = self._store_entry(file_path, stale[file_path], types)
+
+        ordered = [entries[path] for path in file_paths if path in entries]
+        seen = {self._key(path) for path in entries}
+        folder_key = self._key(folder)
+        with self._lock:
+            for key in list(self._entries):
+                if os.path.dirname(key) == folder_key and key not in seen:
+                    del self._entries[key]
+                    self._index_dirty = True
+            disk_cache = self._disk_cache
+        if disk_cache is not None:
+            disk_cache.evict_missing(entry.path for entry in ordered)
+        return ordered
+
+    def folder_class_names(self, folder: str, progress: ProgressCallback = None,
+                           errors: List[str] = None) -> List[str]:
+        """Sorted unique class names across all XML files in folder"""
+        names = set()
+        for entry in self.refresh_folder(folder, progress=progress, errors=errors):
+            names.update(entry.class_names)
+        return sorted(names)
+
+    def lookup(self, class_name: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Return (file path, attributes) for the first cached file defining class_name"""
+        with self._lock:
+            if self._index_dirty:
+                self._rebuild_index()
+            entry = self._name_index.get(class_name)
+        if entry is None:
+            return None
+        return entry.path, entry.types[class_name]
+
+    def _rebuild_index(self):
+        # Files are visited in path order so the winner for a name is deterministic
+        index: Dict[str, TypesFileEntry] = {}
+        for key in sorted(self._entries):
+            entry = self._entries[key]
+            for name in entry.class_names:
+                index.setdefault(name, entry)
+        self._name_index = index
+        self._index_dirty = False
+
+    def search_index(self) -> TrigramIndex:
+        """Return the substring index over every cached class name
+
+        The index is synced lazily: only files added, changed or dropped since
+        the last call have their names added to or removed from it.
+        """
+        with self._lock:
+            self._sync_name_indexes()
+            return self._search_index
+
+    def fuzzy_index(self) -> FuzzyIndex:
+        """Return the token index for fuzzy search over every cached class name"""
+        with self._lock:
+            self._sync_name_indexes()
+            if self._fuzzy_index is None:
+                self._fuzzy_index = FuzzyIndex(self._search_counts)
+            return self._fuzzy_index
+
+    def _sync_name_indexes(self):
+        # Caller holds self._lock
+        indexed = self._indexed_entries
+        counts = self._search_counts
+        added: List[str] = []
+        removed: List[str] = []
+
+        def drop(entry):
+            for name in entry.class_names:
+                counts[name] -= 1
+                if not counts[name]:
+                    del counts[name]
+                    removed.append(name)
+
+        for key in [key for key in indexed if key not in self._entries]:
+            drop(indexed.pop(key))
+        for key, entry in self._entries.items():
+            old_entry = indexed.get(key)
+            if old_entry is entry:
+                continue
+            if old_entry is not None:
+                drop(old_entry)
+            for name in entry.class_names:
+                count = counts.get(name, 0)
+                if not count:
+                    added.append(name)
+                counts[name] = count + 1
+            indexed[key] = entry
+
+        # counts is the final word for names that were both dropped and re-added
+        removed = [name for name in removed if name not in counts]
+        added = [name for name in added if name in counts]
+        self._search_index.remove_names(removed)
+        self._search_index.add_names(added)
+        if self._fuzzy_index is not None:
+            self._fuzzy_index.remove_names(removed)
+            self._fuzzy_index.add_names(added)
+
+    def invalidate(self, file_path: str = None):
+        """Forget one cached file, or everything if no path is given"""
+        with self._lock:
+            if file_path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(self._key(file_path), None)
+            self._index_dirty = True
+
+
+_shared_catalog = None
+
+
+def get_types_catalog() -> TypesCatalog:
+    """Return the process-wide TypesCatalog instance"""
+    global _shared_catalog
+    if _shared_catalog is None:
+        _shared_catalog = TypesCatalog()
+    return _shared_catalog
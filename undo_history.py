@@ -0,0 +1,200 @@
+"""Undo/redo history for market and trader documents.
+
+Every step is a small delta, never a copy of the document:
+
+* SetFields - (position, attribute, old value, new value) entries; position
+  is an item index, or None for a field of the document itself. Covers
+  item edits, bulk edits, batch transforms, metadata and trader categories.
+* InsertItems / RemoveItems - (position, item) entries that keep a
+  reference to the MarketItem objects themselves, which are never mutated
+  once they have left the document.
+
+Values are shared with the document rather than copied: code that changes a
+list field (Variants, Categories, ...) assigns a new list instead of
+mutating the old one, so the old list can serve as the undo value. A few
+hundred steps on a large market therefore cost kilobytes.
+"""
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, Iterable, List, Optional, Sequence, Tuple
+
+# Steps kept per document; the oldest are dropped first
+UNDO_LIMIT = 500
+
+# UndoHistory._saved when no state in the history matches the file
+_NOT_SAVED = object()
+
+# (item position or None for the document, attribute, old value, new value)
+FieldChange = Tuple[Optional[int], str, Any, Any]
+
+
+def snapshot(record, attrs: Sequence[str] = None) -> Tuple[Any, ...]:
+    """Current values of a record's fields (all of them by default), for field_changes"""
+    attrs = attrs if attrs is not None else [field.attr for field in record.FIELDS]
+    return tuple(getattr(record, attr) for attr in attrs)
+
+
+def field_changes(position: Optional[int], record, before: Tuple[Any, ...],
+                  attrs: Sequence[str] = None) -> List[FieldChange]:
+    """Entries for every field of record that differs from the snapshot before"""
+    attrs = attrs if attrs is not None else [field.attr for field in record.FIELDS]
+    changes = []
+    for attr, old in zip(attrs, before):
+        new = getattr(record, attr)
+        if new is not old and (new != old or type(new) is not type(old)):
+            changes.append((position, attr, old, new))
+    return changes
+
+
+class Operation(ABC):
+    """One undoable step"""
+
+    __slots__ = ("label",)
+
+    def __init__(self, label: str):
+        self.label = label
+
+    @abstractmethod
+    def undo(self, document) -> List[int]:
+        """Revert the step; return the item positions it touched"""
+
+    @abstractmethod
+    def redo(self, document) -> List[int]:
+        """Re-apply the step; return the item positions it touched"""
+
+
+class SetFields(Operation):
+    """Field values of the document and/or its items"""
+
+    __slots__ = ("changes",)
+
+    def __init__(self, changes: Iterable[FieldChange], label: str):
+        super().__init__(label)
+        self.changes = tuple(changes)
+
+    def _set(self, document, use_new: bool) -> List[int]:
+        positions = []
+        for position, attr, old, new in self.changes:
+            target = document if position is None else document.items[position]
+            setattr(target, attr, new if use_new else old)
+            if position is not None and (not positions or positions[-1] != position):
+                positions.append(position)
+        return positions
+
+    def undo(self, document) -> List[int]:
+        return self._set(document, False)
+
+    def redo(self, document) -> List[int]:
+        return self._set(document, True)
+
+
+class InsertItems(Operation):
+    """Items inserted into document.items; entries are (position, item) in ascending order"""
+
+    __slots__ = ("entries",)
+
+    def __init__(self, entries: Iterable[Tuple[int, Any]], label: str):
+        super().__init__(label)
+        self.entries = tuple(sorted(entries, key=lambda entry: entry[0]))
+
+    def _insert(self, document) -> List[int]:
+        for position, item in self.entries:
+            document.items.insert(position, item)
+        return [position for position, _ in self.entries]
+
+    def _remove(self, document) -> List[int]:
+        for position, _ in reversed(self.entries):
+            del document.items[position]
+        return [min(self.entries[0][0], len(document.items) - 1)] if document.items and self.entries else []
+
+    def undo(self, document) -> List[int]:
+        return self._remove(document)
+
+    def redo(self, document) -> List[int]:
+        return self._insert(document)
+
+
+class RemoveItems(InsertItems):
+    """Items removed from document.items; entries are (position before removal, item)"""
+
+    __slots__ = ()
+
+    def undo(self, document) -> List[int]:
+        return self._insert(document)
+
+    def redo(self, document) -> List[int]:
+        return self._remove(document)
+
+
+class UndoHistory:
+    """Undo and redo stacks for one document"""
+
+    def __init__(self, document, clean: bool = True, limit: int = UNDO_LIMIT):
+        self.document = document
+        self._undo: "deque[Operation]" = deque(maxlen=limit)
+        self._redo: List[Operation] = []
+        # Top of the undo stack when the document matched the file (None = empty stack);
+        # _NOT_SAVED when no reachable state matches it
+        self._saved = None if clean else _NOT_SAVED
+
+    @property
+    def can_undo(self) -> bool:
+        return bool(self._undo)
+
+    @property
+    def can_redo(self) -> bool:
+        return bool(self._redo)
+
+    def undo_label(self) -> Optional[str]:
+        return self._undo[-1].label if self._undo else None
+
+    def redo_label(self) -> Optional[str]:
+        return self._redo[-1].label if self._redo else None
+
+    def record(self, operation: Optional[Operation]):
+        """Add a step that has already been applied to the document (None is ignored)"""
+        if operation is None:
+            return
+        if len(self._undo) == self._undo.maxlen:
+            # The oldest step falls off: the state before it becomes unreachable and
+            # the state after it becomes the bottom of the stack
+            if self._saved is None:
+                self._saved = _NOT_SAVED
+            elif self._saved is self._undo[0]:
+                self._saved = None
+        self._undo.append(operation)
+        self._redo.clear()
+
+    def apply(self, operation: Operation) -> List[int]:
+        """Apply a step to the document and record it"""
+        positions = operation.redo(self.document)
+        self.record(operation)
+        return positions
+
+    def undo(self) -> Tuple[Optional[Operation], List[int]]:
+        if not self._undo:
+            return None, []
+        operation = self._undo.pop()
+        positions = operation.undo(self.document)
+        self._redo.append(operation)
+        return operation, positions
+
+    def redo(self) -> Tuple[Optional[Operation], List[int]]:
+        if not self._redo:
+            return None, []
+        operation = self._redo.pop()
+        positions = operation.redo(self.document)
+        self._undo.append(operation)
+        return operation, positions
+
+    def mark_saved(self):
+        """Record that the document now matches its file"""
+        self._saved = self._undo[-1] if self._undo else None
+
+    def is_saved(self) -> bool:
+        return self._saved is (self._undo[-1] if self._undo else None)
+
+    def clear(self):
+        self._undo.clear()
+        self._redo.clear()
+        self._saved = None
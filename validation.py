@@ -0,0 +1,316 @@
+"""Cross-reference checks for market and trader files.
+
+Checks are per file: market_issues looks at one market document (invalid
+values, price and stock ranges, ClassNames, Variants and SpawnAttachments
+missing from the types files) and trader_issues at one trader document
+(categories without a market file, items no market sells).
+
+ProjectValidator keeps the results for a whole project together with the
+set-based indexes the checks need - lower-cased type names, market file
+names and a count of every class name sold per market file - so an edit
+re-checks only the documents it can affect: the edited file itself, plus
+the traders that refer to a market file that appeared or disappeared or
+to a class name that started or stopped being sold.
+"""
+import os
+from collections import Counter
+from typing import Callable, Collection, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from market_model import MarketDocument, TraderDocument
+
+SEVERITY_ERROR = "error"
+SEVERITY_WARNING = "warning"
+
+KIND_MARKET = "market"
+KIND_TRADER = "trader"
+
+
+class Issue(NamedTuple):
+    """One problem found in a file"""
+    severity: str  # SEVERITY_ERROR or SEVERITY_WARNING
+    kind: str  # KIND_MARKET or KIND_TRADER
+    file: str  # File name inside the Market or Traders folder
+    position: Optional[int]  # Item index in a market file, if the issue is about one item
+    message: str
+
+
+def format_issue(issue: Issue) -> str:
+    where = f"{issue.file} [{issue.position}]" if issue.position is not None else issue.file
+    return f"{issue.severity.upper()}: {where}: {issue.message}"
+
+
+def category_name(category: str) -> str:
+    """Market file name (without .json) a trader category refers to; "Ammo:1" refers to Ammo"""
+    return category.split(":", 1)[0].strip()
+
+
+def market_name(file_name: str) -> str:
+    """Lower-cased name trader categories use for a market file"""
+    return os.path.splitext(file_name)[0].lower()
+
+
+def market_issues(file_name: str, document: MarketDocument, known_types: Collection[str] = None) -> List[Issue]:
+    """Problems in one market document
+
+    known_types, if given, holds the lower-cased class names of the types
+    files; items, variants and attachments not in it are reported.
+    """
+    issues = [Issue(SEVERITY_WARNING, KIND_MARKET, file_name, None, problem) for problem in document.problems]
+    seen: Dict[str, int] = {}
+    for position, item in enumerate(document.items):
+        name = item.class_name
+        if not name:
+            issues.append(Issue(SEVERITY_ERROR, KIND_MARKET, file_name, position, "item has no ClassName"))
+            continue
+        key = name.lower()
+        if key in seen:
+            issues.append(Issue(SEVERITY_WARNING, KIND_MARKET, file_name, position,
+                                f"{name} is listed again (first at index {seen[key]})"))
+        else:
+            seen[key] = position
+        if item.min_price_threshold > item.max_price_threshold:
+            issues.append(Issue(SEVERITY_WARNING, KIND_MARKET, file_name, position,
+                                f"{name}: MinPriceThreshold {item.min_price_threshold} is above "
+                                f"MaxPriceThreshold {item.max_price_threshold}"))
+        if item.min_stock_threshold > item.max_stock_threshold:
+            issues.append(Issue(SEVERITY_WARNING, KIND_MARKET, file_name, position,
+                                f"{name}: MinStockThreshold {item.min_stock_threshold} is above "
+                                f"MaxStockThreshold {item.max_stock_threshold}"))
+        if known_types is not None:
+            if key not in known_types:
+                issues.append(Issue(SEVERITY_WARNING, KIND_MARKET, file_name, position,
+                                    f"{name} is not in any types file"))
+            for variant in item.variants:
+                if variant.lower() not in known_types:
+                    issues.append(Issue(SEVERITY_WARNING, KIND_MARKET, file_name, position,
+                                        f"{name}: variant {variant} is not in any types file"))
+            for attachment in item.spawn_attachments:
+                if attachment.lower() not in known_types:
+                    issues.append(Issue(SEVERITY_WARNING, KIND_MARKET, file_name, position,
+                                        f"{name}: attachment {attachment} is not in any types file"))
+    return issues
+
+
+class TraderRefs(NamedTuple):
+    """What a trader file refers to - all that is needed to re-check it"""
+    problems: Tuple[str, ...]
+    categories: Tuple[str, ...]
+    items: Tuple[str, ...]
+
+    @classmethod
+    def from_document(cls, document: TraderDocument) -> "TraderRefs":
+        return cls(tuple(document.problems), tuple(document.categories), tuple(document.items))
+
+
+def _trader_issues(file_name: str, refs: TraderRefs, market_names: Collection[str],
+                   market_class_names: Collection[str] = None) -> List[Issue]:
+    issues = [Issue(SEVERITY_WARNING, KIND_TRADER, file_name, None, problem) for problem in refs.problems]
+    for category in refs.categories:
+        if category_name(category).lower() not in market_names:
+            issues.append(Issue(SEVERITY_ERROR, KIND_TRADER, file_name, None,
+                                f"category {category} has no market file"))
+    if market_class_names is not None:
+        for class_name in refs.items:
+            if class_name.lower() not in market_class_names:
+                issues.append(Issue(SEVERITY_WARNING, KIND_TRADER, file_name, None,
+                                    f"item {class_name} is not sold in any market file"))
+    return issues
+
+
+def trader_issues(file_name: str, document: TraderDocument, market_names: Collection[str],
+                  market_class_names: Collection[str] = None) -> List[Issue]:
+    """Problems in one trader document
+
+    market_names holds the lower-cased market file names without .json and
+    market_class_names, if given, the lower-cased class names they sell.
+    """
+    return _trader_issues(file_name, TraderRefs.from_document(document), market_names, market_class_names)
+
+
+class ProjectValidator:
+    """Issues of every market and trader file, kept current one document at a time"""
+
+    def __init__(self, known_types: Set[str] = None):
+        self.known_types = known_types  # Lower-cased type names; None skips the types checks
+        self._market_issues: Dict[str, List[Issue]] = {}
+        self._trader_issues: Dict[str, List[Issue]] = {}
+        self._market_documents: Dict[str, MarketDocument] = {}
+        self._market_class_names: Dict[str, Set[str]] = {}  # Market file -> lower-cased class names
+        self._sold = Counter()  # Lower-cased class name -> number of market files selling it
+        self._market_names: Set[str] = set()
+        self._traders: Dict[str, TraderRefs] = {}
+        self._traders_by_category: Dict[str, Set[str]] = {}  # Lower-cased market name -> trader files
+        self._traders_by_item: Dict[str, Set[str]] = {}  # Lower-cased class name -> trader files
+
+    def set_types(self, known_types: Optional[Set[str]]) -> Set[str]:
+        """Replace the type names and re-check every market file; returns the files whose issues changed"""
+        self.known_types = known_types
+        changed = set()
+        for file_name, document in self._market_documents.items():
+            if self._check_market(file_name, document):
+                changed.add(file_name)
+        return changed
+
+    def update_market(self, file_name: str, document: MarketDocument) -> Set[str]:
+        """Re-check one market file after it changed; returns the files whose issues changed"""
+        changed = {file_name} if self._check_market(file_name, document) else set()
+        self._market_documents[file_name] = document
+        new_names = {item.class_name.lower() for item in document.items if item.class_name}
+        return changed | self._recheck_traders(self._index_market(file_name, new_names))
+
+    def remove_market(self, file_name: str) -> Set[str]:
+        if file_name not in self._market_class_names:
+            return set()
+        self._market_documents.pop(file_name, None)
+        changed = {file_name} if self._market_issues.pop(file_name, None) else set()
+        name = market_name(file_name)
+        self._market_names.discard(name)
+        affected = set(self._traders_by_category.get(name, set()))
+        affected |= self._update_sold(self._market_class_names.pop(file_name), -1)
+        return changed | self._recheck_traders(affected)
+
+    def _index_market(self, file_name: str, new_names: Set[str]) -> Set[str]:
+        """Register a market file and the class names it sells; return the traders to re-check"""
+        name = market_name(file_name)
+        affected = set()
+        if name not in self._market_names:
+            self._market_names.add(name)
+            affected |= self._traders_by_category.get(name, set())
+        old_names = self._market_class_names.get(file_name, set())
+        self._market_class_names[file_name] = new_names
+        affected |= self._update_sold(old_names - new_names, -1)
+        affected |= self._update_sold(new_names - old_names, 1)
+        return affected
+
+    def update_trader(self, file_name: str, document: TraderDocument) -> Set[str]:
+        """Re-check one trader file after it changed; returns the files whose issues changed"""
+        self._unindex_trader(file_name)
+        refs = TraderRefs.from_document(document)
+        self._traders[file_name] = refs
+        for category in refs.categories:
+            self._traders_by_category.setdefault(category_name(category).lower(), set()).add(file_name)
+        for class_name in refs.items:
+            self._traders_by_item.setdefault(class_name.lower(), set()).add(file_name)
+        return self._recheck_traders({file_name})
+
+    def remove_trader(self, file_name: str) -> Set[str]:
+        self._unindex_trader(file_name)
+        self._traders.pop(file_name, None)
+        return {file_name} if self._trader_issues.pop(file_name, None) else set()
+
+    def _unindex_trader(self, file_name: str):
+        refs = self._traders.get(file_name)
+        if refs is None:
+            return
+        for category in refs.categories:
+            self._traders_by_category.get(category_name(category).lower(), set()).discard(file_name)
+        for class_name in refs.items:
+            self._traders_by_item.get(class_name.lower(), set()).discard(file_name)
+
+    def _update_sold(self, names: Iterable[str], delta: int) -> Set[str]:
+        """Adjust the sold counts; return the traders referring to names that started or stopped being sold"""
+        affected = set()
+        sold = self._sold
+        for name in names:
+            count = sold[name] + delta
+            if count > 0:
+                sold[name] = count
+            else:
+                del sold[name]
+            if (count == 0 or (count == 1 and delta > 0)) and name in self._traders_by_item:
+                affected |= self._traders_by_item[name]
+        return affected
+
+    def _check_market(self, file_name: str, document: MarketDocument) -> bool:
+        issues = market_issues(file_name, document, self.known_types)
+        if issues == self._market_issues.get(file_name, []):
+            return False
+        if issues:
+            self._market_issues[file_name] = issues
+        else:
+            self._market_issues.pop(file_name, None)
+        return True
+
+    def _recheck_traders(self, file_names: Iterable[str]) -> Set[str]:
+        changed = set()
+        for file_name in file_names:
+            refs = self._traders.get(file_name)
+            if refs is None:
+                continue
+            issues = _trader_issues(file_name, refs, self._market_names, self._sold)
+            if issues != self._trader_issues.get(file_name, []):
+                changed.add(file_name)
+                if issues:
+                    self._trader_issues[file_name] = issues
+                else:
+                    self._trader_issues.pop(file_name, None)
+        return changed
+
+    def add_error(self, kind: str, file_name: str, message: str) -> Set[str]:
+        """Record a file that could not be read; returns the files whose issues changed
+
+        An unreadable market file still exists as far as trader categories
+        are concerned, but sells nothing.
+        """
+        if kind == KIND_MARKET:
+            self._market_documents.pop(file_name, None)
+            affected = self._index_market(file_name, set())
+            self._market_issues[file_name] = [Issue(SEVERITY_ERROR, kind, file_name, None, message)]
+        else:
+            self.remove_trader(file_name)
+            affected = set()
+            self._trader_issues[file_name] = [Issue(SEVERITY_ERROR, kind, file_name, None, message)]
+        return {file_name} | self._recheck_traders(affected)
+
+    def issues(self) -> List[Issue]:
+        """Every issue, market files first, each file's issues in order"""
+        result = []
+        for file_name in sorted(self._market_issues):
+            result.extend(self._market_issues[file_name])
+        for file_name in sorted(self._trader_issues):
+            result.extend(self._trader_issues[file_name])
+        return result
+
+    def counts(self) -> Tuple[int, int]:
+        """(errors, warnings)"""
+        errors = warnings = 0
+        for issues in list(self._market_issues.values()) + list(self._trader_issues.values()):
+            for issue in issues:
+                if issue.severity == SEVERITY_ERROR:
+                    errors += 1
+                else:
+                    warnings += 1
+        return errors, warnings
+
+
+def build_validator(market_paths: Iterable[str], trader_paths: Iterable[str], known_types: Set[str] = None,
+                    progress: Callable[[int, int, str], None] = None) -> ProjectValidator:
+    """Load and check every market and trader file; unreadable files are errors"""
+    market_paths = list(market_paths)
+    trader_paths = list(trader_paths)
+    total = len(market_paths) + len(trader_paths)
+    validator = ProjectValidator(known_types)
+    done = 0
+    for kind, paths, document_class in ((KIND_MARKET, market_paths, MarketDocument),
+                                        (KIND_TRADER, trader_paths, TraderDocument)):
+        for path in paths:
+            file_name = os.path.basename(path)
+            try:
+                document = document_class.load(path)
+            except Exception as e:
+                validator.add_error(kind, file_name, f"can't be read: {e}")
+            else:
+                if kind == KIND_MARKET:
+                    validator.update_market(file_name, document)
+                else:
+                    validator.update_trader(file_name, document)
+            done += 1
+            if progress:
+                progress(done, total, file_name)
+    return validator
+
+
+def validate_files(market_paths: Iterable[str], trader_paths: Iterable[str], known_types: Set[str] = None,
+                   progress: Callable[[int, int, str], None] = None) -> List[Issue]:
+    """Load and check every market and trader file; unreadable files are errors"""
+    return build_validator(market_paths, trader_paths, known_types, progress).issues()